@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Native Anki package (.apkg) exporter
+Builds the collection SQLite database in memory and writes it and the media
+straight into the package zip, one entry at a time, so the collection is not
+copied through a temporary file and memory use does not grow with the size
+of the media set
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import zipfile
+
+SOUND_REFERENCE = re.compile(r'\[sound:([^\]]+)\]')
+IMAGE_REFERENCE = re.compile(r'<img [^>]*src=["\']?([^"\' >]+)')
+FIELD_SEPARATOR = '\x1f'
+
+# Already-compressed formats are stored as-is instead of being deflated again
+STORED_EXTENSIONS = ('.mp3', '.ogg', '.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+DEFAULT_CSS = """.card {
+ font-family: arial;
+ font-size: 20px;
+ text-align: center;
+ color: black;
+ background-color: white;
+}
+"""
+
+SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn on notes (usn);
+CREATE INDEX ix_cards_usn on cards (usn);
+CREATE INDEX ix_revlog_usn on revlog (usn);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_cards_sched on cards (did, queue, due);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+CREATE INDEX ix_notes_csum on notes (csum);
+"""
+
+COLLECTION_CONF = {
+    "activeDecks": [1], "curDeck": 1, "newSpread": 0, "collapseTime": 1200, "timeLim": 0,
+    "estTimes": True, "dueCounts": True, "curModel": None, "nextPos": 1, "sortType": "noteFld",
+    "sortBackwards": False, "addToCur": True,
+}
+
+DECK_CONF = {
+    "1": {
+        "id": 1, "name": "Default", "replayq": True, "maxTaken": 60, "timer": 0, "autoplay": True,
+        "mod": 0, "usn": 0, "dyn": False,
+        "lapse": {"delays": [10], "mult": 0, "minInt": 1, "leechFails": 8, "leechAction": 0},
+        "rev": {"perDay": 200, "ease4": 1.3, "fuzz": 0.05, "minSpace": 1, "ivlFct": 1,
+                "maxIvl": 36500, "bury": True},
+        "new": {"delays": [1, 10], "ints": [1, 4, 7], "initialFactor": 2500, "separate": True,
+                "order": 1, "perDay": 20, "bury": True},
+    }
+}
+
+def _deck(deck_id, name, now):
+    return {
+        "id": deck_id, "name": name, "desc": "", "mod": now, "usn": -1, "collapsed": False,
+        "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0], "timeToday": [0, 0],
+        "dyn": 0, "conf": 1, "extendNew": 10, "extendRev": 50,
+    }
+
+def basic_model(model_id, name, deck_id, css=DEFAULT_CSS):
+    """Return a two-field (Front/Back) note type equivalent to Anki's "Basic" model"""
+    return {
+        "id": model_id, "name": name, "type": 0, "mod": int(time.time()), "usn": -1, "sortf": 0,
+        "did": deck_id, "tags": [], "vers": [], "latexPre": "", "latexPost": "", "css": css,
+        "req": [[0, "any", [0]]],
+        "flds": [
+            {"name": field, "ord": ord_, "sticky": False, "rtl": False, "font": "Arial", "size": 20,
+             "media": []}
+            for ord_, field in enumerate(["Front", "Back"])
+        ],
+        "tmpls": [{
+            "name": "Card 1", "ord": 0, "did": None, "bqfmt": "", "bafmt": "",
+            "qfmt": "{{Front}}",
+            "afmt": "{{FrontSide}}\n\n<hr id=answer>\n\n{{Back}}",
+        }],
+    }
+
+def _strip_html(text):
+    return re.sub(r'<[^>]*>', '', text).strip()
+
+def _guid(deck_name, front, occurrence):
+    """Stable note GUID, so re-importing a rebuilt package updates notes in place"""
+    return hashlib.sha1(f"{deck_name}\x1f{front}\x1f{occurrence}".encode('utf-8')).hexdigest()[:16]
+
+def _note_id(guid):
+    """Note and card id derived from the GUID (52 bits, within Anki's integer range)
+
+    Ids from the clock would overlap between packages built in the same
+    second, and Anki skips or merges notes whose ids collide on import.
+    """
+    return int(guid[:13], 16)
+
+def _collection_image(db):
+    """Return the in-memory collection as the bytes of an SQLite database file"""
+    if hasattr(db, "serialize"):  # Python 3.11+
+        return db.serialize()
+    fd, path = tempfile.mkstemp(suffix=".anki2")
+    os.close(fd)
+    try:
+        disk = sqlite3.connect(path)
+        db.backup(disk)
+        disk.close()
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+def write_apkg(path, deck_name, deck_id, model, notes, media_dir="sounds"):
+    """Write an .apkg to `path` from an iterable of (front, back) notes
+
+    Notes are inserted as they are produced. Every [sound:...] file and
+    <img> source they reference that exists in `media_dir` is added to the
+    package. Returns a dict with the note and media counts.
+    """
+    now = int(time.time())
+    media = []
+    seen_media = set()
+    occurrences = {}
+
+    def rows():
+        for index, (front, back) in enumerate(notes):
+            # Repeated fronts (e.g. the two กุ vowel cards) still need distinct GUIDs
+            occurrences[front] = occurrences.get(front, 0) + 1
+            fields = front + back
+            for name in SOUND_REFERENCE.findall(fields) + IMAGE_REFERENCE.findall(fields):
+                if name not in seen_media and os.path.exists(os.path.join(media_dir, name)):
+                    seen_media.add(name)
+                    media.append(name)
+            sort_field = _strip_html(front)
+            checksum = int(hashlib.sha1(sort_field.encode('utf-8')).hexdigest()[:8], 16)
+            guid = _guid(deck_name, front, occurrences[front])
+            yield (_note_id(guid), guid, model["id"], now, -1, "",
+                   f"{front}{FIELD_SEPARATOR}{back}", sort_field, checksum, 0, "", index)
+
+    db = sqlite3.connect(":memory:")
+    try:
+        db.executescript(SCHEMA)
+        decks = {"1": _deck(1, "Default", now), str(deck_id): _deck(deck_id, deck_name, now)}
+        db.execute("INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+                   (now, now * 1000, now * 1000, json.dumps(COLLECTION_CONF),
+                    json.dumps({str(model["id"]): model}), json.dumps(decks), json.dumps(DECK_CONF)))
+        note_count = 0
+        for row in rows():
+            db.execute("INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row[:11])
+            # One card per note (Basic); new cards are due in note order
+            db.execute("INSERT INTO cards VALUES (?, ?, ?, 0, ?, -1, 0, 0, ?, 0, 0, 0, 0, 0, 0, 0, 0, '')",
+                       (row[0], row[0], deck_id, now, row[11]))
+            note_count += 1
+        db.commit()
+        collection = _collection_image(db)
+    finally:
+        db.close()
+
+    tmp = f"{path}.tmp"
+    with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as package:
+        package.writestr("collection.anki2", collection)
+        del collection
+        media_map = {}
+        for index, name in enumerate(media):
+            compression = zipfile.ZIP_STORED if name.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+            # ZipFile.write copies in fixed-size chunks, never the whole file
+            package.write(os.path.join(media_dir, name), str(index), compress_type=compression)
+            media_map[str(index)] = name
+        package.writestr("media", json.dumps(media_map, ensure_ascii=False))
+    os.replace(tmp, path)
+
+    return {"notes": note_count, "media": len(media)}
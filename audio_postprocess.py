@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Audio post-processing stage for synthesized clips
+Trims leading/trailing silence, normalizes loudness and re-encodes each
+clip as low-bitrate mono MP3 across a process pool
+Needs pydub (and ffmpeg); results are cached by input hash
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import profiling
+
+CACHE_DIR = os.path.join(".tts_cache", "processed")
+DEFAULT_BITRATE = "32k"
+DEFAULT_TARGET_DBFS = -20.0
+SILENCE_THRESHOLD_DBFS = -45.0
+KEEP_SILENCE_MS = 40
+
+# Serializes manifest merges when several decks post-process at the same time
+_manifest_lock = threading.Lock()
+
+def postprocess_available():
+    """Check if pydub is available for post-processing"""
+    try:
+        import pydub
+        return True
+    except ImportError:
+        return False
+
+def _leading_silence(segment):
+    from pydub.silence import detect_leading_silence
+    return detect_leading_silence(segment, silence_threshold=SILENCE_THRESHOLD_DBFS)
+
+def process_clip(filename, bitrate=DEFAULT_BITRATE, target_dbfs=DEFAULT_TARGET_DBFS):
+    """Return the trimmed, normalized, re-encoded MP3 bytes for `filename`"""
+    import io
+    from pydub import AudioSegment
+
+    segment = AudioSegment.from_file(filename, format="mp3")
+    start = max(0, _leading_silence(segment) - KEEP_SILENCE_MS)
+    end = len(segment) - max(0, _leading_silence(segment.reverse()) - KEEP_SILENCE_MS)
+    if end > start:
+        segment = segment[start:end]
+    if segment.dBFS != float("-inf"):
+        segment = segment.apply_gain(target_dbfs - segment.dBFS)
+    buffer = io.BytesIO()
+    segment.set_channels(1).export(buffer, format="mp3", bitrate=bitrate)
+    return buffer.getvalue()
+
+def _file_hash(filename):
+    with open(filename, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _write_atomic(filename, data):
+    tmp = f"{filename}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, filename)
+
+@profiling.traced("postprocess_files")
+def postprocess_files(filenames, bitrate=DEFAULT_BITRATE, target_dbfs=DEFAULT_TARGET_DBFS, workers=None,
+                      cache_dir=CACHE_DIR):
+    """Post-process clips in place across a process pool and return a stats dict
+
+    Results are cached by (input hash, settings), and files that already hold
+    a post-processed result are left alone, so reruns do no work.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    stats = {"processed": 0, "cached": 0, "skipped": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0}
+    if not postprocess_available():
+        print("Post-processing needs pydub (pip install pydub, plus ffmpeg); skipping.")
+        return stats
+
+    settings = f"{bitrate}|{target_dbfs}|{SILENCE_THRESHOLD_DBFS}|{KEEP_SILENCE_MS}"
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    outputs = set(manifest.values())
+
+    pending = {}
+    for filename in filenames:
+        if not os.path.exists(filename):
+            continue
+        digest = _file_hash(filename)
+        if digest in outputs:
+            stats["skipped"] += 1
+            continue
+        key = hashlib.sha256(f"{digest}|{settings}".encode('utf-8')).hexdigest()
+        cached = os.path.join(cache_dir, f"{key}.mp3")
+        size = os.path.getsize(filename)
+        if key in manifest and os.path.exists(cached):
+            shutil.copyfile(cached, f"{filename}.tmp")
+            os.replace(f"{filename}.tmp", filename)
+            stats["cached"] += 1
+            stats["bytes_before"] += size
+            stats["bytes_after"] += os.path.getsize(filename)
+        else:
+            pending[filename] = (key, size)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {filename: pool.submit(process_clip, filename, bitrate, target_dbfs) for filename in pending}
+            for filename, future in futures.items():
+                key, size = pending[filename]
+                try:
+                    audio = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"✗ {filename} - Error post-processing audio: {e}")
+                    continue
+                _write_atomic(os.path.join(cache_dir, f"{key}.mp3"), audio)
+                _write_atomic(filename, audio)
+                manifest[key] = hashlib.sha256(audio).hexdigest()
+                stats["processed"] += 1
+                stats["bytes_before"] += size
+                stats["bytes_after"] += len(audio)
+
+    with _manifest_lock:
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = {**json.load(f), **manifest}
+        _write_atomic(manifest_path, json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+    report_savings(stats)
+    return stats
+
+def report_savings(stats):
+    """Print a one-line summary of the bytes saved by post-processing"""
+    before = stats["bytes_before"]
+    saved = before - stats["bytes_after"]
+    percent = 100.0 * saved / before if before else 0.0
+    print(f"Post-processed {stats['processed']} clips ({stats['cached']} from cache, "
+          f"{stats['skipped']} already done, {stats['failed']} failed): "
+          f"{before / 1024:.1f} KB -> {stats['bytes_after'] / 1024:.1f} KB, saved {saved / 1024:.1f} KB ({percent:.0f}%)")
+
+def add_postprocess_arguments(parser):
+    """Add the shared --postprocess/--bitrate options to an argparse parser"""
+    parser.add_argument('--postprocess', action='store_true',
+                        help="trim silence, normalize loudness and re-encode clips as mono MP3 (needs pydub)")
+    parser.add_argument('--bitrate', default=DEFAULT_BITRATE,
+                        help=f"MP3 bitrate for post-processed clips (default: {DEFAULT_BITRATE})")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for Thai deck generation
+Times TSV rendering, vowel helpers and the audio pipeline against synthetic
+datasets scaled from the real consonant and vowel data, using an in-process
+fake TTS backend, and emits the results as JSON
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import generate_thai_consonant_deck as consonant_deck
+import generate_thai_vowel_deck as vowel_deck
+import thai_chars
+from thai_data import Consonant, VowelRow, consonant_table, vowel_form_table
+from tts_cache import TTSCache
+from tts_engine import synthesize_all
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+class FakeTTS:
+    """In-process stand-in for gTTS that sleeps for `latency` seconds per request"""
+
+    def __init__(self, latency=0.05, clip_bytes=8 * 1024):
+        self.latency = latency
+        self.clip_bytes = clip_bytes
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, text):
+        with self.lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        return text.encode('utf-8').ljust(self.clip_bytes, b'\0')
+
+def scaled_consonants(size):
+    """Return `size` consonant entries, repeating CONSONANTS with unique fronts"""
+    base = consonant_deck.CONSONANTS.records
+    rows = []
+    for i in range(size):
+        consonant, *rest = base[i % len(base)]
+        copy = i // len(base)
+        rows.append(Consonant(f"{consonant}{copy}" if copy else consonant, *rest))
+    return rows
+
+def scaled_vowel_rows(size):
+    """Return `size` vowel rows, repeating vowel_rows with unique syllables"""
+    base = vowel_deck.vowel_rows
+    rows = []
+    for i in range(size):
+        row = base[i % len(base)]
+        copy = i // len(base)
+        suffix = str(copy) if copy else ""
+        rows.append(VowelRow(*(cell + suffix if cell and idx != 2 else cell for idx, cell in enumerate(row.cells))))
+    return rows
+
+@contextmanager
+def patched(module, name, value):
+    original = getattr(module, name)
+    setattr(module, name, value)
+    try:
+        yield
+    finally:
+        setattr(module, name, original)
+
+@contextmanager
+def quiet():
+    """Silence the generators' progress output while timing"""
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        yield
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+def measure(function, repeat):
+    """Run `function` `repeat` times and return the individual timings in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+def result(name, size, timings, **extra):
+    best = min(timings)
+    entry = {
+        "benchmark": name,
+        "size": size,
+        "min_s": best,
+        "median_s": statistics.median(timings),
+        "items_per_s": size / best if best > 0 else None,
+    }
+    entry.update(extra)
+    return entry
+
+def bench_create_tsv_deck(size, repeat):
+    rows = scaled_consonants(size)
+    with patched(consonant_deck, "CONSONANTS", consonant_table(rows)), quiet():
+        full = measure(lambda: consonant_deck.create_tsv_deck(rebuild=True), repeat)
+        noop = measure(consonant_deck.create_tsv_deck, repeat)
+    return [result("create_tsv_deck", size, full), result("create_tsv_deck_noop", size, noop)]
+
+def bench_make_table(size, repeat):
+    rows = scaled_vowel_rows(size)
+
+    def run():
+        for row in rows:
+            for cell in (0, 1, 3, 4):
+                vowel_deck.make_table(row, cell)
+    return [result("make_table", size, measure(run, repeat))]
+
+def bench_extract_vowel_symbol(size, repeat):
+    cells = [cell for row in scaled_vowel_rows(size) for cell in row.cells if cell][:size]
+
+    def run():
+        for cell in cells:
+            vowel_deck.extract_vowel_symbol(cell)
+    batch = measure(lambda: thai_chars.vowel_symbols(cells), repeat)
+    return [result("extract_vowel_symbol", len(cells), measure(run, repeat)),
+            result("vowel_symbols_batch", len(cells), batch)]
+
+def bench_get_card_front_vowels(size, repeat):
+    with patched(vowel_deck, "VOWEL_FORMS", vowel_form_table(scaled_vowel_rows(size), {})):
+        return [result("get_card_front_vowels", size, measure(vowel_deck.get_card_front_vowels, repeat))]
+
+def bench_audio_pipeline(clips, latency, jobs_options, repeat):
+    results = []
+    texts = [row[1] for row in scaled_consonants(clips)]
+    for jobs in jobs_options:
+        timings = []
+        for _ in range(repeat):
+            fake = FakeTTS(latency=latency)
+            with tempfile.TemporaryDirectory() as workdir:
+                audio_jobs = [(str(i), f"{text} {i}", os.path.join(workdir, f"{i}.mp3"))
+                              for i, text in enumerate(texts)]
+                cache = TTSCache(cache_dir=os.path.join(workdir, "cache"))
+                with quiet():
+                    stats = synthesize_all(audio_jobs, workers=jobs, rate=0, synthesize=fake, cache=cache)
+                timings.append(stats["seconds"])
+        results.append(result("audio_pipeline", clips, timings, jobs=jobs, latency_s=latency,
+                              requests=fake.requests))
+    return results
+
+def compare(results, baseline_path, tolerance):
+    """Return a list of benchmarks that got slower than the baseline by more than `tolerance`"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)["results"]
+    identity = lambda entry: (entry["benchmark"], entry["size"], entry.get("jobs"))
+    previous = {identity(entry): entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        old = previous.get(identity(entry))
+        if old and entry["min_s"] > old["min_s"] * (1 + tolerance):
+            regressions.append({"benchmark": entry["benchmark"], "size": entry["size"], "jobs": entry.get("jobs"),
+                                "baseline_s": old["min_s"], "current_s": entry["min_s"]})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Thai deck generation offline")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated dataset sizes in rows (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per benchmark (default: %(default)s)")
+    parser.add_argument('--audio-clips', type=int, default=200,
+                        help="clips synthesized by the audio pipeline benchmark (default: %(default)s)")
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help="fake TTS latency per request in seconds (default: %(default)s)")
+    parser.add_argument('--jobs', default="1,4,16",
+                        help="comma-separated worker counts for the audio pipeline (default: %(default)s)")
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    parser.add_argument('--compare', metavar='BASELINE', help="fail if slower than this earlier JSON result")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown against the baseline, as a fraction (default: %(default)s)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = []
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # create_tsv_deck writes into the current directory
+        os.chdir(tmp)
+        try:
+            for size in sizes:
+                results += bench_create_tsv_deck(size, args.repeat)
+                results += bench_make_table(size, args.repeat)
+                results += bench_extract_vowel_symbol(size, args.repeat)
+                results += bench_get_card_front_vowels(size, args.repeat)
+            results += bench_audio_pipeline(args.audio_clips, args.latency,
+                                            [int(jobs) for jobs in args.jobs.split(",")], args.repeat)
+        finally:
+            os.chdir(workdir)
+
+    report = {"python": sys.version.split()[0], "results": results}
+    exit_code = 0
+    if args.compare:
+        report["regressions"] = compare(results, args.compare, args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Non-interactive build for the Thai Anki decks
+Models each deck as a dependency graph (data -> TSV -> audio -> post-process
+-> package) and runs independent stages, including separate decks, in parallel
+
+Exit codes: 0 on success, 1 if any stage failed or was skipped, 2 on bad arguments
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import profiling
+from audio_postprocess import add_postprocess_arguments, postprocess_files
+from tts_backends import BackendUnavailable, get_backend
+from tts_engine import TokenBucket, add_audio_arguments
+
+DECKS = {
+    "consonants": "generate_thai_consonant_deck",
+    "vowels": "generate_thai_vowel_deck",
+    "syllables": "generate_thai_syllable_deck",
+}
+DEFAULT_DECKS = ["consonants", "vowels"]
+# The syllable drill deck has no audio or cheat-sheet tiles: it has tens of thousands of cards
+AUDIO_DECKS = {"consonants", "vowels"}
+TILE_DECKS = {"consonants", "vowels"}
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+class BuildError(Exception):
+    """A stage ran but left its deck incomplete"""
+
+def stage_data(module_name, args, limiter):
+    importlib.import_module(module_name)
+
+def stage_tsv(module_name, args, limiter):
+    importlib.import_module(module_name).create_tsv_deck(rebuild=args.rebuild, compact=args.compact,
+                                                         tiles=args.tiles)
+
+def stage_tiles(module_name, args, limiter):
+    stats = importlib.import_module(module_name).generate_tiles()
+    if stats["failed"]:
+        raise BuildError(f"{stats['failed']} cheat-sheet tiles failed")
+
+def stage_audio(module_name, args, limiter):
+    try:
+        get_backend(args.tts, args.tts_url).check()
+    except (BackendUnavailable, ValueError) as e:
+        raise BuildError(str(e))
+    stats = importlib.import_module(module_name).generate_audio_files(
+        jobs=args.jobs, rate=args.rate, batch=args.batch, limiter=limiter, retries=args.retries, resume=args.resume,
+        tts=args.tts, tts_url=args.tts_url)
+    if stats["failed"]:
+        raise BuildError(f"{stats['failed']} audio clips failed")
+
+def stage_postprocess(module_name, args, limiter):
+    audio_jobs = importlib.import_module(module_name).audio_jobs()
+    stats = postprocess_files([filename for label, text, filename in audio_jobs], bitrate=args.bitrate)
+    if stats["failed"]:
+        raise BuildError(f"{stats['failed']} clips failed post-processing")
+
+def stage_validate(module_name, args, limiter):
+    from validate_audio import print_report, validate
+    deck = next(deck for deck, name in DECKS.items() if name == module_name)
+    started = time.perf_counter()
+    report = validate([f"thai_{deck}.tsv"])
+    print_report(report, time.perf_counter() - started)
+    if report["problems"]:
+        raise BuildError(f"{len(report['problems'])} clips missing or invalid")
+
+def stage_package(module_name, args, limiter):
+    importlib.import_module(module_name).create_anki_package(compact=args.compact, tiles=args.tiles)
+
+def _run_stage(stage, function, module_name, args, limiter):
+    with profiling.span(stage, "build"):
+        function(module_name, args, limiter)
+
+def build_graph(args):
+    """Return {stage: (dependencies, function, module name)} for the requested decks and stages"""
+    graph = {}
+    for deck in args.decks:
+        module_name = DECKS[deck]
+        graph[f"{deck}:data"] = ([], stage_data, module_name)
+        graph[f"{deck}:tsv"] = ([f"{deck}:data"], stage_tsv, module_name)
+        media = []
+        if args.audio and deck in AUDIO_DECKS:
+            graph[f"{deck}:audio"] = ([f"{deck}:data"], stage_audio, module_name)
+            media = [f"{deck}:audio"]
+            if args.postprocess:
+                graph[f"{deck}:postprocess"] = ([f"{deck}:audio"], stage_postprocess, module_name)
+                media = [f"{deck}:postprocess"]
+        if args.tiles and deck in TILE_DECKS:
+            graph[f"{deck}:tiles"] = ([f"{deck}:data"], stage_tiles, module_name)
+            media.append(f"{deck}:tiles")
+        if args.validate and deck in AUDIO_DECKS:
+            graph[f"{deck}:validate"] = ([f"{deck}:tsv"] + media, stage_validate, module_name)
+            media.append(f"{deck}:validate")
+        if args.apkg:
+            graph[f"{deck}:package"] = ([f"{deck}:tsv"] + media, stage_package, module_name)
+    return graph
+
+def run_graph(graph, args, workers):
+    """Run every stage once its dependencies succeeded; return {stage: (status, seconds, error)}"""
+    limiter = TokenBucket(args.rate)  # shared, so parallel decks respect one request rate
+    results = {}
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while len(results) < len(graph):
+            for stage, (dependencies, function, module_name) in graph.items():
+                if stage in results or stage in running.values():
+                    continue
+                statuses = [results.get(dependency, (None,))[0] for dependency in dependencies]
+                if any(status in ("failed", "skipped") for status in statuses):
+                    results[stage] = ("skipped", 0.0, "a dependency failed")
+                elif all(status == "ok" for status in statuses):
+                    started = time.monotonic()
+                    future = pool.submit(_run_stage, stage, function, module_name, args, limiter)
+                    future.started = started
+                    running[future] = stage
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                seconds = time.monotonic() - future.started
+                try:
+                    future.result()
+                    results[stage] = ("ok", seconds, None)
+                except Exception as e:
+                    results[stage] = ("failed", seconds, e)
+    return results
+
+def print_report(graph, results):
+    print("\n" + "=" * 40)
+    print("Build summary:")
+    for stage in graph:
+        status, seconds, error = results[stage]
+        mark = "✓" if status == "ok" else "✗"
+        detail = f" - {error}" if error else ""
+        print(f"{mark} {stage:<22} {status:<8} {seconds:6.2f}s{detail}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Thai Anki decks without prompts")
+    parser.add_argument('--decks', default=",".join(DEFAULT_DECKS),
+                        help=f"comma-separated decks to build, from {', '.join(DECKS)} "
+                             f"(default: {','.join(DEFAULT_DECKS)})")
+    parser.add_argument('--audio', action='store_true', help="generate audio files (engine chosen with --tts)")
+    add_audio_arguments(parser)
+    add_postprocess_arguments(parser)
+    parser.add_argument('--apkg', action='store_true', help="write an .apkg package per deck")
+    parser.add_argument('--validate', action='store_true',
+                        help="check every clip the decks reference before packaging (see validate_audio.py)")
+    parser.add_argument('--compact', action='store_true',
+                        help="render cards with shared note-type CSS instead of inline styles")
+    parser.add_argument('--tiles', action='store_true',
+                        help="show each card's row of the cheat sheet on its back (needs Pillow)")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="re-render every card instead of only the changed ones")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help="stages to run at the same time (default: number of CPUs)")
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    args.decks = [deck.strip() for deck in args.decks.split(",") if deck.strip()]
+    unknown = [deck for deck in args.decks if deck not in DECKS]
+    if unknown:
+        parser.error(f"unknown deck(s): {', '.join(unknown)}")
+    return args
+
+def main(argv=None):
+    """Build the requested decks and return the process exit code"""
+    args = parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    graph = build_graph(args)
+    started = time.monotonic()
+    results = run_graph(graph, args, max(1, args.workers))
+    print_report(graph, results)
+    if args.profile:
+        profiling.finish(args.profile)
+    ok = all(status == "ok" for status, seconds, error in results.values())
+    print(f"\nBuild {'succeeded' if ok else 'failed'} in {time.monotonic() - started:.2f}s")
+    return EXIT_OK if ok else EXIT_FAILED
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Google Translate TTS endpoint that gTTS calls
+Answers the batchexecute RPC with deterministic MP3s (the stub backend's
+silent frames), after a configurable latency, and injects HTTP 429s, 5xx
+errors and truncated bodies at configurable rates, so the audio pipeline's
+retries, circuit breaker and throughput can be exercised offline.
+Point a generator at it with --tts-url http://127.0.0.1:PORT.
+"""
+
+import argparse
+import base64
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from tts_backends import StubBackend
+
+TTS_PATH = "/_/TranslateWebserverUi/data/batchexecute"
+DEFAULT_PORT = 8790
+OUTCOMES = ("ok", "rate_limited", "server_error", "truncated", "quota", "bad_request")
+
+def parse_latency(spec):
+    """Return a function drawing one latency in seconds from a spec
+
+    fixed:S, uniform:LOW,HIGH, exp:MEAN or lognormal:MEDIAN,SIGMA
+    (a bare number means fixed).
+    """
+    kind, _, values = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+    try:
+        numbers = [float(value) for value in values.split(",")]
+        if kind == "fixed" and len(numbers) == 1:
+            return lambda rng: numbers[0]
+        if kind == "uniform" and len(numbers) == 2:
+            return lambda rng: rng.uniform(*numbers)
+        if kind == "exp" and len(numbers) == 1:
+            return lambda rng: rng.expovariate(1 / numbers[0]) if numbers[0] > 0 else 0.0
+        if kind == "lognormal" and len(numbers) == 2:
+            import math
+            return lambda rng: rng.lognormvariate(math.log(numbers[0]), numbers[1])
+    except ValueError:
+        pass
+    raise ValueError(f"bad latency '{spec}' (use fixed:S, uniform:LOW,HIGH, exp:MEAN or lognormal:MEDIAN,SIGMA)")
+
+def response_body(audio):
+    """Wrap MP3 bytes the way the batchexecute endpoint does, so gTTS's parser accepts them"""
+    payload = json.dumps([base64.b64encode(audio).decode("ascii")], separators=(",", ":"))
+    envelope = json.dumps([["wrb.fr", "jQ1olc", payload, None, None, None, "generic"]], separators=(",", ":"))
+    return f")]}}'\n\n{len(envelope)}\n{envelope}\n".encode("utf-8")
+
+class FakeTTS:
+    """Fault-injection settings and per-request statistics, shared by every handler thread"""
+
+    def __init__(self, latency="fixed:0.05", rate_limit=0.0, server_error=0.0, truncate=0.0, quota=0.0, seed=None):
+        self.latency = parse_latency(latency)
+        self.rate_limit = rate_limit
+        self.server_error = server_error
+        self.truncate = truncate
+        self.quota = quota  # requests per second before answering 429, 0 for no quota
+        self.random = random.Random(seed)
+        self.backend = StubBackend()
+        self.lock = threading.Lock()
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.latencies = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.window = []  # request times within the last second, for the quota
+
+    def draw(self):
+        """Pick the outcome and latency of one request"""
+        with self.lock:
+            roll = self.random.random()
+            latency = max(0.0, self.latency(self.random))
+            now = time.monotonic()
+            self.window = [started for started in self.window if now - started < 1.0]
+            over_quota = self.quota > 0 and len(self.window) >= self.quota
+            self.window.append(now)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        if over_quota:
+            return "quota", 0.0
+        for outcome, probability in (("rate_limited", self.rate_limit), ("server_error", self.server_error),
+                                     ("truncated", self.truncate)):
+            if roll < probability:
+                return outcome, latency
+            roll -= probability
+        return "ok", latency
+
+    def finish(self, outcome, seconds):
+        with self.lock:
+            self.in_flight -= 1
+            self.outcomes[outcome] += 1
+            self.latencies.append(seconds)
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            stats = {"requests": len(latencies), "outcomes": dict(self.outcomes),
+                     "peak_in_flight": self.peak_in_flight}
+        for percentile in (50, 90, 99):
+            rank = max(1, -(-percentile * len(latencies) // 100))
+            stats[f"p{percentile}_ms"] = latencies[rank - 1] * 1000 if latencies else 0.0
+        stats["max_ms"] = latencies[-1] * 1000 if latencies else 0.0
+        return stats
+
+class FakeTTSHandler(BaseHTTPRequestHandler):
+    fake = None
+    protocol_version = "HTTP/1.1"  # keep-alive, like Google's endpoint
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, content_type="text/plain; charset=utf-8", truncate=False):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if truncate:
+            # Promise the whole body, send half of it and hang up
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+        else:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, json.dumps(self.fake.stats()).encode("utf-8"), "application/json")
+        else:
+            self._reply(404, b"Not found")
+
+    def do_POST(self):
+        started = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.split("?")[0] != TTS_PATH:
+            self._reply(404, b"Not found")
+            return
+        outcome, latency = self.fake.draw()
+        try:
+            if outcome == "ok" or outcome == "truncated":
+                try:
+                    rpc = json.loads(parse_qs(body.decode("utf-8"))["f.req"][0])
+                    text = json.loads(rpc[0][0][1])[0]
+                except (KeyError, IndexError, ValueError):
+                    outcome = "bad_request"
+                    self._reply(400, b"Bad request")
+                    return
+                time.sleep(latency)
+                self._reply(200, response_body(self.fake.backend.synthesize(text)),
+                            "application/json; charset=utf-8", truncate=outcome == "truncated")
+            elif outcome in ("rate_limited", "quota"):
+                time.sleep(latency)
+                self._reply(429, b"Too Many Requests")
+            else:
+                time.sleep(latency)
+                self._reply(self.fake.random.choice((500, 502, 503)), b"<html>Server Error</html>",
+                            "text/html; charset=utf-8")
+        finally:
+            self.fake.finish(outcome, time.perf_counter() - started)
+
+def serve(fake, host="127.0.0.1", port=DEFAULT_PORT):
+    """Start a fake TTS server in a background thread and return it (call shutdown() to stop it)"""
+    handler = type("Handler", (FakeTTSHandler,), {"fake": fake})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def add_fault_arguments(parser):
+    """Add the latency and fault-injection options to an argparse parser"""
+    parser.add_argument('--latency', default="fixed:0.05",
+                        help="response latency: fixed:S, uniform:LOW,HIGH, exp:MEAN or lognormal:MEDIAN,SIGMA "
+                             "(default: fixed:0.05)")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="fraction of requests answered with HTTP 429")
+    parser.add_argument('--server-error', type=float, default=0.0,
+                        help="fraction of requests answered with HTTP 500/502/503")
+    parser.add_argument('--truncate', type=float, default=0.0,
+                        help="fraction of responses cut off halfway through the body")
+    parser.add_argument('--quota', type=float, default=0.0,
+                        help="requests per second beyond which every request gets HTTP 429 (default: no quota)")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for reproducible faults")
+
+def fake_from_args(args):
+    return FakeTTS(args.latency, args.rate_limit, args.server_error, args.truncate, args.quota, args.seed)
+
+def main(argv=None):
+    """Run the fake TTS server until interrupted; returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Google Translate TTS endpoint")
+    parser.add_argument('--host', default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        fake = fake_from_args(args)
+        server = serve(fake, args.host, args.port)
+    except (ValueError, OSError) as e:
+        print(f"✗ {e}")
+        return 1
+    url = f"http://{args.host}:{args.port}"
+    print(f"Fake TTS server listening on {url} (statistics at {url}/stats)")
+    print(f"Use it with: python generate_thai_consonant_deck.py --audio --tts-url {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f"\nStopped. {json.dumps(fake.stats())}")
+    finally:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
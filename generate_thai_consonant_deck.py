@@ -4,163 +4,220 @@ Thai Consonants Anki Deck Generator
 Generates a complete deck of Thai consonant cards for Anki
 """
 
+import argparse
 import csv
 import os
-from gtts import gTTS
-import time
-
-# Thai consonants data
-# Format: (consonant, name, paiboon_pronunciation_with_tone, class, initial_sound, final_sound, meaning, notes)
-THAI_CONSONANTS = [
-    ("ค", "คอ ควาย", "khaawᴹ khwaaiᴹ", "Low", "kh-", "-k", "buffalo", "Low-class consonant."),
-    ("ฅ", "ฅอ คน", "khaawᴹ khohnᴹ", "Low", "kh-", "-k", "person", "Rare/obsolete. Low-class consonant."),
-    ("ฆ", "ฆอ ระฆัง", "khaawᴹ raᴴ kangᴹ", "Low", "kh-", "-k", "bell", "Low-class consonant."),
-    ("ง", "งอ งู", "ngaawᴹ nguuᴹ", "Low", "ng-", "-ng", "snake", "Low-class consonant."),
-    ("ช", "ชอ ช้าง", "chaawᴹ changᴴ", "Low", "ch-", "-t", "elephant", "Low-class consonant."),
-    ("ซ", "ซอ โซ่", "saawᴹ sohᶠ", "Low", "s-", "-t", "chain", "Low-class consonant."),
-    ("ฌ", "ฌอ เฌอ", "chaawᴹ chuuhrᴹ", "Low", "ch-", "-t", "tree", "Low-class consonant."),
-    ("ญ", "ญอ หญิง", "yaawᴹ yingᴿ", "Low", "y-", "-n", "woman", "Low-class consonant."),
-    ("ฑ", "ฑอ มณโฑ", "thaawᴹ mohnᴹ thohᴹ", "Low", "th-", "-t", "Mandodari", "Low-class consonant."),
-    ("ฒ", "ฒอ ผู้เฒ่า", "thaawᴹ phuuᶠ thaoᶠ", "Low", "th-", "-t", "elder", "Low-class consonant."),
-    ("ณ", "ณอ เณร", "naawᴹ naehnᴹ", "Low", "n-", "-n", "novice monk", "Low-class consonant."),
-    ("ท", "ทอ ทหาร", "thaawᴹ tha-haanᴿ", "Low", "th-", "-t", "soldier", "Low-class consonant."),
-    ("ธ", "ธอ ธง", "thaawᴹ thongᴹ", "Low", "th-", "-t", "flag", "Low-class consonant."),
-    ("น", "นอ หนู", "naawᴹ nuuᴿ", "Low", "n-", "-n", "mouse", "Low-class consonant."),
-    ("พ", "พอ พาน", "phaawᴹ phaanᴹ", "Low", "ph-", "-p", "tray", "Low-class consonant."),
-    ("ฟ", "ฟอ ฟัน", "faawᴹ fanᴹ", "Low", "f-", "-p", "teeth", "Low-class consonant."),
-    ("ภ", "ภอ สำเภา", "phaawᴹ samᴿ paoᴹ", "Low", "ph-", "-p", "junk", "Low-class consonant."),
-    ("ม", "มอ ม้า", "maawᴹ maaᴴ", "Low", "m-", "-m", "horse", "Low-class consonant."),
-    ("ย", "ยอ ยักษ์", "yaawᴹ yakᴴ", "Low", "y-", "-n", "giant", "Low-class consonant."),
-    ("ร", "รอ เรือ", "raawᴹ reuuaᴹ", "Low", "r-", "-n", "boat", "Low-class consonant."),
-    ("ล", "ลอ ลิง", "laawᴹ lingᴹ", "Low", "l-", "-n", "monkey", "Low-class consonant."),
-    ("ว", "วอ แหวน", "waawᴹ waaenᴿ", "Low", "w-", "-n", "ring", "Low-class consonant."),
-    ("ฬ", "ฬอ จุฬา", "laawᴹ jooᴸ laaᴹ", "Low", "l-", "-n", "kite", "Low-class consonant."),
-    ("ฮ", "ฮอ นกฮูก", "haawᴹ nohkᴴ huukᶠ", "Low", "h-", "-k", "owl", "Low-class consonant."),
-    ("ก", "กอ ไก่", "gaawᴹ gaiᴸ", "Mid", "g-", "-k", "chicken", "Mid-class consonant."),
-    ("จ", "จอ จาน", "jaawᴹ jaanᴹ", "Mid", "j-", "-n", "plate", "Mid-class consonant."),
-    ("ฎ", "ฎอ ชฎา", "daawᴹ cha-daaᴹ", "Mid", "d-", "-n", "headdress", "Mid-class consonant."),
-    ("ฏ", "ฏอ ปฏัก", "dtaawᴹ bpaᴸ dtakᴸ", "Mid", "dt-", "-k", "goad", "Mid-class consonant."),
-    ("ด", "ดอ เด็ก", "daawᴹ dekᴸ", "Mid", "d-", "-k", "child", "Mid-class consonant."),
-    ("ต", "ตอ เต่า", "dtaawᴹ dtaoᴸ", "Mid", "dt-", "-k", "turtle", "Mid-class consonant."),
-    ("บ", "บอ ใบไม้", "baawᴹ baiᴹ maiᴴ", "Mid", "b-", "-p", "leaf", "Mid-class consonant."),
-    ("ป", "ปอ ปลา", "bpaawᴹ bplaaᴹ", "Mid", "bp-", "-p", "fish", "Mid-class consonant."),
-    ("อ", "ออ อ่าง", "aawᴹ aangᴹ", "Mid", "ʔ-", "-", "basin", "Mid-class consonant."),
-    ("ข", "ขอ ไข่", "khaawᴿ khaiᴸ", "High", "kh-", "-k", "egg", "High-class consonant."),
-    ("ฃ", "ฃอ ขวด", "khaawᴿ khuaatᴸ", "High", "kh-", "-k", "bottle", "Rare/obsolete. High-class consonant."),
-    ("ฉ", "ฉอ ฉิ่ง", "chaawᴿ chingᴸ", "High", "ch-", "-", "cymbals", "High-class consonant."),
-    ("ฐ", "ฐอ ฐาน", "thaawᴿ thaanᴿ", "High", "th-", "-t", "base", "High-class consonant."),
-    ("ถ", "ถอ ถุง", "thaawᴿ thoongᴿ", "High", "th-", "-t", "bag", "High-class consonant."),
-    ("ผ", "ผอ ผึ้ง", "phaawᴿ pheungᶠ", "High", "ph-", "-", "bee", "High-class consonant."),
-    ("ฝ", "ฝอ ฝา", "faawᴿ faaᴿ", "High", "f-", "-", "lid", "High-class consonant."),
-    ("ศ", "ศอ ศาลา", "saawᴿ saaᴿ laaᴹ", "High", "s-", "-t", "pavilion", "High-class consonant."),
-    ("ษ", "ษอ ฤาษี", "saawᴿ reuuᴹ seeᴿ", "High", "s-", "-t", "hermit", "High-class consonant."),
-    ("ส", "สอ เสือ", "saawᴿ seuuaᴿ", "High", "s-", "-t", "tiger", "High-class consonant."),
-    ("ห", "หอ หีบ", "haawᴿ heepᴸ", "High", "h-", "-", "box", "High-class consonant.")
-]
-
-def create_tsv_deck():
-    """Create a TSV file for Anki import (no header row, mobile-friendly em padding)"""
-    with open('thai_consonants.tsv', 'w', newline='', encoding='utf-8') as tsvfile:
-        writer = csv.writer(tsvfile, delimiter='\t', quoting=csv.QUOTE_NONE, escapechar='\\')
-        # No header row
-        for consonant, name, pronunciation, consonant_class, initial, final, meaning, notes in THAI_CONSONANTS:
-            back_content = (
-                f"<table style='margin: auto; border-collapse: collapse; text-align: center;'>"
-                f"<tr><td colspan='2' style='text-align: center; padding: 0.7em;'>{name}</td></tr>"
-                f"<tr><td colspan='2' style='text-align: center; padding: 0.7em;'>{pronunciation}</td></tr>"
-                f"<tr>"
-                f"<td style='text-align: right; padding: 0.7em; width: 50%;'>Class:</td>"
-                f"<td style='text-align: left; padding: 0.7em; width: 50%;'><b>{consonant_class}</b></td>"
-                f"</tr>"
-                f"<tr>"
-                f"<td style='text-align: right; padding: 0.7em;'>Initial Sound:</td>"
-                f"<td style='text-align: left; padding: 0.7em;'><b>{initial}</b></td>"
-                f"</tr>"
-                f"<tr>"
-                f"<td style='text-align: right; padding: 0.7em;'>Final Sound:</td>"
-                f"<td style='text-align: left; padding: 0.7em;'><b>{final}</b></td>"
-                f"</tr>"
-                f"<tr>"
-                f"<td style='text-align: right; padding: 0.7em;'>Meaning:</td>"
-                f"<td style='text-align: left; padding: 0.7em;'><b>{meaning}</b></td>"
-                f"</tr>"
-                f"<tr><td colspan='2' style='text-align: center; padding: 0.7em;'>[sound:cheat_sheet_consonant_{consonant}.mp3]</td></tr>"
-                f"<tr><td colspan='2' style='text-align: center; padding: 0.7em;'>{notes}</td></tr>"
-                f"</table>"
-            )
-            writer.writerow([consonant, back_content])
-    print(f"Created TSV file with {len(THAI_CONSONANTS)} Thai consonant cards (no header row, mobile-friendly em padding)")
-
-def generate_audio_files():
-    """Generate audio files for all Thai consonants using gTTS"""
+import sys
+import profiling
+from audio_postprocess import DEFAULT_BITRATE, add_postprocess_arguments, postprocess_files
+from anki_package import DEFAULT_CSS, basic_model, write_apkg
+from sheet_tiles import TILE_CSS, build_tiles, consonant_tile_name, consonant_tiles, tile_html
+from thai_data import CONSONANTS
+from tsv_build import build_tsv, print_summary, row_keys, template_fingerprint
+from tts_backends import DEFAULT_BACKEND, BackendUnavailable, get_backend
+from tts_engine import DEFAULT_RATE, add_audio_arguments, synthesize_all
+from tts_journal import DEFAULT_RETRIES
+
+# Fixed ids so re-importing a rebuilt package updates the existing deck
+DECK_NAME = "Thai Consonants"
+DECK_ID = 1794357201
+MODEL_ID = 1794357202
+# Bump whenever a change to render_consonant_card or tile_html changes the
+# cards; incremental TSV builds only notice data and template string edits
+TEMPLATE_VERSION = 1
+
+# Compact render mode: styling lives in the note type's stylesheet and cells
+# use short class names, so each card only carries its data
+CONSONANT_CSS = """.tc{margin:auto;border-collapse:collapse;text-align:center}
+.tc td{padding:.7em}
+.tc .k{text-align:right;width:50%}
+.tc .v{text-align:left;width:50%;font-weight:bold}
+"""
+
+COMPACT_BACK_TEMPLATE = (
+    "<table class=tc>"
+    "<tr><td colspan=2>{1}"
+    "<tr><td colspan=2>{2}"
+    "<tr><td class=k>Class:<td class=v>{3}"
+    "<tr><td class=k>Initial Sound:<td class=v>{4}"
+    "<tr><td class=k>Final Sound:<td class=v>{5}"
+    "<tr><td class=k>Meaning:<td class=v>{6}"
+    "<tr><td colspan=2>[sound:cheat_sheet_consonant_{0}.mp3]"
+    "<tr><td colspan=2>{7}"
+    "</table>"
+)
+
+def render_consonant_card(row, compact=False, tiles=False):
+    """Render one CONSONANTS record as TSV fields (front, back), optionally with its cheat-sheet tile"""
+    tile = tile_html(consonant_tile_name(row[0]), compact) if tiles else ""
+    if compact:
+        return [row[0], COMPACT_BACK_TEMPLATE.format(*row) + tile]
+    consonant, name, pronunciation, consonant_class, initial, final, meaning, notes = row
+    back_content = (
+        f"<table style='margin: auto; border-collapse: collapse; text-align: center;'>"
+        f"<tr><td colspan='2' style='text-align: center; padding: 0.7em;'>{name}</td></tr>"
+        f"<tr><td colspan='2' style='text-align: center; padding: 0.7em;'>{pronunciation}</td></tr>"
+        f"<tr>"
+        f"<td style='text-align: right; padding: 0.7em; width: 50%;'>Class:</td>"
+        f"<td style='text-align: left; padding: 0.7em; width: 50%;'><b>{consonant_class}</b></td>"
+        f"</tr>"
+        f"<tr>"
+        f"<td style='text-align: right; padding: 0.7em;'>Initial Sound:</td>"
+        f"<td style='text-align: left; padding: 0.7em;'><b>{initial}</b></td>"
+        f"</tr>"
+        f"<tr>"
+        f"<td style='text-align: right; padding: 0.7em;'>Final Sound:</td>"
+        f"<td style='text-align: left; padding: 0.7em;'><b>{final}</b></td>"
+        f"</tr>"
+        f"<tr>"
+        f"<td style='text-align: right; padding: 0.7em;'>Meaning:</td>"
+        f"<td style='text-align: left; padding: 0.7em;'><b>{meaning}</b></td>"
+        f"</tr>"
+        f"<tr><td colspan='2' style='text-align: center; padding: 0.7em;'>[sound:cheat_sheet_consonant_{consonant}.mp3]</td></tr>"
+        f"<tr><td colspan='2' style='text-align: center; padding: 0.7em;'>{notes}</td></tr>"
+        f"</table>"
+    )
+    return [consonant, back_content + tile]
+
+def card_source(compact=False, tiles=False):
+    """Return the (key, row) pairs of the deck, the function rendering a row, and the template fingerprint"""
+    rows = zip(row_keys(consonant.letter for consonant in CONSONANTS), CONSONANTS)
+    render = lambda row: render_consonant_card(row, compact=compact, tiles=tiles)
+    template = template_fingerprint(COMPACT_BACK_TEMPLATE,
+                                    version=f"{TEMPLATE_VERSION},compact={compact},tiles={tiles}")
+    return rows, render, template
+
+@profiling.traced("create_tsv_deck", deck="consonants")
+def create_tsv_deck(rebuild=False, compact=False, tiles=False):
+    """Create a TSV file for Anki import (no header row, mobile-friendly em padding)
+
+    Only rows whose data or template changed are re-rendered, and the file is
+    left untouched when its content would not change.
+    """
+    # No header row
+    rows, render, template = card_source(compact=compact, tiles=tiles)
+    summary = build_tsv('thai_consonants.tsv', rows, render, template, rebuild=rebuild,
+                        delimiter='\t', quoting=csv.QUOTE_NONE, escapechar='\\')
+    print(f"Created TSV file with {len(CONSONANTS)} Thai consonant cards (no header row, mobile-friendly em padding)")
+    print_summary('thai_consonants.tsv', summary)
+    if compact:
+        print("Compact mode: paste this into the note type's Styling (the .apkg includes it already):")
+        print(CONSONANT_CSS + (TILE_CSS if tiles else ""))
+
+def generate_tiles():
+    """Crop each consonant's row of the cheat sheet into sounds/; return the tile stats"""
+    return build_tiles(consonant_tiles(CONSONANTS))
+
+def audio_jobs(sounds_dir="sounds"):
+    """Return the (label, text, filename) synthesis jobs for every consonant"""
+    # Speak the consonant name in Thai
+    return [
+        (consonant, name, f"{sounds_dir}/cheat_sheet_consonant_{consonant}.mp3")
+        for consonant, name, pronunciation, consonant_class, initial, final, meaning, notes in CONSONANTS
+    ]
+
+@profiling.traced("generate_audio_files", deck="consonants")
+def generate_audio_files(jobs=None, rate=DEFAULT_RATE, batch=1, postprocess=False, bitrate=DEFAULT_BITRATE,
+                         limiter=None, retries=DEFAULT_RETRIES, resume=False, tts=DEFAULT_BACKEND, tts_url=None,
+                         breaker=None):
+    """Generate audio files for all Thai consonants with the `tts` backend; return the synthesis stats
+
+    `tts_url` sends gtts requests to another server, such as fake_tts_server.py;
+    `breaker` replaces the process-wide circuit breaker for this run.
+    """
     # Create sounds directory if it doesn't exist
     sounds_dir = "sounds"
     if not os.path.exists(sounds_dir):
-        os.makedirs(sounds_dir)
+        os.makedirs(sounds_dir, exist_ok=True)
         print(f"Created sounds directory: {sounds_dir}")
     
     print("Generating audio files for Thai consonants...")
-    print("This may take a few minutes due to API rate limits...")
+    backend = get_backend(tts, tts_url)
+    jobs = jobs or backend.default_workers()
+    if backend.rate_limited:
+        print(f"Using {backend.name} with {jobs} concurrent requests, at most {rate} requests/second...")
+    else:
+        print(f"Using {backend.name} on {jobs} workers, no rate limit...")
     
-    for i, (consonant, name, pronunciation, consonant_class, initial, final, meaning, notes) in enumerate(THAI_CONSONANTS):
-        try:
-            # Create filename
-            filename = f"{sounds_dir}/cheat_sheet_consonant_{consonant}.mp3"
-            
-            # Skip if file already exists
-            if os.path.exists(filename):
-                print(f"✓ {consonant} - Audio file already exists")
-                continue
-            
-            # Generate text to speak (consonant name in Thai)
-            text_to_speak = name
-            
-            # Create gTTS object with Thai language
-            tts = gTTS(text=text_to_speak, lang='th', slow=False)
-            
-            # Save the audio file
-            tts.save(filename)
-            
-            print(f"✓ {consonant} - Generated {filename}")
-            
-            # Add a small delay to avoid hitting rate limits
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"✗ {consonant} - Error generating audio: {e}")
+    consonant_jobs = audio_jobs(sounds_dir)
+    stats = synthesize_all(consonant_jobs, workers=jobs, rate=rate, batch=batch, limiter=limiter,
+                           retries=retries, resume=resume, breaker=breaker, backend=backend)
+    if postprocess:
+        postprocess_files([filename for label, text, filename in consonant_jobs], bitrate=bitrate)
     
     print(f"\nAudio generation complete! Files saved in '{sounds_dir}/' directory")
-    print("Copy these files to your Anki media folder to use them in your deck.")
+    print("Run python media_sync.py --all-profiles to sync them into your Anki media folder.")
+    return stats
 
-def create_anki_package():
-    """Create a proper Anki package structure"""
-    # This would require the genanki library for a full implementation
-    print("To create a proper .apkg file, install genanki: pip install genanki")
-    print("Then use the genanki library to create the deck")
+@profiling.traced("create_anki_package", deck="consonants")
+def create_anki_package(path='thai_consonants.apkg', compact=False, tiles=False):
+    """Create an Anki package with the consonant cards and their audio (and tiles) from sounds/"""
+    model = basic_model(MODEL_ID, "Thai Consonant", DECK_ID,
+                        css=DEFAULT_CSS + CONSONANT_CSS + (TILE_CSS if tiles else ""))
+    notes = (render_consonant_card(row, compact=compact, tiles=tiles) for row in CONSONANTS)
+    result = write_apkg(path, DECK_NAME, DECK_ID, model, notes)
+    print(f"Created {path} with {result['notes']} cards and {result['media']} media files")
 
-def main():
-    """Main function to run the deck generation"""
+def main(argv=None):
+    """Main function to run the deck generation; returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Generate the Thai consonants Anki deck")
+    parser.add_argument('--audio', action='store_true', help="generate audio files (engine chosen with --tts)")
+    add_audio_arguments(parser)
+    add_postprocess_arguments(parser)
+    parser.add_argument('--rebuild', action='store_true',
+                        help="re-render every card instead of only the changed ones")
+    parser.add_argument('--apkg', action='store_true',
+                        help="also write thai_consonants.apkg with the cards and audio")
+    parser.add_argument('--compact', action='store_true',
+                        help="render cards with shared note-type CSS instead of inline styles")
+    parser.add_argument('--tiles', action='store_true',
+                        help="crop the card's row of the cheat sheet into sounds/ and show it on the back (needs Pillow)")
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    try:
+        with profiling.span("main", deck="consonants"):
+            return run(args)
+    finally:
+        if args.profile:
+            profiling.finish(args.profile)
+
+def run(args):
+    """Build the deck for parsed command-line arguments; return the process exit code"""
     print("Thai Consonants Anki Deck Generator")
     print("=" * 40)
     
+    exit_code = 0
+    if args.tiles and generate_tiles()["failed"]:
+        exit_code = 1
+
     # Create TSV deck
-    create_tsv_deck()
+    create_tsv_deck(rebuild=args.rebuild, compact=args.compact, tiles=args.tiles)
     
-    # Ask user if they want to generate audio files
     print("\n" + "=" * 40)
-    response = input("Do you want to generate audio files using gTTS? (y/n): ").lower().strip()
-    
-    if response in ['y', 'yes']:
+    if args.audio:
         try:
-            # Check if gTTS is installed
-            import gtts
-            generate_audio_files()
-        except ImportError:
-            print("\nError: gTTS is not installed.")
-            print("To install gTTS, run: pip install gTTS")
-            print("Then run this script again.")
+            get_backend(args.tts, args.tts_url).check()
+        except (BackendUnavailable, ValueError) as e:
+            print(f"\nError: {e}")
+            print("Install it, or choose another engine with --tts, then run this script again.")
+            return 1
+        stats = generate_audio_files(jobs=args.jobs, rate=args.rate, batch=args.batch,
+                                     postprocess=args.postprocess, bitrate=args.bitrate,
+                                     retries=args.retries, resume=args.resume, tts=args.tts,
+                                     tts_url=args.tts_url)
+        if stats["failed"]:
+            exit_code = 1
     else:
-        print("Skipping audio generation.")
+        print("Skipping audio generation (pass --audio to generate it).")
+    
+    if args.apkg:
+        print("\n" + "=" * 40)
+        create_anki_package(compact=args.compact, tiles=args.tiles)
+        print("\nTo import into Anki: File -> Import, then select thai_consonants.apkg")
+        print("The package includes the audio files, so no manual copying is needed.")
+        return exit_code
     
     print("\n" + "=" * 40)
     print("To import into Anki:")
@@ -171,10 +228,12 @@ def main():
     print("5. Map Front and Back fields")
     print("6. Import")
     
-    if response in ['y', 'yes']:
+    if args.audio:
         print("\nFor audio files:")
-        print("1. Copy files from 'sounds/' directory to your Anki media folder")
+        print("1. Run python media_sync.py --all-profiles (or --profile NAME) to sync 'sounds/' into Anki")
         print("2. Restart Anki to load the audio files")
+    print("\nTip: run with --apkg to build a package that includes the audio files.")
+    return exit_code
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
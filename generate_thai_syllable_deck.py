@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Thai Syllable Drill Deck Generator
+Builds a card for every consonant x vowel form x tone mark, with the tone
+looked up from a precomputed table of the Thai tone rules
+Cards are streamed to the TSV/apkg, so the full cross product never sits in memory
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+
+from anki_package import DEFAULT_CSS, basic_model, write_apkg
+from thai_chars import ABOVE_VOWEL, BELOW_VOWEL, CONSONANT, classify_column
+from thai_data import CONSONANTS, VOWEL_FORMS
+from tsv_build import row_keys, template_fingerprint
+
+# Fixed ids so re-importing a rebuilt package updates the existing deck
+DECK_NAME = "Thai Syllables"
+DECK_ID = 1794357401
+MODEL_ID = 1794357402
+# Bump when render_syllable_card's output changes
+TEMPLATE_VERSION = 1
+
+# Tone marks: (mark, name); "" is the unmarked syllable
+TONE_MARKS = [("", "none"), ("่", "mai ek"), ("้", "mai tho"), ("๊", "mai tri"), ("๋", "mai chattawa")]
+
+# Tone names with the same superscript markers as the romanization
+TONES = {"M": "Mid ᴹ", "L": "Low ᴸ", "F": "Falling ᶠ", "H": "High ᴴ", "R": "Rising ᴿ"}
+
+# Closed vowel forms ("-" slot) are drilled with one live and one dead final
+FINALS = [("น", "-n", True), ("ก", "-k", False)]
+
+MAI_TAIKHU = "็"
+# Open forms that still end in a sonorant (-i, -u, -m) and are therefore live
+LIVE_ENDINGS = ("ย", "ว", "ำ", "ํา")
+LIVE_PREFIXES = ("ไ", "ใ")
+
+def _tone_rule(consonant_class, live, long_vowel, mark):
+    """The Thai tone rules; returns a TONES key, or None for an unused combination"""
+    if consonant_class == "Mid":
+        if mark == "none":
+            return "M" if live else "L"
+        return {"mai ek": "L", "mai tho": "F", "mai tri": "H", "mai chattawa": "R"}[mark]
+    if mark in ("mai tri", "mai chattawa"):
+        return None  # only written on mid-class consonants
+    if consonant_class == "High":
+        if mark == "none":
+            return "R" if live else "L"
+        return {"mai ek": "L", "mai tho": "F"}[mark]
+    # Low class
+    if mark == "none":
+        if live:
+            return "M"
+        return "F" if long_vowel else "H"
+    return {"mai ek": "F", "mai tho": "H"}[mark]
+
+# Precomputed once: (class, live, long vowel, tone mark name) -> tone
+TONE_TABLE = {
+    (consonant_class, live, long_vowel, mark): _tone_rule(consonant_class, live, long_vowel, mark)
+    for consonant_class in ("Low", "Mid", "High")
+    for live in (True, False)
+    for long_vowel in (True, False)
+    for mark in (name for symbol, name in TONE_MARKS)
+}
+
+def vowel_forms():
+    """Yield (form, sound, long_vowel) for every distinct ก-based vowel form and length in vowel_rows
+
+    A spelling the chart gives both a short and a long cell (เกิ-) is
+    drilled with both lengths, as the length decides a dead syllable's tone.
+    The chart's closed ไก- slot is skipped: ไ/ใ vowels already end in -i
+    and never take a final consonant, so it would only yield junk like ไกน.
+    """
+    seen = set()
+    for vowel in VOWEL_FORMS:
+        form = vowel.syllable
+        if (form, vowel.long) in seen or "ก" not in form or (form.endswith("-") and form.startswith(LIVE_PREFIXES)):
+            continue
+        seen.add((form, vowel.long))
+        yield form, vowel.sound, vowel.long
+
+def _is_live_open(form, long_vowel):
+    if form.startswith(LIVE_PREFIXES) or form.endswith(LIVE_ENDINGS) or (form.startswith("เ") and form.endswith("า")):
+        return True
+    return long_vowel
+
+def _mark_indexes(forms):
+    """Return, per vowel form, where the initial consonant is and where a tone mark goes
+
+    The mark goes after the initial and any vowel written above or below it.
+    Every consonant has the same character class, so this is computed once
+    on the ก-based forms and reused for all consonants.
+    """
+    indexes = []
+    for form, classes in zip(forms, classify_column(forms)):
+        initial_index = classes.index(CONSONANT)
+        index = initial_index + 1
+        while index < len(classes) and classes[index] in (ABOVE_VOWEL, BELOW_VOWEL):
+            index += 1
+        indexes.append((initial_index, index))
+    return indexes
+
+def syllables():
+    """Yield one dict per valid consonant x vowel form x final x tone mark combination"""
+    forms = list(vowel_forms())
+    mark_indexes = _mark_indexes([form for form, sound, long_vowel in forms])
+    for consonant, name, pronunciation, consonant_class, initial, final, meaning, notes in CONSONANTS:
+        for (form, sound, long_vowel), (initial_index, mark_index) in zip(forms, mark_indexes):
+            if form.endswith("-"):
+                endings = [(letter, final_sound, live) for letter, final_sound, live in FINALS]
+            else:
+                endings = [("", "", _is_live_open(form, long_vowel))]
+            base = form[:initial_index] + consonant + form[initial_index + 1:]
+            for (letter, final_sound, live), (mark, mark_name) in itertools.product(endings, TONE_MARKS):
+                if mark and MAI_TAIKHU in form:
+                    continue  # mai taikhu and a tone mark never share a syllable
+                tone = TONE_TABLE[(consonant_class, live, long_vowel, mark_name)]
+                if tone is None:
+                    continue
+                syllable = base.rstrip("-") + letter
+                syllable = syllable[:mark_index] + mark + syllable[mark_index:]
+                yield {
+                    "syllable": syllable, "consonant": consonant, "class": consonant_class,
+                    "initial": initial, "vowel": sound, "final": final_sound, "live": live,
+                    "long": long_vowel, "mark": mark_name, "tone": TONES[tone],
+                }
+
+BACK_TEMPLATE = (
+    "<table class=ts>"
+    "<tr><td colspan=2 class=tone>{tone}"
+    "<tr><td class=k>Class:<td class=v>{class}"
+    "<tr><td class=k>Syllable:<td class=v>{liveness}, {length} vowel"
+    "<tr><td class=k>Tone mark:<td class=v>{mark}"
+    "<tr><td class=k>Sounds:<td class=v>{initial} {vowel}{final}"
+    "</table>"
+)
+
+SYLLABLE_CSS = """.ts{margin:auto;border-collapse:collapse;text-align:center}
+.ts td{padding:.5em}
+.ts .tone{font-size:1.4em;font-weight:bold}
+.ts .k{text-align:right;width:50%}
+.ts .v{text-align:left;width:50%;font-weight:bold}
+"""
+
+def render_syllable_card(syllable):
+    """Render one syllable record as TSV fields (front, back)"""
+    back = BACK_TEMPLATE.format_map({
+        **syllable,
+        "liveness": "live" if syllable["live"] else "dead",
+        "length": "long" if syllable["long"] else "short",
+        "final": f" {syllable['final']}" if syllable["final"] else "",
+    })
+    return [syllable["syllable"], back]
+
+def cards():
+    """Stream rendered (front, back) rows for the whole deck"""
+    return map(render_syllable_card, syllables())
+
+def card_source(compact=True, tiles=False):
+    """Return a stream of (key, syllable) pairs, the function rendering one, and the template fingerprint
+
+    The pairs are generated lazily, like cards(), so a caller can take a slice
+    of the deck without building the whole cross product.
+    """
+    records, fronts = itertools.tee(syllables())
+    rows = zip(row_keys(record["syllable"] for record in fronts), records)
+    return rows, render_syllable_card, template_fingerprint(BACK_TEMPLATE, version=TEMPLATE_VERSION)
+
+def create_tsv_deck(rebuild=False, compact=True, tiles=False, path="thai_syllables.tsv"):
+    """Stream every syllable card into the TSV and return the card count
+
+    Cards always use the compact shared-CSS layout and have no cheat-sheet
+    tiles; `rebuild`, `compact` and `tiles` are accepted so build.py can
+    drive this deck like the others.
+    """
+    tmp = f"{path}.tmp"
+    count = 0
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        for row in cards():
+            writer.writerow(row)
+            count += 1
+    os.replace(tmp, path)
+    print(f"Created {path} with {count} Thai syllable cards")
+    return count
+
+def create_anki_package(path="thai_syllables.apkg", compact=True, tiles=False):
+    """Create an Anki package with every syllable card"""
+    model = basic_model(MODEL_ID, "Thai Syllable", DECK_ID, css=DEFAULT_CSS + SYLLABLE_CSS)
+    result = write_apkg(path, DECK_NAME, DECK_ID, model, cards())
+    print(f"Created {path} with {result['notes']} cards")
+
+def main(argv=None):
+    """Generate the syllable drill deck; returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Generate the Thai syllable tone drill deck")
+    parser.add_argument('--apkg', action='store_true', help="also write thai_syllables.apkg")
+    args = parser.parse_args(argv)
+
+    print("Thai Syllable Drill Deck Generator")
+    print("=" * 40)
+    create_tsv_deck()
+    if args.apkg:
+        create_anki_package()
+    print("\nImport thai_syllables.tsv as a 'Basic' note type and paste this into its Styling:")
+    print(SYLLABLE_CSS)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,122 +1,24 @@
-import csv
-import re
+import argparse
 import os
-from gtts import gTTS
-import time
-
-# Vowel transcription mapping with tone markers (using same system as consonants)
-# Format: syllable -> transcription_with_tone
-# Only include transcriptions for actual Thai syllables, not roman vowel sounds
-# Tone mapping: ᴹ=Mid, ᴿ=Rising, ᴸ=Low, ᴴ=High, ᶠ=Falling
-vowel_transcriptions = {
-    "ก็-": "gàᶠ",
-    "กะ": "gàᶠ",
-    "แก็-": "gàeᶠ",
-    "แกะ": "gàeᶠ",
-    "ก็อ-": "gàwᶠ",
-    "เกาะ": "gàwᶠ",
-    "เก็-": "gèᶠ",
-    "เกะ": "gèᶠ",
-    "เกิ-": "gə̀ᶠ",
-    "เกอะ": "gə̀ᶠ",
-    "โกะ": "gòᶠ",
-    "โก-": "gōᴹ",
-    "โก": "gōᴹ",
-    "กิ-": "gìᶠ",
-    "กิ": "gìᶠ",
-    "กึ-": "gʉ̀ᶠ",
-    "กึ": "gʉ̀ᶠ",
-    "กื": "gʉ̄ᴹ",
-    "กึอ": "gʉ̄ᴹ",
-    "กุ-": "gùᶠ",
-    "กุ": "gùᶠ",
-    "กู-": "gūᴹ",
-    "กู": "gūᴹ",
-    "เกียะ": "gìaᶠ",
-    "เกีย-": "gīaᴹ",
-    "เกีย": "gīaᴹ",
-    "เกือะ": "gʉ̀aᶠ",
-    "เกือ-": "gʉ̄aᴹ",
-    "เกือ": "gʉ̄aᴹ",
-    "กัวะ": "gùaᶠ",
-    "กว-": "gūaᴹ",
-    "กัว": "gūaᴹ",
-    "ไก": "gaiᴹ",
-    "ไก-": "gaiᴹ",
-    "ใก": "gaiᴹ",
-    "กาย": "gaaiᴹ",
-    "กัย": "gaiᴹ",
-    "ไกย": "gaiᴹ",
-    "ก็อย": "gàwyᶠ",
-    "กอย": "gàwyᶠ",
-    "เกย": "gə̀yᶠ",
-    "โกย": "gòyᶠ",
-    "กุ": "gùyᶠ",
-    "เกือย": "gʉ̀ayᶠ",
-    "กวย": "guayᴹ",
-    "กวาย": "guayᴹ",
-    "เกา": "gaoᴹ",
-    "กาว": "gaoᴹ",
-    "แก็ว": "gàewᶠ",
-    "แกว": "gàewᶠ",
-    "เกอว": "gə̀awᶠ",
-    "เก็ว": "gèwᶠ",
-    "เกว": "gèwᶠ",
-    "กิว": "giwᴹ",
-    "เกียว": "gìawᶠ",
-    "กํา": "gamᴹ",
-    "ฤ-": "rʉ́ᴿ",
-    "ฤ": "rʉ́ᴿ",
-    "ฤ-": "ríᴿ",
-    "กา-": "gaaᴹ",
-    "กา": "gaaᴹ",
-    "แก-": "gaaeᴹ",
-    "แก": "gaaeᴹ",
-    "กอ-": "gaawᴹ",
-    "กอ": "gaawᴹ",
-    "เก-": "geeᴹ",
-    "เก": "geeᴹ",
-    "เกิ-": "gəəᴹ",
-    "เกิ-": "gəəᴹ",
-    "เก": "gəəᴹ",
-    "เกีย-": "giaaᴹ",
-    "เกือ-": "gʉaaᴹ"
-}
-
-# Vowel data as per the PNG (first few rows for sample, add more as needed)
-vowel_rows = [
-    ["กั-", "กะ", "aa/ah", "กา-", "กา"],
-    ["แก็-", "แกะ", "ae", "แก-", "แก"],
-    ["ก็อ-", "เกาะ", "aaw", "กอ-", "กอ"],
-    ["เก็-", "เกะ", "eh/ey", "เก-", "เก"],
-    ["เกิ-", "เกอะ", "erh/uuhr", "เกิ-", "เกิ-", "เก"],
-    ["", "โกะ", "oh", "โก-", "โก"],
-    ["กิ-", "กิ", "ee", "กี-", "กี"],
-    ["กึ-", "กึ", "eu", "กื", "กึอ"],
-    ["กุ-", "กุ", "oo", "กู-", "กู"],
-    ["", "เกียะ", "ia", "เกีย-", "เกีย"],
-    ["", "เกือะ", "eua", "เกือ-", "เกือ"],
-    ["", "กัวะ", "ua", "กว-", "กัว"],
-    ["ไก", "", "ai", "ไก-", ""],
-    ["ใก", "", "ai", "กาย", ""],
-    ["กัย", "", "ai", "", ""],
-    ["ไกย", "", "ai", "", ""],
-    ["ก็อย", "", "aawy", "กอย", ""],
-    ["", "", "eeuy", "เกย", ""],
-    ["", "", "oy/ohy", "โกย", ""],
-    ["กุ", "", "uy/ui", "", ""],
-    ["", "", "euuay", "เกือย", ""],
-    ["กวย", "", "uay", "กวาย", ""],
-    ["เกา", "", "ao", "กาว", ""],
-    ["แก็ว", "", "aeo", "แกว", ""],
-    ["", "", "uaaw", "เกอว", ""],
-    ["เก็ว", "", "ayo", "เกว", ""],
-    ["กิว", "", "iu", "", ""],
-    ["", "", "iaao", "เกียว", ""],
-    ["กํา", "", "ahm", "กํา", ""],
-    ["ฤ-", "ฤ", "rue", "", ""],
-    ["ฤ-", "", "ri/reer", "ฤ-", ""]
-]
+import sys
+import profiling
+from audio_postprocess import DEFAULT_BITRATE, add_postprocess_arguments, postprocess_files
+from anki_package import DEFAULT_CSS, basic_model, write_apkg
+from thai_chars import vowel_symbol
+from sheet_tiles import TILE_CSS, build_tiles, tile_html, vowel_tile_name, vowel_tiles
+from thai_data import VOWEL_FORMS, vowel_rows
+from tsv_build import build_tsv, print_summary, row_keys, template_fingerprint
+from tts_backends import DEFAULT_BACKEND, BackendUnavailable, get_backend
+from tts_engine import DEFAULT_RATE, add_audio_arguments, synthesize_all
+from tts_journal import DEFAULT_RETRIES
+
+# Fixed ids so re-importing a rebuilt package updates the existing deck
+DECK_NAME = "Thai Vowels"
+DECK_ID = 1794357301
+MODEL_ID = 1794357302
+# Bump whenever the rendering code changes the cards, including the helpers
+# it calls (make_table, thai_chars.vowel_symbol, tile_html)
+TEMPLATE_VERSION = 1
 
 # Table headers as in the PNG
 headers = ["SHORT", "LONG"]
@@ -127,22 +29,22 @@ def bold(text):
     return f"<b>{text}</b>" if text else ""
 
 def extract_vowel_symbol(cell):
-    # Remove HTML tags and return the first Thai vowel mark
-    # Remove <span ...>ก</span> if present
-    cell = re.sub(r'<span[^>]*>ก</span>', '', cell)
-    # Remove leading ก if present
-    if cell and cell[0] == 'ก':
-        cell = cell[1:]
-    # Remove leading dashes or whitespace
-    cell = cell.lstrip('-').strip()
-    # Return the first Thai character (vowel mark)
-    for ch in cell:
-        if '\u0E00' <= ch <= '\u0E7F' and ch not in 'กขฃคฅฆงจฉชซฌญฎฏฐฑฒณดตถทธนบปผฝพฟภมยรฤลฦวศษสหฬอฮ':
-            return ch
-    # Fallback: return first non-empty char
-    return cell[0] if cell else ''
-
-def make_table(row, bold_idx):
+    # Return the first Thai vowel mark, ignoring the initial consonant and HTML spans
+    return vowel_symbol(cell)
+
+# Compact render mode: styling lives in the note type's stylesheet, the shared
+# header is a constant, and optional end tags are omitted
+VOWEL_CSS = """.tv{margin:auto;border-collapse:collapse;text-align:center}
+.tv th,.tv td{border:1px solid;padding:3px}
+.tx{text-align:center;margin-top:6px}
+"""
+COMPACT_TABLE_HEAD = ("<table class=tv><tr><th colspan=2>SHORT<th><th colspan=2>LONG"
+                      "<tr><th>Closed<th>Open<th>Sound<th>Closed<th>Open")
+COMPACT_TABLE_ROW = "<tr><td>{0}<td>{1}<td>{2}<td>{3}<td>{4}</table>"
+COMPACT_TRANSCRIPTION = "<div class=tx><b>{0}</b></div>"
+COMPACT_SOUND = "<div class=tx>{0}</div>"
+
+def make_table(row, bold_idx, compact=False):
     cells = [
         bold(row[0]) if bold_idx == 0 else row[0],
         bold(row[1]) if bold_idx == 1 else row[1],
@@ -150,6 +52,8 @@ def make_table(row, bold_idx):
         bold(row[3]) if bold_idx == 3 else row[3],
         bold(row[4]) if bold_idx == 4 else row[4],
     ]
+    if compact:
+        return COMPACT_TABLE_HEAD + COMPACT_TABLE_ROW.format(*cells)
     table = f"""
 <div style='text-align:center'>
 <table border='1' cellpadding='3' style='border-collapse:collapse; margin:auto;'>
@@ -163,70 +67,151 @@ def make_table(row, bold_idx):
 
 def get_card_front_vowels():
     """Return the set of all unique syllables used as card fronts in the TSV."""
-    card_fronts = set()
-    for row in vowel_rows:
-        for idx in [0, 1, 3, 4]:
-            if idx < len(row):
-                vowel = row[idx]
-                if vowel and vowel != "-":
-                    card_fronts.add(vowel)
-    return card_fronts
-
-def generate_audio_files():
-    """Generate audio files for all Thai vowels used as card fronts using gTTS"""
+    return set(VOWEL_FORMS.values("syllable"))
+
+def vowel_cards():
+    """Yield (key, VowelForm) for every card in the vowel deck"""
+    yield from zip(row_keys(form.syllable for form in VOWEL_FORMS), VOWEL_FORMS)
+
+def render_vowel_card(form, compact=False, tiles=False):
+    """Render the card for one VowelForm as TSV fields (front, back), optionally with its cheat-sheet tile"""
+    transcription = form.transcription
+    vowel = form.syllable
+    front = vowel
+    back = make_table(vowel_rows[form.row], form.cell, compact=compact)
+    vowel_symbol = extract_vowel_symbol(vowel)
+    if vowel_symbol:
+        sound_file = f"[sound:cheat_sheet_vowel_{vowel}.mp3]"
+        if compact:
+            if transcription:
+                back += COMPACT_TRANSCRIPTION.format(transcription)
+            back += COMPACT_SOUND.format(sound_file)
+        else:
+            if transcription:
+                back += f"<div style='text-align:center; margin-top:6px;'><b>{transcription}</b></div>"
+            back += f"<div style='text-align:center; margin-top:6px;'>{sound_file}</div>"
+    if tiles:
+        back += tile_html(vowel_tile_name(form.row), compact)
+    return [front, back]
+
+def generate_tiles():
+    """Crop each vowel row of the cheat sheet into sounds/; return the tile stats"""
+    return build_tiles(vowel_tiles(vowel_rows))
+
+def audio_jobs(sounds_dir="sounds"):
+    """Return the (label, text, filename) synthesis jobs for every vowel card front"""
+    card_fronts = get_card_front_vowels()
+    return [(vowel, vowel, f"{sounds_dir}/cheat_sheet_vowel_{vowel}.mp3") for vowel in sorted(card_fronts)]
+
+@profiling.traced("generate_audio_files", deck="vowels")
+def generate_audio_files(jobs=None, rate=DEFAULT_RATE, batch=1, postprocess=False, bitrate=DEFAULT_BITRATE,
+                         limiter=None, retries=DEFAULT_RETRIES, resume=False, tts=DEFAULT_BACKEND, tts_url=None,
+                         breaker=None):
+    """Generate audio files for all Thai vowels used as card fronts with the `tts` backend; return the synthesis stats
+
+    `tts_url` sends gtts requests to another server, such as fake_tts_server.py;
+    `breaker` replaces the process-wide circuit breaker for this run.
+    """
     sounds_dir = "sounds"
     if not os.path.exists(sounds_dir):
-        os.makedirs(sounds_dir)
+        os.makedirs(sounds_dir, exist_ok=True)
         print(f"Created sounds directory: {sounds_dir}")
     print("Generating audio files for Thai vowels...")
-    print("This may take a few minutes due to API rate limits...")
-    card_fronts = get_card_front_vowels()
-    for vowel in card_fronts:
-        filename = f"{sounds_dir}/cheat_sheet_vowel_{vowel}.mp3"
-        if os.path.exists(filename):
-            print(f"✓ {vowel} - Audio file already exists")
-            continue
-        try:
-            tts = gTTS(text=vowel, lang='th', slow=False)
-            tts.save(filename)
-            print(f"✓ {vowel} - Generated {filename}")
-            time.sleep(0.5)
-        except Exception as e:
-            print(f"✗ {vowel} - Error generating audio: {e}")
+    backend = get_backend(tts, tts_url)
+    jobs = jobs or backend.default_workers()
+    if backend.rate_limited:
+        print(f"Using {backend.name} with {jobs} concurrent requests, at most {rate} requests/second...")
+    else:
+        print(f"Using {backend.name} on {jobs} workers, no rate limit...")
+    vowel_jobs = audio_jobs(sounds_dir)
+    stats = synthesize_all(vowel_jobs, workers=jobs, rate=rate, batch=batch, limiter=limiter,
+                           retries=retries, resume=resume, breaker=breaker, backend=backend)
+    if postprocess:
+        postprocess_files([filename for label, text, filename in vowel_jobs], bitrate=bitrate)
     print(f"\nAudio generation complete! Files saved in '{sounds_dir}/' directory")
-    print("Copy these files to your Anki media folder to use them in your deck.")
-
-def main():
-    with open("thai_vowels.tsv", "w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
-        for row in vowel_rows:
-            for idx, cell in enumerate([0, 1, 3, 4]):
-                vowel = row[cell]
-                if not vowel or vowel == "-":
-                    continue
-                front = vowel
-                back = make_table(row, cell)
-                vowel_symbol = extract_vowel_symbol(vowel)
-                if vowel_symbol:
-                    sound_file = f"[sound:cheat_sheet_vowel_{vowel}.mp3]"
-                    transcription = vowel_transcriptions.get(vowel, "")
-                    if transcription:
-                        back += f"<div style='text-align:center; margin-top:6px;'><b>{transcription}</b></div>"
-                    back += f"<div style='text-align:center; margin-top:6px;'>{sound_file}</div>"
-                writer.writerow([front, back])
+    print("Run python media_sync.py --all-profiles to sync them into your Anki media folder.")
+    return stats
+
+@profiling.traced("create_anki_package", deck="vowels")
+def create_anki_package(path="thai_vowels.apkg", compact=False, tiles=False):
+    """Create an Anki package with the vowel cards and their audio (and tiles) from sounds/"""
+    model = basic_model(MODEL_ID, "Thai Vowel", DECK_ID, css=DEFAULT_CSS + VOWEL_CSS + (TILE_CSS if tiles else ""))
+    notes = (render_vowel_card(card, compact=compact, tiles=tiles) for key, card in vowel_cards())
+    result = write_apkg(path, DECK_NAME, DECK_ID, model, notes)
+    print(f"Created {path} with {result['notes']} cards and {result['media']} media files")
+
+def card_source(compact=False, tiles=False):
+    """Return the (key, card) pairs of the deck, the function rendering a card, and the template fingerprint"""
+    render = lambda card: render_vowel_card(card, compact=compact, tiles=tiles)
+    template = template_fingerprint(COMPACT_TABLE_HEAD, COMPACT_TABLE_ROW, COMPACT_TRANSCRIPTION, COMPACT_SOUND,
+                                    version=f"{TEMPLATE_VERSION},compact={compact},tiles={tiles}")
+    return vowel_cards(), render, template
+
+@profiling.traced("create_tsv_deck", deck="vowels")
+def create_tsv_deck(rebuild=False, compact=False, tiles=False):
+    """Create thai_vowels.tsv for Anki import, re-rendering only changed cards"""
+    cards, render, template = card_source(compact=compact, tiles=tiles)
+    summary = build_tsv("thai_vowels.tsv", cards, render, template,
+                        rebuild=rebuild, delimiter="\t", lineterminator="\n")
     print(f"Created TSV file with Thai vowel cards (no header row, mobile-friendly em padding)")
+    print_summary("thai_vowels.tsv", summary)
+    if compact:
+        print("Compact mode: paste this into the note type's Styling (the .apkg includes it already):")
+        print(VOWEL_CSS + (TILE_CSS if tiles else ""))
+
+def main(argv=None):
+    """Generate the vowel deck from command-line flags; return the process exit code"""
+    parser = argparse.ArgumentParser(description="Generate the Thai vowels Anki deck")
+    parser.add_argument('--audio', action='store_true', help="generate audio files (engine chosen with --tts)")
+    add_audio_arguments(parser)
+    add_postprocess_arguments(parser)
+    parser.add_argument('--rebuild', action='store_true',
+                        help="re-render every card instead of only the changed ones")
+    parser.add_argument('--apkg', action='store_true',
+                        help="also write thai_vowels.apkg with the cards and audio")
+    parser.add_argument('--compact', action='store_true',
+                        help="render cards with shared note-type CSS instead of inline styles")
+    parser.add_argument('--tiles', action='store_true',
+                        help="crop the card's row of the cheat sheet into sounds/ and show it on the back (needs Pillow)")
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    try:
+        with profiling.span("main", deck="vowels"):
+            return run(args)
+    finally:
+        if args.profile:
+            profiling.finish(args.profile)
+
+def run(args):
+    """Build the deck for parsed command-line arguments; return the process exit code"""
+    exit_code = 0
+    if args.tiles and generate_tiles()["failed"]:
+        exit_code = 1
+    create_tsv_deck(rebuild=args.rebuild, compact=args.compact, tiles=args.tiles)
     print("\n" + "=" * 40)
-    response = input("Do you want to generate audio files using gTTS? (y/n): ").lower().strip()
-    if response in ['y', 'yes']:
+    if args.audio:
         try:
-            import gtts
-            generate_audio_files()
-        except ImportError:
-            print("\nError: gTTS is not installed.")
-            print("To install gTTS, run: pip install gTTS")
-            print("Then run this script again.")
+            get_backend(args.tts, args.tts_url).check()
+        except (BackendUnavailable, ValueError) as e:
+            print(f"\nError: {e}")
+            print("Install it, or choose another engine with --tts, then run this script again.")
+            return 1
+        stats = generate_audio_files(jobs=args.jobs, rate=args.rate, batch=args.batch,
+                                     postprocess=args.postprocess, bitrate=args.bitrate,
+                                     retries=args.retries, resume=args.resume, tts=args.tts,
+                                     tts_url=args.tts_url)
+        if stats["failed"]:
+            exit_code = 1
     else:
-        print("Skipping audio generation.")
+        print("Skipping audio generation (pass --audio to generate it).")
+    if args.apkg:
+        print("\n" + "=" * 40)
+        create_anki_package(compact=args.compact, tiles=args.tiles)
+        print("\nTo import into Anki: File -> Import, then select thai_vowels.apkg")
+        print("The package includes the audio files, so no manual copying is needed.")
+        return exit_code
     print("\n" + "=" * 40)
     print("To import into Anki:")
     print("1. Open Anki")
@@ -235,10 +220,12 @@ def main():
     print("4. Choose 'Basic' as the note type")
     print("5. Map Front and Back fields")
     print("6. Import")
-    if response in ['y', 'yes']:
+    if args.audio:
         print("\nFor audio files:")
-        print("1. Copy files from 'sounds/' directory to your Anki media folder")
+        print("1. Run python media_sync.py --all-profiles (or --profile NAME) to sync 'sounds/' into Anki")
         print("2. Restart Anki to load the audio files")
+    print("\nTip: run with --apkg to build a package that includes the audio files.")
+    return exit_code
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
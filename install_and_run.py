@@ -1,60 +1,66 @@
 #!/usr/bin/env python3
 """
-Installation and setup script for Thai Consonants Anki Deck
-Handles dependency installation and runs the deck generation
+Installation and setup script for the Thai Anki Decks
+Handles dependency installation and runs the non-interactive build with audio
+Extra arguments are passed through to build.py (e.g. --apkg)
 """
 
 import subprocess
 import sys
 import os
 
+REQUIREMENTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "requirements.txt")
+
+def pinned_version(package):
+    """Return the version `package` is pinned to in requirements.txt"""
+    with open(REQUIREMENTS, encoding='utf-8') as f:
+        for line in f:
+            name, _, version = line.strip().partition("==")
+            if name.lower() == package.lower():
+                return version
+    return None
+
 def install_requirements():
-    """Install required Python packages"""
+    """Install the pinned packages from requirements.txt"""
     print("Installing required packages...")
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "gTTS"])
-        print("✓ gTTS installed successfully")
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", REQUIREMENTS])
+        print(f"✓ gTTS {pinned_version('gTTS')} installed successfully")
         return True
     except subprocess.CalledProcessError as e:
         print(f"✗ Error installing gTTS: {e}")
         return False
 
 def check_gtts():
-    """Check if gTTS is available"""
+    """Check if the pinned gTTS is installed (the engine relies on its request format)"""
     try:
         import gtts
-        return True
     except ImportError:
         return False
+    return gtts.__version__ == pinned_version("gTTS")
 
 def main():
     """Main installation and setup function"""
-    print("Thai Consonants Anki Deck - Setup")
+    print("Thai Anki Decks - Setup")
     print("=" * 40)
     
     # Check if gTTS is already installed
     if check_gtts():
         print("✓ gTTS is already installed")
     else:
-        print("gTTS not found. Installing...")
+        print(f"gTTS {pinned_version('gTTS')} not found. Installing...")
         if not install_requirements():
             print("\nInstallation failed. Please install manually:")
-            print("pip install gTTS")
-            return
+            print("pip install -r requirements.txt")
+            return 1
     
     # Run the main deck generation script
     print("\n" + "=" * 40)
     print("Running deck generation...")
     
-    try:
-        # Import and run the main script
-        from generate_thai_deck import main as run_deck_generation
-        run_deck_generation()
-    except ImportError as e:
-        print(f"Error importing deck generation script: {e}")
-        print("Please ensure all files are in the same directory")
-    except Exception as e:
-        print(f"Error running deck generation: {e}")
+    # Import and run the build
+    from build import main as run_build
+    return run_build(["--audio"] + sys.argv[1:])
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Load test for the audio pipeline against fake_tts_server.py
+Starts the fake Translate TTS endpoint in-process, runs the real deck
+generators' gtts path against it in a scratch directory (so sounds/ and the
+TTS cache are untouched), and reports throughput, request tail latency as the
+client and the server saw it, and how the retries recovered from the
+injected faults. Every saved clip is then validated, so a truncated
+response that slipped through shows up as a failure.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import profiling
+from fake_tts_server import add_fault_arguments, fake_from_args, serve
+from tts_journal import DEFAULT_RETRIES, CircuitBreaker
+
+DECKS = {
+    "consonants": "generate_thai_consonant_deck",
+    "vowels": "generate_thai_vowel_deck",
+}
+DEFAULT_JOBS = 8
+DEFAULT_RATE = 50.0  # well above the real service's limit, so the server's latency is what's measured
+
+def run_decks(modules, url, jobs, rate, retries, breaker, verbose=False):
+    """Generate each deck's audio through the fake server; returns {deck: synthesis stats}"""
+    results = {}
+    for deck, module in modules.items():
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            results[deck] = module.generate_audio_files(jobs=jobs, rate=rate, retries=retries,
+                                                        tts="gtts", tts_url=url, breaker=breaker)
+    return results
+
+def load_test(args):
+    """Run one load test and return the report dict"""
+    from validate_audio import validate
+
+    # Imported before leaving the working directory, which may be how they are found
+    modules = {deck: importlib.import_module(DECKS[deck]) for deck in args.decks}
+    fake = fake_from_args(args)
+    server = serve(fake, port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    # A breaker of its own, so the run leaves the process-wide one untouched
+    if args.breaker_cooldown is None:
+        breaker = CircuitBreaker()
+    else:
+        breaker = CircuitBreaker(cooldown=args.breaker_cooldown, max_cooldown=args.breaker_cooldown * 10)
+    workdir = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix="loadtest_tts_") as scratch:
+            os.chdir(scratch)
+            try:
+                started = time.perf_counter()
+                decks = run_decks(modules, url, args.jobs, args.rate, args.retries, breaker, args.verbose)
+                seconds = time.perf_counter() - started
+                audio = validate([], "sounds", all_clips=True)
+            finally:
+                os.chdir(workdir)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    totals = {key: sum(stats[key] for stats in decks.values())
+              for key in ("generated", "failed", "requests", "retries", "bytes")}
+    return {
+        "url": url, "decks": decks, "totals": totals, "seconds": seconds,
+        "clips_per_second": totals["generated"] / seconds if seconds > 0 else 0.0,
+        "client": profiling.tracer.summary().get("tts.request", {}),
+        "server": fake.stats(),
+        "invalid_clips": report_problems(audio),
+    }
+
+def report_problems(audio):
+    return [f"{os.path.basename(path)}: {message}" for path, message in audio["problems"]]
+
+def print_report(report):
+    totals = report["totals"]
+    server = report["server"]
+    faults = sum(count for outcome, count in server["outcomes"].items() if outcome != "ok")
+    print(f"Clips: {totals['generated']} generated, {totals['failed']} failed in {report['seconds']:.1f}s "
+          f"({report['clips_per_second']:.1f} clips/s, {totals['bytes'] / 1024:.1f} KB)")
+    print(f"Requests: {server['requests']} served, peak {server['peak_in_flight']} in flight; "
+          + ", ".join(f"{count} {outcome}" for outcome, count in server["outcomes"].items() if count))
+    print(f"Recovery: {faults} injected faults, {totals['retries']} client retries, "
+          f"{totals['failed']} clips lost")
+    print(f"{'latency (ms)':<16}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for name, entry in (("client", report["client"]), ("server", server)):
+        if entry:
+            print(f"{name:<16}{entry['p50_ms']:>9.1f}{entry['p90_ms']:>9.1f}{entry['p99_ms']:>9.1f}"
+                  f"{entry['max_ms']:>9.1f}")
+    for problem in report["invalid_clips"]:
+        print(f"✗ saved clip is invalid - {problem}")
+    if totals["failed"] or report["invalid_clips"]:
+        print("✗ Load test finished with lost or invalid clips")
+    else:
+        print("✓ Every clip was synthesized and is a valid MP3")
+
+def main(argv=None):
+    """Load-test the audio pipeline; returns 1 if any clip was lost or saved invalid"""
+    parser = argparse.ArgumentParser(description="Load-test audio generation against a local fake TTS server")
+    parser.add_argument('--decks', nargs='+', choices=sorted(DECKS), default=sorted(DECKS),
+                        help="decks whose audio is generated (default: all)")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help=f"concurrent requests (default: {DEFAULT_JOBS})")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f"client rate limit in requests/second (default: {DEFAULT_RATE})")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f"retries per clip (default: {DEFAULT_RETRIES})")
+    parser.add_argument('--breaker-cooldown', type=float, default=None, metavar='SECONDS',
+                        help="first circuit-breaker pause after repeated 429s (default: the pipeline's own)")
+    add_fault_arguments(parser)
+    parser.add_argument('--output', help="also write the JSON report to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the generators' per-clip output")
+    profiling.add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        fake_from_args(args)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    for path in ("output", "profile"):
+        if getattr(args, path):
+            setattr(args, path, os.path.abspath(getattr(args, path)))
+
+    # The client-side latency comes from the tts.request spans
+    profiling.enable()
+    print(f"Load-testing {', '.join(args.decks)} audio with {args.jobs} workers at up to {args.rate} requests/s...")
+    report = load_test(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Wrote the report to {args.output}")
+    if args.profile:
+        profiling.finish(args.profile)
+    return 1 if report["totals"]["failed"] or report["invalid_clips"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Incremental media sync of sounds/ into Anki profile media folders
+Keeps a hash manifest per target folder, copies only new or changed clips in
+parallel, hardlinks identical clips to a single copy where the filesystem
+allows, and removes orphaned cheat_sheet_* files
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+SOURCE_DIR = "sounds"
+MANIFEST_DIR = os.path.join(".tts_cache", "media_sync")
+MEDIA_PREFIX = "cheat_sheet_"
+DEFAULT_WORKERS = 8
+
+def anki_base_dir():
+    """Return the platform's Anki2 data folder"""
+    if sys.platform == "win32":
+        return os.path.join(os.environ.get("APPDATA", ""), "Anki2")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Application Support/Anki2")
+    return os.path.join(os.environ.get("XDG_DATA_HOME", os.path.expanduser("~/.local/share")), "Anki2")
+
+def profile_media_dirs(profiles=None, base_dir=None):
+    """Return the collection.media folder of each named profile, or of every profile if none are named"""
+    base_dir = base_dir or anki_base_dir()
+    if not profiles:
+        if not os.path.isdir(base_dir):
+            return []
+        profiles = sorted(name for name in os.listdir(base_dir)
+                          if os.path.isdir(os.path.join(base_dir, name, "collection.media")))
+    return [os.path.join(base_dir, profile, "collection.media") for profile in profiles]
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _stat_key(stat):
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _load_json(path, default):
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return default
+
+def _save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def _manifest_path(target, manifest_dir):
+    name = hashlib.sha1(os.path.realpath(target).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(manifest_dir, f"{name}.json")
+
+def source_hashes(source_dir=SOURCE_DIR, manifest_dir=MANIFEST_DIR, workers=DEFAULT_WORKERS):
+    """Return {file name: sha256} for the clips in `source_dir`
+
+    Hashes are cached by (size, mtime), so only new or rewritten clips are read.
+    """
+    cache_path = os.path.join(manifest_dir, "source.json")
+    cache = _load_json(cache_path, {})
+    current = {}
+    stale = []
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.startswith(MEDIA_PREFIX) or entry.name.endswith(".tmp"):
+                continue
+            stat_key = _stat_key(entry.stat())
+            cached = cache.get(entry.name)
+            if cached and cached[:2] == stat_key:
+                current[entry.name] = cached
+            else:
+                stale.append((entry.name, stat_key))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        digests = pool.map(lambda item: _hash_file(os.path.join(source_dir, item[0])), stale)
+        for (name, stat_key), digest in zip(stale, digests):
+            current[name] = stat_key + [digest]
+    if current != cache:
+        _save_json(cache_path, current)
+    return {name: entry[2] for name, entry in current.items()}
+
+def _place(source, canonical, destination):
+    """Put `source`'s content at `destination`, hardlinked to `canonical` when possible
+
+    Returns "linked" or "copied". Both paths go through a temporary file and
+    os.replace, so a file Anki is reading is never half written.
+    """
+    tmp = f"{destination}.tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    if canonical:
+        try:
+            os.link(canonical, tmp)
+            os.replace(tmp, destination)
+            return "linked"
+        except OSError:
+            pass  # cross-device, unsupported filesystem, or canonical is gone
+    shutil.copyfile(source, tmp)
+    os.replace(tmp, destination)
+    return "copied"
+
+def sync_media(targets, source_dir=SOURCE_DIR, manifest_dir=MANIFEST_DIR, workers=DEFAULT_WORKERS,
+               prune=True, link=True):
+    """Sync the clips in `source_dir` into every target folder and return a stats dict
+
+    A target file is left alone when the manifest records the same content
+    hash and its size and mtime are unchanged, so a rebuilt deck costs one
+    write per changed clip. Identical clips are written once and hardlinked
+    everywhere else, across names and across targets.
+    """
+    stats = {"copied": 0, "linked": 0, "unchanged": 0, "removed": 0, "failed": 0, "bytes": 0}
+    hashes = source_hashes(source_dir, manifest_dir, workers)
+    # One source file per distinct content, used to make the first copy
+    sources = {}
+    for name, digest in sorted(hashes.items()):
+        sources.setdefault(digest, os.path.join(source_dir, name))
+    canonical = {}  # content hash -> a synced copy other targets can link to
+
+    for target in targets:
+        os.makedirs(target, exist_ok=True)
+        manifest_path = _manifest_path(target, manifest_dir)
+        manifest = _load_json(manifest_path, {"target": os.path.realpath(target), "files": {}})
+        recorded = manifest["files"]
+        present = {}
+        with os.scandir(target) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.startswith(MEDIA_PREFIX):
+                    present[entry.name] = _stat_key(entry.stat())
+
+        pending = {}
+        for name, digest in hashes.items():
+            entry = recorded.get(name)
+            if entry and entry[2] == digest and present.get(name) == entry[:2]:
+                stats["unchanged"] += 1
+                canonical.setdefault(digest, os.path.join(target, name))
+            else:
+                pending.setdefault(digest, []).append(name)
+
+        def place_group(digest, names):
+            """Write the first name of one content group, then link the rest to it"""
+            results = []
+            first = canonical.get(digest) if link else None
+            for name in names:
+                destination = os.path.join(target, name)
+                try:
+                    how = _place(sources[digest], first, destination)
+                except OSError as e:
+                    print(f"✗ {destination} - Error syncing: {e}")
+                    results.append((name, "failed", None))
+                    continue
+                if link:
+                    first = first or destination
+                results.append((name, how, _stat_key(os.stat(destination))))
+            return digest, results
+
+        # Groups are independent, so they run in parallel; each group links to its own first copy
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for digest, results in pool.map(lambda item: place_group(*item), pending.items()):
+                for name, how, stat_key in results:
+                    stats[how] += 1
+                    if stat_key is None:
+                        recorded.pop(name, None)
+                        continue
+                    recorded[name] = stat_key + [digest]
+                    canonical.setdefault(digest, os.path.join(target, name))
+                    if how == "copied":
+                        stats["bytes"] += stat_key[0]
+
+        if prune:
+            for name in present:
+                if name not in hashes:
+                    try:
+                        os.remove(os.path.join(target, name))
+                        stats["removed"] += 1
+                    except OSError as e:
+                        print(f"✗ {name} - Error removing orphaned file: {e}")
+                        stats["failed"] += 1
+                    recorded.pop(name, None)
+        for name in list(recorded):
+            if name not in hashes:
+                recorded.pop(name)
+        _save_json(manifest_path, manifest)
+        print(f"✓ Synced {target}")
+
+    print(f"Media sync: {stats['copied']} copied ({stats['bytes'] / 1024:.1f} KB), {stats['linked']} hardlinked, "
+          f"{stats['unchanged']} unchanged, {stats['removed']} orphans removed, {stats['failed']} failed")
+    return stats
+
+def main(argv=None):
+    """Sync sounds/ into Anki media folders; returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Copy generated audio into Anki media folders incrementally")
+    parser.add_argument('--source', default=SOURCE_DIR, help=f"folder with the clips (default: {SOURCE_DIR})")
+    parser.add_argument('--target', action='append', default=[],
+                        help="media folder to sync into; may be repeated")
+    parser.add_argument('--profile', action='append', default=[],
+                        help="Anki profile whose collection.media to sync into; may be repeated")
+    parser.add_argument('--all-profiles', action='store_true', help="sync into every Anki profile found")
+    parser.add_argument('--anki-dir', help=f"Anki data folder (default: {anki_base_dir()})")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"parallel copies (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--no-prune', action='store_true',
+                        help=f"keep {MEDIA_PREFIX}* files that are no longer in the source folder")
+    parser.add_argument('--no-link', action='store_true', help="always copy instead of hardlinking duplicates")
+    args = parser.parse_args(argv)
+
+    targets = list(args.target)
+    if args.profile or args.all_profiles:
+        targets += profile_media_dirs(args.profile, args.anki_dir)
+    if not targets:
+        parser.error("give --target, --profile or --all-profiles")
+    if not os.path.isdir(args.source):
+        print(f"✗ Source folder '{args.source}' not found; generate audio first with --audio")
+        return 1
+
+    stats = sync_media(targets, args.source, workers=max(1, args.workers),
+                       prune=not args.no_prune, link=not args.no_link)
+    print("Restart Anki (or run Tools → Check Media) to pick up the changes.")
+    return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Live card preview with watch mode
+Serves the rendered card fronts and backs on a local web page, with working
+[sound:...] playback and images from sounds/. The data and template modules
+are polled for changes; on a change they are reloaded, the previewed cards
+are re-rendered, and only the ones that look different are pushed to every
+open page over server-sent events.
+"""
+
+import argparse
+import importlib
+import itertools
+import json
+import mimetypes
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+from anki_package import DEFAULT_CSS, IMAGE_REFERENCE, SOUND_REFERENCE
+
+# deck -> (generator module, name of its note-type CSS)
+DECKS = {
+    "consonants": ("generate_thai_consonant_deck", "CONSONANT_CSS"),
+    "vowels": ("generate_thai_vowel_deck", "VOWEL_CSS"),
+    "syllables": ("generate_thai_syllable_deck", "SYLLABLE_CSS"),
+}
+DEFAULT_DECKS = ["consonants", "vowels"]
+# Modules the generators render from, reloaded in this order so each one sees
+# its dependencies' new definitions; the generators themselves come last
+SOURCE_MODULES = ["thai_chars", "thai_data", "sheet_tiles", "tsv_build"]
+MEDIA_DIR = "sounds"
+DEFAULT_PORT = 8765
+DEFAULT_INTERVAL = 0.3  # seconds between checks for changed files
+DEFAULT_LIMIT = 1000    # cards shown per deck; the syllable deck streams over 11,000
+KEPT_EVENTS = 100       # pages further behind than this fetch every card again
+
+class DeckPreview:
+    """The rendered cards of one deck, keyed like the TSV rows"""
+
+    def __init__(self, deck, compact=False, tiles=False, limit=DEFAULT_LIMIT):
+        self.deck = deck
+        self.module_name, self.css_name = DECKS[deck]
+        self.compact = compact
+        self.tiles = tiles
+        self.limit = limit
+        self.cards = {}  # key -> (front, back), in deck order
+
+    @property
+    def css(self):
+        return getattr(sys.modules[self.module_name], self.css_name)
+
+    def refresh(self):
+        """Re-render the previewed cards
+
+        Every card is rendered again, as an edit to any reloaded module may
+        change it. Returns the keys of the cards that now look different, the
+        number of cards rendered, and whether cards were added, removed or
+        reordered.
+        """
+        module = importlib.import_module(self.module_name)
+        rows, render, template = module.card_source(compact=self.compact, tiles=self.tiles)
+        if self.limit:
+            rows = itertools.islice(rows, self.limit)  # stops the deck's generator early
+        cards = {}
+        changed = []
+        for key, source in rows:
+            card = tuple(render(source))
+            cards[key] = card
+            if self.cards.get(key) != card:
+                changed.append(key)
+        reordered = list(cards) != list(self.cards)
+        self.cards = cards
+        return changed, len(cards), reordered
+
+def preview_html(field):
+    """Rewrite [sound:...] tags into audio players and <img> sources into media URLs"""
+    field = SOUND_REFERENCE.sub(
+        lambda match: f'<audio controls preload=none src="/media/{quote(match.group(1))}"></audio>', field)
+    return IMAGE_REFERENCE.sub(
+        lambda match: match.group(0)[:match.start(1) - match.start(0)] + f"/media/{quote(match.group(1))}", field)
+
+def _card_json(key, card):
+    front, back = card
+    return {"key": key, "front": preview_html(front), "back": preview_html(back)}
+
+class PreviewState:
+    """Every previewed deck plus a numbered log of the changes pushed to pages"""
+
+    def __init__(self, decks, compact=False, tiles=False, limit=DEFAULT_LIMIT):
+        self.decks = {deck: DeckPreview(deck, compact=compact, tiles=tiles, limit=limit) for deck in decks}
+        self.version = 0
+        self.events = []
+        self.error = None
+        self.condition = threading.Condition()
+
+    def css(self):
+        from sheet_tiles import TILE_CSS
+        return DEFAULT_CSS + "".join(preview.css for preview in self.decks.values()) + TILE_CSS
+
+    def snapshot(self):
+        """All cards of every deck, for a page that is (re)loading"""
+        with self.condition:
+            return {
+                "version": self.version,
+                "error": self.error,
+                "css": self.css(),
+                "decks": {deck: [_card_json(key, card) for key, card in preview.cards.items()]
+                          for deck, preview in self.decks.items()},
+            }
+
+    def refresh(self, changed_files=()):
+        """Reload the changed modules, re-render the affected cards and publish them; return the event"""
+        started = time.perf_counter()
+        with self.condition:
+            try:
+                _reload(changed_files)
+                updates = {deck: preview.refresh() for deck, preview in self.decks.items()}
+            except Exception as e:
+                # Usually a half-saved edit: keep the last good cards and report the error
+                self.error = f"{type(e).__name__}: {e}"
+                event = {"error": self.error}
+            else:
+                self.error = None
+                event = {
+                    "error": None,
+                    "css": self.css(),
+                    "reload": any(reordered for changed, rendered, reordered in updates.values()),
+                    "rendered": sum(rendered for changed, rendered, reordered in updates.values()),
+                    "cards": {deck: [_card_json(key, self.decks[deck].cards[key]) for key in changed]
+                              for deck, (changed, rendered, reordered) in updates.items() if changed},
+                }
+            event["ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self.version += 1
+            event["version"] = self.version
+            self.events = self.events[-KEPT_EVENTS + 1:] + [event]
+            self.condition.notify_all()
+        return event
+
+    def wait(self, version, timeout):
+        """Return the events after `version`, waiting up to `timeout` seconds for one"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version > version, timeout=timeout)
+            missed = self.version - version
+            if missed > len(self.events):
+                return [{"version": self.version, "reload": True}]
+            return self.events[len(self.events) - missed:] if missed else []
+
+def _watched_modules(decks):
+    return SOURCE_MODULES + [DECKS[deck][0] for deck in decks]
+
+def _reload(changed_files):
+    """Reload every watched module from the first changed one on (the order is dependency order)"""
+    order = [name for name in SOURCE_MODULES + [module for module, css in DECKS.values()] if name in sys.modules]
+    changed = [order.index(name) for name in changed_files if name in order]
+    if not changed:
+        return
+    for name in order[min(changed):]:
+        importlib.reload(sys.modules[name])
+
+def _mtimes(modules):
+    mtimes = {}
+    for name in modules:
+        try:
+            mtimes[name] = os.stat(f"{name}.py").st_mtime_ns
+        except OSError:
+            mtimes[name] = None
+    return mtimes
+
+def watch(state, modules, interval=DEFAULT_INTERVAL, seen=None):
+    """Poll the source files of `modules` and refresh `state` whenever one of them changes
+
+    `seen` is the modification times the cards were last rendered from, so
+    edits made while the preview was starting are not missed.
+    """
+    seen = seen or _mtimes(modules)
+    while True:
+        time.sleep(interval)
+        current = _mtimes(modules)
+        changed = [name for name in modules if current[name] != seen[name]]
+        if not changed:
+            continue
+        seen = current
+        event = state.refresh(changed)
+        files = ", ".join(f"{name}.py" for name in changed)
+        if event["error"]:
+            print(f"✗ {files}: {event['error']}")
+        else:
+            count = sum(len(cards) for cards in event["cards"].values())
+            print(f"✓ {files}: {event['rendered']} cards re-rendered, {count} changed, in {event['ms']} ms")
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Thai deck preview</title>
+<style>
+body{font-family:sans-serif;margin:0;background:#eee}
+header{position:sticky;top:0;background:#333;color:#fff;padding:6px 12px;font-size:14px}
+header .error{color:#f88;white-space:pre-wrap}
+h2{margin:16px 12px 4px}
+.cards{display:flex;flex-wrap:wrap;gap:12px;padding:12px}
+.preview{width:420px;border:1px solid #ccc;background:#fff;transition:box-shadow .3s}
+.preview.changed{box-shadow:0 0 0 3px #fc3}
+.preview .card{padding:12px}
+.preview .front{font-size:40px;padding:12px;border-bottom:1px dashed #ccc}
+.preview .key{font-size:11px;color:#888;padding:2px 6px}
+</style><style id="deck-css"></style></head>
+<body><header><span id="status">Loading...</span> <span class="error" id="error"></span></header>
+<main id="decks"></main>
+<script>
+const elements = new Map();
+
+function fill(element, card) {
+  element.innerHTML = `<div class="key"></div><div class="card front"></div><div class="card back"></div>`;
+  element.querySelector(".key").textContent = card.key;
+  element.querySelector(".front").innerHTML = card.front;
+  element.querySelector(".back").innerHTML = card.back;
+}
+
+function showError(error) {
+  document.getElementById("error").textContent = error || "";
+}
+
+async function load() {
+  const data = await (await fetch("/cards.json")).json();
+  const main = document.getElementById("decks");
+  main.innerHTML = "";
+  elements.clear();
+  for (const [deck, cards] of Object.entries(data.decks)) {
+    const heading = document.createElement("h2");
+    heading.textContent = `${deck} (${cards.length} cards)`;
+    const list = document.createElement("div");
+    list.className = "cards";
+    for (const card of cards) {
+      const element = document.createElement("div");
+      element.className = "preview";
+      fill(element, card);
+      elements.set(deck + "\\u0000" + card.key, element);
+      list.appendChild(element);
+    }
+    main.append(heading, list);
+  }
+  document.getElementById("deck-css").textContent = data.css;
+  document.getElementById("status").textContent = `version ${data.version}`;
+  showError(data.error);
+}
+
+function apply(event) {
+  showError(event.error);
+  if (event.error) return;
+  if (event.reload) { load(); return; }
+  document.getElementById("deck-css").textContent = event.css;
+  let count = 0;
+  for (const [deck, cards] of Object.entries(event.cards)) {
+    for (const card of cards) {
+      const element = elements.get(deck + "\\u0000" + card.key);
+      if (!element) { load(); return; }
+      fill(element, card);
+      element.classList.add("changed");
+      setTimeout(() => element.classList.remove("changed"), 1500);
+      count++;
+    }
+  }
+  document.getElementById("status").textContent =
+    `version ${event.version}: ${event.rendered} cards re-rendered, ${count} changed, in ${event.ms} ms`;
+}
+
+load().then(() => {
+  const events = new EventSource("/events");
+  events.onmessage = message => apply(JSON.parse(message.data));
+  events.onerror = () => showError("Preview server stopped; reload once it is running again.");
+  events.onopen = () => showError("");
+});
+</script></body></html>
+"""
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    state = None
+    media_dir = MEDIA_DIR
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/":
+            self._send(200, PAGE.encode('utf-8'), "text/html; charset=utf-8")
+        elif path == "/cards.json":
+            body = json.dumps(self.state.snapshot(), ensure_ascii=False).encode('utf-8')
+            self._send(200, body, "application/json; charset=utf-8")
+        elif path == "/events":
+            self._stream_events()
+        elif path.startswith("/media/"):
+            self._send_media(unquote(path[len("/media/"):]))
+        else:
+            self._send(404, b"Not found", "text/plain")
+
+    def _send_media(self, name):
+        # Only plain file names inside the media directory
+        path = os.path.join(self.media_dir, name)
+        if os.path.basename(name) != name or not os.path.isfile(path):
+            self._send(404, b"Not found", "text/plain")
+            return
+        with open(path, 'rb') as f:
+            data = f.read()
+        self._send(200, data, mimetypes.guess_type(name)[0] or "application/octet-stream")
+
+    def _stream_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        version = self.state.version
+        try:
+            while True:
+                events = self.state.wait(version, timeout=15)
+                for event in events:
+                    version = max(version, event["version"])
+                    self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode('utf-8'))
+                if not events:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+def serve(state, host="127.0.0.1", port=DEFAULT_PORT, media_dir=MEDIA_DIR):
+    """Return a started preview server (call shutdown() to stop it)"""
+    handler = type("Handler", (PreviewHandler,), {"state": state, "media_dir": media_dir})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main(argv=None):
+    """Serve the live preview until interrupted; returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Preview the rendered cards in a browser, re-rendering on every edit")
+    parser.add_argument('--decks', nargs='+', choices=list(DECKS), default=DEFAULT_DECKS,
+                        help=f"decks to preview (default: {' '.join(DEFAULT_DECKS)})")
+    parser.add_argument('--compact', action='store_true', help="preview the compact shared-CSS layout")
+    parser.add_argument('--tiles', action='store_true', help="include the cheat-sheet tiles (needs Pillow)")
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help=f"show at most this many cards per deck, 0 for all (default: {DEFAULT_LIMIT})")
+    parser.add_argument('--host', default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f"seconds between checks for edited files (default: {DEFAULT_INTERVAL})")
+    parser.add_argument('--no-watch', action='store_true', help="render once and do not watch for edits")
+    parser.add_argument('--open', action='store_true', help="open the preview in the default browser")
+    args = parser.parse_args(argv)
+
+    modules = _watched_modules(args.decks)
+    seen = _mtimes(modules)
+    if args.tiles:
+        for deck in args.decks:
+            module = importlib.import_module(DECKS[deck][0])
+            if hasattr(module, "generate_tiles"):
+                module.generate_tiles()
+    state = PreviewState(args.decks, compact=args.compact, tiles=args.tiles, limit=args.limit)
+    event = state.refresh()
+    if event["error"]:
+        print(f"✗ Could not render the cards: {event['error']}")
+        return 1
+    print(f"Rendered {event['rendered']} cards in {event['ms']} ms")
+
+    try:
+        server = serve(state, args.host, args.port)
+    except OSError as e:
+        print(f"✗ Could not listen on {args.host}:{args.port}: {e}")
+        return 1
+    url = f"http://{args.host}:{args.port}/"
+    print(f"Previewing {', '.join(args.decks)} at {url}")
+    if args.open:
+        import webbrowser
+        webbrowser.open(url)
+
+    try:
+        if args.no_watch:
+            threading.Event().wait()
+        else:
+            print("Watching for edits to the data and templates (Ctrl+C to stop)...")
+            watch(state, modules, args.interval, seen)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Lightweight timing instrumentation for deck builds
+Stages and items record spans (with details such as bytes written or cache
+hits) into a process-wide tracer. Tracing is off by default and costs one
+attribute check per span; --profile turns it on, writes a Chrome trace
+(chrome://tracing or ui.perfetto.dev) and prints a percentile summary.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+DEFAULT_TRACE = "profile_trace.json"
+PERCENTILES = (50, 90, 99)
+
+class Tracer:
+    """Collects complete ("X") and instant ("i") trace events from any thread"""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        self.threads = {}
+
+    def _tid(self):
+        ident = threading.get_ident()
+        tid = self.threads.get(ident)
+        if tid is None:
+            with self.lock:
+                tid = self.threads.setdefault(ident, (len(self.threads) + 1, threading.current_thread().name))
+        return tid[0]
+
+    def record(self, name, cat, start, duration, args=None):
+        """Record a finished span; `start` is a time.perf_counter() value, `duration` is in seconds"""
+        event = {"name": name, "cat": cat, "ph": "X", "pid": os.getpid(), "tid": self._tid(),
+                 "ts": (start - self.origin) * 1e6, "dur": duration * 1e6}
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    def instant(self, name, cat, args=None):
+        event = {"name": name, "cat": cat, "ph": "i", "s": "t", "pid": os.getpid(), "tid": self._tid(),
+                 "ts": (time.perf_counter() - self.origin) * 1e6}
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    def trace(self):
+        """Return the events as a Chrome trace document"""
+        names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                 for tid, name in self.threads.values()]
+        return {"traceEvents": names + self.events, "displayTimeUnit": "ms"}
+
+    def summary(self):
+        """Return {span name: {count, total_ms, p50_ms, p90_ms, p99_ms, max_ms}} over the recorded spans"""
+        durations = {}
+        for event in self.events:
+            if event["ph"] == "X":
+                durations.setdefault(event["name"], []).append(event["dur"] / 1000)
+        summary = {}
+        for name, values in durations.items():
+            values.sort()
+            entry = {"count": len(values), "total_ms": sum(values)}
+            for percentile in PERCENTILES:
+                # nearest-rank percentile
+                rank = max(1, -(-percentile * len(values) // 100))
+                entry[f"p{percentile}_ms"] = values[rank - 1]
+            entry["max_ms"] = values[-1]
+            summary[name] = entry
+        return summary
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.args
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.cat, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+tracer = Tracer()
+
+def enable():
+    tracer.enabled = True
+
+def enabled():
+    return tracer.enabled
+
+def span(name, cat="stage", **args):
+    """Context manager timing a block; yields a dict the block can add details to (e.g. bytes)"""
+    if not tracer.enabled:
+        return _NULL_SPAN
+    return _Span(tracer, name, cat, args)
+
+def traced(name, cat="stage", **args):
+    """Decorator recording a span around every call of the decorated function"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*call_args, **call_kwargs):
+            if not tracer.enabled:
+                return function(*call_args, **call_kwargs)
+            with _Span(tracer, name, cat, dict(args)):
+                return function(*call_args, **call_kwargs)
+        return wrapper
+    return decorator
+
+def record(name, cat, start, duration, **args):
+    """Record a span that was timed by the caller"""
+    if tracer.enabled:
+        tracer.record(name, cat, start, duration, args)
+
+def instant(name, cat="event", **args):
+    """Record a point event such as a cache hit"""
+    if tracer.enabled:
+        tracer.instant(name, cat, args)
+
+def print_summary(summary):
+    print("\n" + "=" * 40)
+    print("Profile summary (ms):")
+    print(f"{'span':<28}{'count':>7}{'total':>11}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for name, entry in sorted(summary.items(), key=lambda item: -item[1]["total_ms"]):
+        print(f"{name:<28}{entry['count']:>7}{entry['total_ms']:>11.1f}{entry['p50_ms']:>9.2f}"
+              f"{entry['p90_ms']:>9.2f}{entry['p99_ms']:>9.2f}{entry['max_ms']:>9.2f}")
+
+def finish(path):
+    """Write the Chrome trace to `path` and print the percentile summary"""
+    trace = tracer.trace()
+    trace["summary"] = tracer.summary()
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(trace, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    print_summary(trace["summary"])
+    print(f"✓ Wrote profile trace to {path} (open it in chrome://tracing or ui.perfetto.dev)")
+
+def add_profile_arguments(parser):
+    """Add the shared --profile option to an argparse parser"""
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE, metavar='PATH',
+                        help=f"record stage and per-clip timings, write a Chrome trace (default: {DEFAULT_TRACE}) "
+                             "and print a percentile summary")
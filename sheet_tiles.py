@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Cheat-sheet tiles for the card backs
+Maps each consonant and vowel row of Thai+Cheat+Sheet+2023+update.png to its
+region of the sheet, crops the regions across a process pool (each worker
+decodes the large PNG once) and writes small palette PNGs next to the audio.
+Needs Pillow; tiles are cached by source hash, crop boxes and settings.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import profiling
+
+SHEET_PATH = "Thai+Cheat+Sheet+2023+update.png"
+MEDIA_DIR = "sounds"
+CACHE_DIR = os.path.join(".tts_cache", "tiles")
+TILE_COLORS = 64        # palette size of the optimized tiles
+TILE_WIDTH = 600        # tiles are scaled down to this width
+
+# Region of each table in sheet pixels (3508 x 2480): column span and row edges,
+# in the same order as THAI_CONSONANTS and vowel_rows
+CONSONANT_HEADER = (477, 119, 1342, 167)
+CONSONANT_TABLES = [
+    ((477, 1342), [170, 251, 336, 415, 489, 564, 641, 717, 791, 865, 938, 1014, 1091, 1167, 1242, 1319, 1401,
+                   1481, 1555, 1628, 1701, 1775, 1853, 1936, 2013, 2086, 2166, 2253, 2339, 2421]),
+    ((1522, 2389), [56, 128, 202, 275, 347, 421, 495, 574, 658, 735, 810, 886, 959, 1033, 1109, 1186]),
+]
+VOWEL_HEADER = (2552, 56, 3452, 188)
+VOWEL_TABLE = ((2552, 3452), [188, 259, 330, 401, 472, 541, 610, 681, 755, 830, 903, 975, 1045, 1116, 1184, 1251,
+                              1322, 1390, 1458, 1529, 1606, 1675, 1735, 1798, 1864, 1932, 2003, 2072, 2142, 2213,
+                              2284, 2354])
+
+TILE_CSS = """.tile{text-align:center;margin-top:6px}
+.tile img{max-width:100%}
+"""
+
+# Serializes manifest merges when several decks build tiles at the same time
+_manifest_lock = threading.Lock()
+
+def _row_boxes(table):
+    (left, right), edges = table
+    return [(left, top, right, bottom) for top, bottom in zip(edges, edges[1:])]
+
+def consonant_tile_name(consonant):
+    return f"cheat_sheet_tile_consonant_{consonant}.png"
+
+def vowel_tile_name(row_index):
+    return f"cheat_sheet_tile_vowel_{row_index + 1}.png"
+
+def tile_html(name, compact=False):
+    """Return the card-back snippet showing tile `name`"""
+    if compact:
+        return f"<div class=tile><img src=\"{name}\"></div>"
+    return f"<div style='text-align:center; margin-top:6px;'><img src=\"{name}\" style='max-width:100%;'></div>"
+
+def consonant_tiles(consonants):
+    """Return (file name, crop boxes) per consonant: the table header above the consonant's row"""
+    boxes = [box for table in CONSONANT_TABLES for box in _row_boxes(table)]
+    return [(consonant_tile_name(row[0]), [CONSONANT_HEADER, box]) for row, box in zip(consonants, boxes)]
+
+def vowel_tiles(rows):
+    """Return (file name, crop boxes) per vowel row: the table header above the row"""
+    return [(vowel_tile_name(index), [VOWEL_HEADER, box])
+            for index, (row, box) in enumerate(zip(rows, _row_boxes(VOWEL_TABLE)))]
+
+def tiles_available():
+    try:
+        import PIL
+        return True
+    except ImportError:
+        return False
+
+_sheet = None
+
+def _load_sheet(path):
+    """Process pool initializer: decode the sheet once per worker"""
+    global _sheet
+    from PIL import Image
+    _sheet = Image.open(path)
+    _sheet.load()
+
+def render_tile(boxes, width=TILE_WIDTH, colors=TILE_COLORS):
+    """Crop `boxes` from the worker's sheet, stack them, and return an optimized PNG"""
+    import io
+    from PIL import Image
+
+    crops = [_sheet.crop(box) for box in boxes]
+    tile = Image.new("RGB", (max(crop.width for crop in crops), sum(crop.height for crop in crops)), "white")
+    top = 0
+    for crop in crops:
+        tile.paste(crop, (0, top))
+        top += crop.height
+    if tile.width > width:
+        tile = tile.resize((width, round(tile.height * width / tile.width)), Image.LANCZOS)
+    tile = tile.quantize(colors=colors)
+    buffer = io.BytesIO()
+    tile.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _load_manifest(path):
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {"blobs": {}, "files": {}}
+
+def _write_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+@profiling.traced("build_tiles")
+def build_tiles(tiles, sheet=SHEET_PATH, media_dir=MEDIA_DIR, cache_dir=CACHE_DIR, workers=None):
+    """Write each (file name, crop boxes) tile into `media_dir` and return a stats dict
+
+    Tiles are cached by (sheet hash, boxes, settings), so only new or moved
+    regions are cropped; the pool is not started when everything is cached.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    stats = {"cropped": 0, "cached": 0, "failed": 0, "bytes": 0}
+    if not tiles_available():
+        print("Cheat-sheet tiles need Pillow (pip install Pillow); skipping.")
+        stats["failed"] = len(tiles)
+        return stats
+
+    source = _file_hash(sheet)
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+    manifest = _load_manifest(manifest_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    os.makedirs(media_dir, exist_ok=True)
+
+    pending = {}
+    for name, boxes in tiles:
+        params = [source, boxes, TILE_WIDTH, TILE_COLORS]
+        key = hashlib.sha256(json.dumps(params).encode('utf-8')).hexdigest()
+        cached = os.path.join(cache_dir, f"{key}.png")
+        destination = os.path.join(media_dir, name)
+        if key in manifest["blobs"] and os.path.exists(cached):
+            if manifest["files"].get(destination) != key or not os.path.exists(destination):
+                with open(cached, 'rb') as f:
+                    _write_atomic(destination, f.read())
+                manifest["files"][destination] = key
+            stats["cached"] += 1
+        else:
+            pending[name] = (key, boxes)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load_sheet, initargs=(sheet,)) as pool:
+            futures = {name: pool.submit(render_tile, boxes) for name, (key, boxes) in pending.items()}
+            for name, future in futures.items():
+                key = pending[name][0]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"✗ {name} - Error cropping cheat sheet: {e}")
+                    continue
+                _write_atomic(os.path.join(cache_dir, f"{key}.png"), data)
+                destination = os.path.join(media_dir, name)
+                _write_atomic(destination, data)
+                manifest["blobs"][key] = len(data)
+                manifest["files"][destination] = key
+                stats["cropped"] += 1
+                stats["bytes"] += len(data)
+
+    with _manifest_lock:
+        merged = _load_manifest(manifest_path)
+        for section in ("blobs", "files"):
+            merged[section].update(manifest[section])
+        manifest = merged
+        _write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True).encode('utf-8'))
+    print(f"Cheat-sheet tiles: {stats['cropped']} cropped ({stats['bytes'] / 1024:.1f} KB), "
+          f"{stats['cached']} from cache, {stats['failed']} failed")
+    return stats
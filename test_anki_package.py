@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the native .apkg exporter
+Packages are opened back up with zipfile and sqlite3, as Anki would.
+"""
+
+import json
+import sqlite3
+import zipfile
+
+import pytest
+
+from anki_package import basic_model, write_apkg
+
+def read_package(path, tmp_path):
+    """Return (note ids, card ids, guids, media map) of a written package"""
+    with zipfile.ZipFile(path) as package:
+        collection = tmp_path / f"{path.stem}.anki2"
+        collection.write_bytes(package.read("collection.anki2"))
+        media = json.loads(package.read("media"))
+    db = sqlite3.connect(collection)
+    try:
+        notes = db.execute("SELECT id, guid FROM notes ORDER BY id").fetchall()
+        cards = [card_id for card_id, in db.execute("SELECT id FROM cards")]
+    finally:
+        db.close()
+    return [note_id for note_id, guid in notes], cards, [guid for note_id, guid in notes], media
+
+@pytest.fixture
+def media_dir(tmp_path):
+    sounds = tmp_path / "sounds"
+    sounds.mkdir()
+    (sounds / "a.mp3").write_bytes(b"\xff\xfb" + bytes(100))
+    return str(sounds)
+
+def write(tmp_path, media_dir, name, deck_id, notes):
+    path = tmp_path / f"{name}.apkg"
+    write_apkg(str(path), name, deck_id, basic_model(deck_id + 1, name, deck_id), notes, media_dir=media_dir)
+    return path
+
+def test_package_holds_notes_cards_and_media(tmp_path, media_dir):
+    path = write(tmp_path, media_dir, "Deck", 1000, [("ก", "[sound:a.mp3]"), ("ข", "[sound:missing.mp3]")])
+    notes, cards, guids, media = read_package(path, tmp_path)
+    assert len(notes) == 2 and sorted(cards) == notes
+    assert media == {"0": "a.mp3"}
+
+def test_ids_do_not_collide_across_packages(tmp_path, media_dir):
+    # build.py writes the decks in parallel, within the same second
+    first = read_package(write(tmp_path, media_dir, "Consonants", 1000, [("ก", ""), ("ข", "")]), tmp_path)
+    second = read_package(write(tmp_path, media_dir, "Vowels", 2000, [("กะ", ""), ("กา", "")]), tmp_path)
+    assert not set(first[0]) & set(second[0])
+    assert not set(first[1]) & set(second[1])
+
+def test_ids_are_stable_across_rebuilds(tmp_path, media_dir):
+    notes = [("กุ", "short"), ("กุ", "short, closed")]
+    before = read_package(write(tmp_path, media_dir, "Vowels", 2000, notes), tmp_path)
+    after = read_package(write(tmp_path, media_dir, "Vowels", 2000, reversed(notes)), tmp_path)
+    assert len(set(before[2])) == 2
+    assert (before[0], before[2]) == (after[0], after[2])
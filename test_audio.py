@@ -1,53 +1,58 @@
 #!/usr/bin/env python3
 """
-Test script for gTTS audio generation
+Test script for audio generation
 Generates audio files for a few Thai consonants to test the functionality
+Use --tts stub (or espeak) to test the pipeline offline
 """
 
-try:
-    from gtts import gTTS
-    import os
-    import time
-    
-    print("Testing gTTS audio generation...")
-    
-    # Test consonants
-    test_consonants = [
-        ("ก", "กอ ไก่"),
-        ("ข", "ขอ ไข่"),
-        ("ด", "ดอ เด็ก")
-    ]
-    
+import argparse
+import os
+import sys
+
+from tts_backends import BackendUnavailable, add_backend_arguments, get_backend
+from tts_engine import synthesize_all
+
+# Test consonants
+TEST_CONSONANTS = [
+    ("ก", "กอ ไก่"),
+    ("ข", "ขอ ไข่"),
+    ("ด", "ดอ เด็ก")
+]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a few test clips")
+    add_backend_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        backend = get_backend(args.tts, args.tts_url)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    try:
+        backend.check()
+    except BackendUnavailable as e:
+        print(f"Error: {e}")
+        print("Or install all requirements: pip install -r requirements.txt")
+        return 1
+
+    print(f"Testing {backend.name} audio generation...")
+
     # Create test sounds directory
     test_dir = "test_sounds"
     if not os.path.exists(test_dir):
         os.makedirs(test_dir)
         print(f"Created test directory: {test_dir}")
-    
-    print(f"Generating test audio files for {len(test_consonants)} consonants...")
-    
-    for consonant, name in test_consonants:
-        try:
-            filename = f"{test_dir}/{consonant}_test.mp3"
-            
-            # Create gTTS object with Thai language
-            tts = gTTS(text=name, lang='th', slow=False)
-            
-            # Save the audio file
-            tts.save(filename)
-            
-            print(f"✓ {consonant} - Generated {filename}")
-            
-            # Small delay
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"✗ {consonant} - Error: {e}")
-    
+
+    print(f"Generating test audio files for {len(TEST_CONSONANTS)} consonants...")
+
+    # Shares the generators' cache, so a rerun makes no network calls
+    jobs = [(consonant, name, f"{test_dir}/{consonant}_test.mp3") for consonant, name in TEST_CONSONANTS]
+    stats = synthesize_all(jobs, backend=backend)
+
     print(f"\nTest complete! Check the '{test_dir}/' directory for generated files.")
-    print("If this works, you can run the full script: python generate_thai_deck.py")
-    
-except ImportError:
-    print("Error: gTTS is not installed.")
-    print("To install gTTS, run: pip install gTTS")
-    print("Or install all requirements: pip install -r requirements.txt") 
\ No newline at end of file
+    print("If this works, you can run the full build: python build.py --audio")
+    return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
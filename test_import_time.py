@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the deck generators
+TSV generation must only load the standard library: gTTS, requests and the
+audio tools are imported on first use. Run with pytest or directly.
+"""
+
+import os
+import subprocess
+import sys
+
+GENERATORS = ["generate_thai_consonant_deck", "generate_thai_vowel_deck"]
+NETWORK_MODULES = ("gtts", "requests", "urllib3", "pydub")
+BUDGET_MS = 100  # cumulative import time of one generator module
+RUNS = 3
+
+def import_profile(module):
+    """Return {module name: cumulative import time in ms} from `python -X importtime`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative_us) / 1000
+    return profile
+
+def test_generators_do_not_import_the_tts_stack():
+    for module in GENERATORS:
+        loaded = [name for name in import_profile(module) if name.split(".")[0] in NETWORK_MODULES]
+        assert not loaded, f"{module} imports {', '.join(loaded)} at startup"
+
+def test_generators_import_within_budget():
+    for module in GENERATORS:
+        best = min(import_profile(module)[module] for _ in range(RUNS))
+        assert best <= BUDGET_MS, f"{module} takes {best:.1f} ms to import (budget {BUDGET_MS} ms)"
+
+if __name__ == "__main__":
+    for module in GENERATORS:
+        print(f"{module}: {min(import_profile(module)[module] for _ in range(RUNS)):.1f} ms")
+    test_generators_do_not_import_the_tts_stack()
+    test_generators_import_within_budget()
+    print("✓ Import-time budget met")
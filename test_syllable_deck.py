@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the syllable drill deck's tone rules
+Known syllables are checked against the tone and consonant class the
+textbook rules give them.
+"""
+
+import pytest
+
+from generate_thai_syllable_deck import TONE_TABLE, TONES, syllables
+
+@pytest.fixture(scope="module")
+def deck():
+    """{syllable: [records]} for the whole deck"""
+    records = {}
+    for record in syllables():
+        records.setdefault(record["syllable"], []).append(record)
+    return records
+
+@pytest.mark.parametrize("syllable, consonant_class, tone", [
+    # mid class: live syllables are mid, and all four marks are used
+    ("กา", "Mid", "M"), ("ก่า", "Mid", "L"), ("ก้า", "Mid", "F"), ("ก๊า", "Mid", "H"), ("ก๋า", "Mid", "R"),
+    ("กัก", "Mid", "L"), ("กาน", "Mid", "M"),
+    # high class: live syllables rise, dead ones are low
+    ("ขา", "High", "R"), ("ข่า", "High", "L"), ("ข้า", "High", "F"), ("ขะ", "High", "L"), ("ขาก", "High", "L"),
+    # low class: dead syllables depend on vowel length
+    ("คา", "Low", "M"), ("ค่า", "Low", "F"), ("ค้า", "Low", "H"), ("คะ", "Low", "H"), ("คาก", "Low", "F"),
+    ("คัก", "Low", "H"), ("นอน", "Low", "M"),
+    # open syllables ending in a sonorant are live
+    ("ไก", "Mid", "M"), ("เกา", "Mid", "M"), ("กํา", "Mid", "M"), ("ไข", "High", "R"),
+])
+def test_known_syllables(deck, syllable, consonant_class, tone):
+    assert syllable in deck
+    assert {record["class"] for record in deck[syllable]} == {consonant_class}
+    assert {record["tone"] for record in deck[syllable]} == {TONES[tone]}
+
+def test_spelling_with_both_lengths_is_drilled_with_each(deck):
+    # เกิ- is both short and long on the chart; a dead low-class syllable is high when short, falling when long
+    assert {(record["long"], record["tone"]) for record in deck["เคิก"]} == {
+        (False, TONES["H"]), (True, TONES["F"])}
+    assert {(record["long"], record["tone"]) for record in deck["เคิน"]} == {
+        (False, TONES["M"]), (True, TONES["M"])}
+
+@pytest.mark.parametrize("syllable", [
+    "ค๊า", "ข๋า",        # mai tri and mai chattawa are only written on mid-class consonants
+    "ไกน", "ไกก", "ใกน",  # ไ/ใ vowels take no final consonant
+    "ก็่อก",             # mai taikhu never shares a syllable with a tone mark
+])
+def test_impossible_syllables_are_not_drilled(deck, syllable):
+    assert syllable not in deck
+
+def test_tone_table_covers_every_combination():
+    assert len(TONE_TABLE) == 3 * 2 * 2 * 5
+    assert {tone for tone in TONE_TABLE.values() if tone} == set(TONES)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for the Thai character classifier and cluster segmenter
+Covers vowels written before, above and below the initial consonant.
+"""
+
+import pytest
+
+from thai_chars import (ABOVE_VOWEL, BELOW_VOWEL, CONSONANT, LEADING_VOWEL, OTHER, char_class, classify,
+                        clusters, initial_index, vowel_symbol)
+
+def test_char_classes():
+    assert char_class("ก") == CONSONANT
+    assert char_class("เ") == LEADING_VOWEL
+    assert char_class("ี") == ABOVE_VOWEL
+    assert char_class("ุ") == BELOW_VOWEL
+    assert char_class("a") == OTHER
+    assert classify("เกาะ-") == "LCFFx"
+
+@pytest.mark.parametrize("text, expected", [
+    ("ไก่", ["ไก่"]),                 # pre-posed vowel and tone mark stay with their consonant
+    ("เกาะ", ["เกาะ"]),               # pre-posed and following vowels around one consonant
+    ("โต๊ะ", ["โต๊ะ"]),
+    ("ที่นี่", ["ที่", "นี่"]),           # above vowels with tone marks
+    ("กิน", ["กิ", "น"]),
+    ("กุ", ["กุ"]),                   # below vowel
+    ("ฤดู", ["ฤ", "ดู"]),              # ฤ takes a consonant's place
+    ("ก a", ["ก", " ", "a"]),         # anything else is a cluster of its own
+])
+def test_clusters(text, expected):
+    assert clusters(text) == expected
+
+def test_initial_index_skips_pre_posed_vowels():
+    assert initial_index("เกาะ") == 1
+    assert initial_index("กุ") == 0
+    assert initial_index("-ะ") == -1
+
+@pytest.mark.parametrize("cell, expected", [
+    ("เกาะ", "เ"),     # pre-posed
+    ("ไก", "ไ"),
+    ("กิ-", "ิ"),      # above
+    ("กั-", "ั"),
+    ("กุ", "ุ"),       # below
+    ("กู-", "ู"),
+    ("กา", "า"),       # following
+    ("<span style='color:red'>ก</span>ุ", "ุ"),
+])
+def test_vowel_symbol(cell, expected):
+    assert vowel_symbol(cell) == expected
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared deck data and its load-time validation
+"""
+
+import pytest
+
+from thai_data import (CONSONANTS, THAI_CONSONANTS, VOWEL_FORMS, DataError, VowelRow, _load_transcriptions,
+                       consonant_table, vowel_transcriptions)
+
+def transcriptions(syllable):
+    return {(form.sound, form.cell): form.transcription for form in VOWEL_FORMS.where(syllable=syllable)}
+
+def test_spellings_shared_by_rows_keep_each_rows_transcription():
+    assert transcriptions("กุ") == {("oo", 1): "gùᶠ", ("uy/ui", 0): "gùyᶠ"}
+    assert transcriptions("เกิ-") == {("erh/uuhr", 0): "gə̀ᶠ", ("erh/uuhr", 3): "gəəᴹ", ("erh/uuhr", 4): "gəəᴹ"}
+    assert transcriptions("ฤ-") == {("rue", 0): "rʉ́ᴿ", ("ri/reer", 0): "ríᴿ", ("ri/reer", 3): "ríᴿ"}
+    assert transcriptions("เก") == {("eh/ey", 4): "geeᴹ"}
+
+def test_every_transcription_belongs_to_a_drilled_cell():
+    cells = {(form.row, form.cell) for form in VOWEL_FORMS}
+    assert set(vowel_transcriptions) <= cells
+
+def test_bad_transcription_tables_are_rejected():
+    rows = (VowelRow("กะ", "", "a", "", ""),)
+    assert _load_transcriptions(rows, (("gàᶠ", "", "", ""),)) == {(0, 0): "gàᶠ"}
+    with pytest.raises(DataError):
+        _load_transcriptions(rows, (("gàᶠ", "gaᴹ", "", ""),))   # transcription for an empty cell
+    with pytest.raises(DataError):
+        _load_transcriptions(rows, ())                          # a row without transcriptions
+
+def test_duplicate_consonants_are_rejected():
+    with pytest.raises(DataError, match="duplicate letter 'ก'"):
+        consonant_table(THAI_CONSONANTS + (THAI_CONSONANTS[0]._replace(letter="ก"),))
+
+def test_where_matches_every_field():
+    assert [c.letter for c in CONSONANTS.where(consonant_class="High", final="-t")] == ["ฐ", "ถ", "ศ", "ษ", "ส"]
+    assert [c.letter for c in CONSONANTS.where(final="-t", consonant_class="High")] == ["ฐ", "ถ", "ศ", "ษ", "ส"]
+    assert CONSONANTS.where(consonant_class="Mid", initial="kh-") == ()
+    assert [form.syllable for form in VOWEL_FORMS.where(long=True, closed=False, sound="ee")] == ["กี"]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental TSV builder
+A no-op build must return before rendering, and a changed row must be the
+only one rendered again.
+"""
+
+import os
+
+from tsv_build import build_tsv, template_fingerprint
+
+def shout(text):
+    return [text, text.upper() + "!"]
+
+class CountingRender:
+    """Wraps a render function and counts the rows it renders"""
+
+    def __init__(self, render=shout):
+        self.render = render
+        self.calls = 0
+
+    def __call__(self, source):
+        self.calls += 1
+        return self.render(source)
+
+def build(path, rows, render, template=None, **options):
+    return build_tsv(path, rows, render, template or template_fingerprint(version=1), delimiter="\t", **options)
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+def test_fingerprint_follows_templates_and_version():
+    assert template_fingerprint("<b>{}</b>", version=1) == template_fingerprint("<b>{}</b>", version=1)
+    assert template_fingerprint("<b>{}</b>", version=1) != template_fingerprint("<i>{}</i>", version=1)
+    assert template_fingerprint("<b>{}</b>", version=1) != template_fingerprint("<b>{}</b>", version=2)
+
+def test_noop_build_renders_nothing(tmp_path):
+    path = str(tmp_path / "deck.tsv")
+    rows = [("a", "a"), ("b", "b")]
+    first = build(path, rows, CountingRender())
+    assert first["added"] == 2 and first["written"]
+    mtime = os.stat(path).st_mtime_ns
+
+    render = CountingRender()
+    again = build(path, rows, render)
+    assert again["unchanged"] == 2 and not again["written"]
+    assert render.calls == 0 and os.stat(path).st_mtime_ns == mtime
+
+def test_only_changed_rows_are_rendered(tmp_path):
+    path = str(tmp_path / "deck.tsv")
+    build(path, [("a", "a"), ("b", "b"), ("c", "c")], CountingRender())
+    render = CountingRender()
+    summary = build(path, [("a", "a"), ("b", "bee"), ("d", "d")], render)
+    assert render.calls == 2
+    assert (summary["added"], summary["changed"], summary["removed"], summary["unchanged"]) == (1, 1, 1, 1)
+    assert read(path) == ["a\tA!", "bee\tBEE!", "d\tD!"]
+
+def test_state_keeps_no_rendered_fields(tmp_path):
+    path = str(tmp_path / "deck.tsv")
+    build(path, [("a", "a secret front")], CountingRender())
+    with open(tmp_path / ".deck.tsv.build.json", encoding='utf-8') as f:
+        assert "A SECRET FRONT" not in f.read()
+
+def test_version_bump_re_renders_every_row(tmp_path):
+    path = str(tmp_path / "deck.tsv")
+    rows = [("a", "a"), ("b", "b")]
+    build(path, rows, CountingRender())
+    render = CountingRender(lambda text: [text, text + "?"])
+    edited = build(path, rows, render, template_fingerprint(version=2))
+    assert render.calls == 2 and edited["changed"] == 2 and edited["written"]
+    assert read(path) == ["a\ta?", "b\tb?"]
+
+def test_hand_edited_tsv_is_rebuilt(tmp_path):
+    path = str(tmp_path / "deck.tsv")
+    rows = [("a", "a")]
+    build(path, rows, CountingRender())
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("a\tedited by hand\n")
+    render = CountingRender()
+    summary = build(path, rows, render)
+    assert render.calls == 1 and summary["written"]
+    assert read(path) == ["a\tA!"]
+
+def test_multiline_fields_are_copied_intact(tmp_path):
+    path = str(tmp_path / "deck.tsv")
+    rows = [("a", "a"), ("b", "b")]
+    build(path, rows, CountingRender(lambda text: [text, f"<table>\n{text}\n</table>"]), lineterminator="\n")
+    render = CountingRender(lambda text: [text, f"<table>\n{text}\n</table>"])
+    build(path, rows + [("c", "c")], render, lineterminator="\n")
+    assert render.calls == 1
+    with open(path, encoding='utf-8', newline='') as f:
+        assert f.read() == "".join(f'{key}\t"<table>\n{key}\n</table>"\n' for key in "abc")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests for the audio pipeline, run offline with the stub backend
+Each test works in its own directory, so sounds/ and .tts_cache/ are fresh.
+"""
+
+import base64
+import json
+import os
+import urllib.parse
+
+import pytest
+
+import tts_engine
+import tts_journal
+from tts_backends import StubBackend
+from tts_cache import engine_version
+from tts_engine import synthesize_all
+from validate_audio import scan_mp3
+
+TEXTS = ["ก", "ข", "เกาะ"]
+
+class OtherStub(StubBackend):
+    """A second engine with its own cache entries"""
+    engine = "stub-other"
+
+class GTTSStub(StubBackend):
+    """Files its clips under the installed gTTS engine, like the real gtts backend"""
+    engine = engine_version()
+
+class FlakyStub(StubBackend):
+    """Fails every request for the texts in `failing`"""
+
+    def __init__(self, failing):
+        self.failing = set(failing)
+
+    def synthesize(self, text):
+        if text in self.failing:
+            raise ConnectionError(f"no audio for {text}")
+        return super().synthesize(text)
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tts_journal, "backoff_delay", lambda attempt: 0)
+    return [(text, text, os.path.join("sounds", f"clip_{text}.mp3")) for text in TEXTS]
+
+def run(jobs, backend, **options):
+    return synthesize_all(jobs, workers=2, backend=backend, **options)
+
+def test_generates_valid_clips_then_skips_them(jobs):
+    stats = run(jobs, StubBackend())
+    assert stats["generated"] == len(jobs) and stats["failed"] == 0
+    for label, text, filename in jobs:
+        assert scan_mp3(filename)["error"] is None
+    again = run(jobs, StubBackend())
+    assert again["skipped"] == len(jobs) and again["generated"] == 0
+
+def test_restores_deleted_clips_from_the_cache(jobs):
+    run(jobs, StubBackend())
+    for label, text, filename in jobs:
+        os.remove(filename)
+    stats = run(jobs, StubBackend())
+    assert stats["cached"] == len(jobs) and stats["generated"] == 0
+    assert all(os.path.exists(filename) for label, text, filename in jobs)
+
+def test_identical_text_is_synthesized_once(jobs):
+    shared = jobs + [("copy", TEXTS[0], os.path.join("sounds", "copy.mp3"))]
+    stats = run(shared, StubBackend())
+    assert stats["generated"] == len(shared) and stats["requests"] == len(TEXTS)
+
+def test_switching_backends_recreates_clips(jobs):
+    run(jobs, StubBackend())
+    switched = run(jobs, OtherStub())
+    assert switched["generated"] == len(jobs) and switched["skipped"] == 0
+    back = run(jobs, StubBackend())
+    assert back["cached"] == len(jobs) and back["generated"] == 0
+
+def test_shipped_clips_are_kept_by_other_engines(jobs):
+    # the untracked gTTS clips in sounds/ on a fresh checkout
+    os.makedirs("sounds")
+    for label, text, filename in jobs:
+        with open(filename, 'wb') as f:
+            f.write(b"shipped clip")
+    stats = run(jobs, StubBackend())
+    assert stats["skipped"] == len(jobs) and stats["generated"] == 0
+    with open(jobs[0][2], 'rb') as f:
+        assert f.read() == b"shipped clip"
+
+def test_gtts_clips_are_kept_and_other_engines_fill_in_missing_ones(jobs):
+    run(jobs, GTTSStub())
+    os.remove(jobs[0][2])
+    stats = run(jobs, StubBackend())
+    assert stats["generated"] == 1 and stats["skipped"] == len(jobs) - 1
+    with open(jobs[1][2], 'rb') as f:
+        assert f.read() == GTTSStub().synthesize(jobs[1][1])
+    # back on gTTS, the missing clip comes from the cache instead of the network
+    back = run(jobs, GTTSStub())
+    assert back["cached"] == 1 and back["generated"] == 0 and back["requests"] == 0
+
+def test_failures_are_journaled_and_resumed(jobs):
+    stats = run(jobs, FlakyStub([TEXTS[1]]), retries=1)
+    assert stats["failed"] == 1 and stats["generated"] == len(jobs) - 1 and stats["retries"] == 1
+    assert not os.path.exists(jobs[1][2])
+    resumed = run(jobs, StubBackend(), resume=True)
+    assert resumed["generated"] == 1 and resumed["skipped"] == len(jobs) - 1
+    assert scan_mp3(jobs[1][2])["error"] is None
+
+# A batchexecute reply as recorded from translate.google.com for gTTS 2.4.0,
+# with the audio shortened to one silent frame header
+RECORDED_AUDIO = "//sQwAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+RECORDED_REPLY = (
+    ")]}'\n\n"
+    "189\n"
+    '[["wrb.fr","jQ1olc","[\\"' + RECORDED_AUDIO + '\\"]",null,null,null,"generic"],'
+    '["di",48],["af.httprm",47,"-6286263858391226463",10]]\n'
+    "24\n"
+    '[["e",4,null,null,212]]\n'
+).encode("utf-8")
+
+class RecordedSession:
+    """Answers every request with `reply`, keeping the requests it was sent"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.status_code = 200
+        self.reason = "OK"
+        self.sent = []
+
+    def send(self, prepared, **options):
+        self.sent.append(prepared)
+        return self
+
+    def iter_lines(self, chunk_size=512):
+        return iter(self.reply.splitlines())
+
+@pytest.fixture
+def recorded(monkeypatch):
+    pytest.importorskip("gtts")
+    session = RecordedSession(RECORDED_REPLY)
+    monkeypatch.setattr(tts_engine, "_session", lambda: session)
+    return session
+
+def test_gtts_request_and_reply_match_the_recording(recorded):
+    assert tts_engine.synthesize("กา") == base64.b64decode(RECORDED_AUDIO)
+    request, = recorded.sent
+    assert request.method == "POST"
+    assert request.url == "https://translate.google.com/_/TranslateWebserverUi/data/batchexecute"
+    (rpc_id, parameters, _, _), = json.loads(urllib.parse.unquote(request.body).removeprefix("f.req=").rstrip("&"))[0]
+    assert rpc_id == "jQ1olc" and json.loads(parameters)[:2] == ["กา", "th"]
+
+def test_gtts_requests_follow_the_base_url(recorded):
+    tts_engine.synthesize("กา", base_url="http://127.0.0.1:8790/")
+    assert recorded.sent[0].url == "http://127.0.0.1:8790/_/TranslateWebserverUi/data/batchexecute"
+
+def test_gtts_reply_without_audio_is_an_error(recorded):
+    from gtts.tts import gTTSError
+    recorded.reply = b")]}'\n\n24\n[[\"e\",4,null,null,212]]\n"
+    with pytest.raises(gTTSError):
+        tts_engine.synthesize("กา")
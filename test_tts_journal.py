@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the audio job journal, retry helper and circuit breaker
+Cooldowns are a few milliseconds so the state transitions run in real time.
+"""
+
+import time
+
+import pytest
+
+import tts_journal
+from tts_journal import AudioJournal, CircuitBreaker, call_with_retries, is_rate_limited
+
+COOLDOWN = 0.02
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f"{status} error")
+        self.response = type("Response", (), {"status_code": status})()
+
+def test_is_rate_limited():
+    assert is_rate_limited(HTTPError(429))
+    assert not is_rate_limited(HTTPError(500))
+    assert is_rate_limited(Exception("429 (Too Many Requests) from TTS API"))
+    assert not is_rate_limited(ConnectionError("connection reset"))
+
+def test_breaker_opens_after_threshold_consecutive_rate_limits():
+    breaker = CircuitBreaker(threshold=3, cooldown=COOLDOWN)
+    breaker.record_rate_limited()
+    breaker.record_rate_limited()
+    breaker.record_success()  # a success in between resets the count
+    breaker.record_rate_limited()
+    breaker.record_rate_limited()
+    assert breaker.state == "closed"
+    breaker.record_rate_limited()
+    assert breaker.state == "open"
+
+def test_breaker_blocks_while_open_then_goes_half_open():
+    breaker = CircuitBreaker(threshold=1, cooldown=COOLDOWN)
+    breaker.record_rate_limited()
+    started = time.monotonic()
+    breaker.wait()
+    assert time.monotonic() - started >= COOLDOWN * 0.9
+    assert breaker.state == "half-open"
+
+def test_half_open_breaker_reopens_on_one_rate_limit_with_a_longer_pause():
+    breaker = CircuitBreaker(threshold=3, cooldown=COOLDOWN)
+    for _ in range(3):
+        breaker.record_rate_limited()
+    breaker.wait()
+    breaker.record_rate_limited()
+    assert breaker.state == "open"
+    assert breaker.open_until - time.monotonic() > COOLDOWN  # the pause doubled
+
+def test_half_open_breaker_closes_on_success():
+    breaker = CircuitBreaker(threshold=1, cooldown=COOLDOWN)
+    breaker.record_rate_limited()
+    breaker.wait()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.pause == COOLDOWN
+    breaker.threshold = 2
+    breaker.record_rate_limited()
+    assert breaker.state == "closed"  # back to needing `threshold` errors
+
+def test_call_with_retries(monkeypatch):
+    monkeypatch.setattr(tts_journal, "backoff_delay", lambda attempt: 0)
+    breaker = CircuitBreaker(threshold=10, cooldown=COOLDOWN)
+    outcomes = [HTTPError(503), HTTPError(429), b"audio"]
+    retried = []
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert call_with_retries(flaky, 2, breaker, lambda: None, retried.append) == b"audio"
+    assert [type(error) for error in retried] == [HTTPError, HTTPError]
+
+    def failing():
+        raise HTTPError(500)
+
+    with pytest.raises(HTTPError):
+        call_with_retries(failing, 1, breaker, lambda: None)
+
+def test_journal_resume_state(tmp_path):
+    clip = tmp_path / "clip.mp3"
+    clip.write_bytes(b"audio")
+    journal = AudioJournal(str(tmp_path / "journal.json"))
+    journal.mark_pending(str(clip), "key")
+    assert not journal.is_done(str(clip), "key")
+    journal.mark_done(str(clip), "key")
+    journal.flush(force=True)
+
+    reloaded = AudioJournal(str(tmp_path / "journal.json"))
+    assert reloaded.is_done(str(clip), "key")
+    assert not reloaded.is_done(str(clip), "other key")
+    clip.write_bytes(b"aud")  # truncated by an interrupted run
+    assert not reloaded.is_done(str(clip), "key")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the MP3 frame-header validator
+Clips are built from the stub backend's silent MPEG-1 Layer III frames.
+"""
+
+from tts_backends import STUB_FRAME_BYTES, StubBackend
+from validate_audio import parse_header, scan_mp3, validate
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+def clip(text="กา"):
+    return StubBackend().synthesize(text)
+
+def test_parse_header():
+    assert parse_header(0xFFFB10C0) == (STUB_FRAME_BYTES, 1152, 44100, 32)
+    assert parse_header(0x3C68746D) is None   # "<htm"
+    assert parse_header(0xFFFB00C0) is None   # free-format bitrate
+
+def test_valid_clip(tmp_path):
+    data = clip()
+    result = scan_mp3(write(tmp_path, "ok.mp3", data))
+    assert result["error"] is None
+    assert result["frames"] == len(data) // STUB_FRAME_BYTES
+    assert abs(result["duration"] - result["frames"] * 1152 / 44100) < 1e-9
+    assert result["kbps"] == 32
+
+def test_id3_tag_and_zero_padding_are_allowed(tmp_path):
+    tag = b"ID3\x04\x00\x00\x00\x00\x00\x05" + bytes(5)
+    assert scan_mp3(write(tmp_path, "tagged.mp3", tag + clip() + bytes(16)))["error"] is None
+
+def test_truncated_last_frame(tmp_path):
+    result = scan_mp3(write(tmp_path, "cut.mp3", clip()[:-10]))
+    assert result["error"].startswith("truncated: last frame needs")
+
+def test_bad_sync_word(tmp_path):
+    data = clip()
+    broken = data[:STUB_FRAME_BYTES * 3] + b"\x12\x34\x56\x78" + data[STUB_FRAME_BYTES * 3 + 4:]
+    result = scan_mp3(write(tmp_path, "sync.mp3", broken))
+    assert result["error"] == f"lost frame sync at byte {STUB_FRAME_BYTES * 3} after 3 frames"
+
+def test_junk_files(tmp_path):
+    assert scan_mp3(write(tmp_path, "empty.mp3", b""))["error"] == "empty file"
+    assert "HTML" in scan_mp3(write(tmp_path, "page.mp3", b"<html>Server Error</html>"))["error"]
+
+def test_validate_reports_missing_and_short_clips(tmp_path):
+    media = tmp_path / "sounds"
+    media.mkdir()
+    write(media, "long.mp3", clip("กากากากา"))
+    write(media, "short.mp3", clip("")[:STUB_FRAME_BYTES])
+    tsv = write(tmp_path, "deck.tsv", "ก\t[sound:long.mp3]\nข\t[sound:short.mp3]\nค\t[sound:gone.mp3]\n".encode())
+    report = validate([tsv], str(media))
+    assert report["missing"] == ["gone.mp3"]
+    problems = {path.rsplit("/", 1)[-1]: message for path, message in report["problems"]}
+    assert set(problems) == {"gone.mp3", "short.mp3"}
+    assert problems["short.mp3"] == "only 26 ms of audio"
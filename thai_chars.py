@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Table-driven Thai character classifier and character-cluster segmenter
+Every codepoint in the Thai block (U+0E00-U+0E7F) has a precomputed class.
+Strings are classified with one str.translate call and clusters are found
+with a regular expression over the class string; the character sets used
+for vowel-symbol extraction are derived from the same table.
+"""
+
+import re
+
+THAI_BLOCK_START = 0x0E00
+THAI_BLOCK_END = 0x0E7F
+
+# Character classes, one letter each so class strings can be matched with regexes
+CONSONANT = "C"          # ก-ฮ
+RU_LU = "R"              # ฤ ฦ: vowel letters that take a consonant's place
+LEADING_VOWEL = "L"      # เ แ โ ใ ไ: written before the initial consonant
+FOLLOWING_VOWEL = "F"    # ะ า ำ ๅ
+ABOVE_VOWEL = "A"        # ั ิ ี ึ ื ็
+BELOW_VOWEL = "B"        # ุ ู
+TONE_MARK = "T"          # ่ ้ ๊ ๋
+SIGN = "S"               # ์ ํ ๎ ฺ: combining signs
+PUNCTUATION = "P"        # ฯ ๆ ๏ ๚ ๛
+DIGIT = "D"              # ๐-๙
+CURRENCY = "Y"           # ฿
+UNASSIGNED = "U"         # unused codepoints in the block
+OTHER = "x"              # anything outside the Thai block
+
+def _build_classes():
+    classes = [UNASSIGNED] * (THAI_BLOCK_END - THAI_BLOCK_START + 1)
+
+    def assign(codepoints, char_class):
+        for codepoint in codepoints:
+            classes[codepoint - THAI_BLOCK_START] = char_class
+
+    assign(range(0x0E01, 0x0E2F), CONSONANT)
+    assign((0x0E24, 0x0E26), RU_LU)
+    assign(range(0x0E40, 0x0E45), LEADING_VOWEL)
+    assign((0x0E30, 0x0E32, 0x0E33, 0x0E45), FOLLOWING_VOWEL)
+    assign((0x0E31, 0x0E34, 0x0E35, 0x0E36, 0x0E37, 0x0E47), ABOVE_VOWEL)
+    assign((0x0E38, 0x0E39), BELOW_VOWEL)
+    assign(range(0x0E48, 0x0E4C), TONE_MARK)
+    assign((0x0E4C, 0x0E4D, 0x0E4E, 0x0E3A), SIGN)
+    assign((0x0E2F, 0x0E46, 0x0E4F, 0x0E5A, 0x0E5B), PUNCTUATION)
+    assign(range(0x0E50, 0x0E5A), DIGIT)
+    assign((0x0E3F,), CURRENCY)
+    return "".join(classes)
+
+# Precomputed class of every codepoint in the block, indexed by codepoint - U+0E00
+CHAR_CLASSES = _build_classes()
+
+class _ClassTable(dict):
+    """str.translate table: Thai codepoints map to their class, everything else to OTHER"""
+
+    def __missing__(self, codepoint):
+        return OTHER
+
+# ASCII is filled in too so dashes, spaces and markup never reach __missing__
+_CLASS_TABLE = _ClassTable(dict.fromkeys(range(128), OTHER))
+_CLASS_TABLE.update((THAI_BLOCK_START + offset, char_class) for offset, char_class in enumerate(CHAR_CLASSES))
+
+# A cluster is: leading vowels, a base letter, combining marks, following vowels.
+# Any other character is a cluster of its own.
+_CLUSTER = re.compile(r"L*[CR][ABTS]*F*|.", re.DOTALL)
+_BASE = re.compile(r"[CR]")
+
+def _chars(*char_classes):
+    return "".join(chr(THAI_BLOCK_START + offset)
+                   for offset, char_class in enumerate(CHAR_CLASSES) if char_class in char_classes)
+
+_CONSONANT_CHARS = frozenset(_chars(CONSONANT))
+# Vowel symbols are every Thai character that is not a consonant (or ฤ/ฦ)
+_VOWEL_SYMBOL = re.compile("[%s]" % re.escape(_chars(
+    LEADING_VOWEL, FOLLOWING_VOWEL, ABOVE_VOWEL, BELOW_VOWEL, TONE_MARK, SIGN,
+    PUNCTUATION, DIGIT, CURRENCY, UNASSIGNED)))
+_BASE_SPAN = re.compile(r"<span[^>]*>[ก-ฮ]</span>")
+
+def char_class(ch):
+    """Return the class letter of a single character"""
+    codepoint = ord(ch)
+    if THAI_BLOCK_START <= codepoint <= THAI_BLOCK_END:
+        return CHAR_CLASSES[codepoint - THAI_BLOCK_START]
+    return OTHER
+
+def classify(text):
+    """Return a string with the class letter of each character of `text`"""
+    return text.translate(_CLASS_TABLE)
+
+def classify_column(texts):
+    """Classify a whole column of strings"""
+    return [text.translate(_CLASS_TABLE) for text in texts]
+
+def clusters(text):
+    """Split `text` into Thai character clusters, e.g. "ที่นี่" -> ["ที่", "นี่"]"""
+    return [text[match.start():match.end()] for match in _CLUSTER.finditer(classify(text))]
+
+def initial_index(text):
+    """Return the index of the initial consonant (the first base letter), or -1"""
+    match = _BASE.search(classify(text))
+    return match.start() if match else -1
+
+def vowel_symbol(cell):
+    """Return the first vowel symbol of a chart cell such as "กั-", "เกาะ" or "มา"
+
+    A span around the base consonant, the initial consonant itself and
+    placeholder dashes are removed first; cells without a vowel symbol return
+    their first remaining character.
+    """
+    if "<" in cell:
+        cell = _BASE_SPAN.sub("", cell)
+    if cell[:1] in _CONSONANT_CHARS:
+        cell = cell[1:]
+    cell = cell.lstrip("-").strip()
+    match = _VOWEL_SYMBOL.search(cell)
+    if match:
+        return match.group()
+    return cell[:1]
+
+def vowel_symbols(cells):
+    """Return the vowel symbol of every cell in a column"""
+    return list(map(vowel_symbol, cells))
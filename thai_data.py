@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Shared Thai consonant and vowel data for every deck generator
+The source tables are loaded once into typed records: duplicate or malformed
+entries raise DataError at import time instead of being silently dropped, and
+each table is indexed by the fields the decks filter on, so a subset such as
+"High-class consonants with final -t" is a few dictionary lookups.
+"""
+
+from typing import NamedTuple
+
+from thai_chars import CONSONANT, char_class
+
+CONSONANT_CLASSES = ("Low", "Mid", "High")
+
+# Syllable columns of a vowel row: short closed, short open, long closed, long open
+VOWEL_CELLS = (0, 1, 3, 4)
+
+class DataError(ValueError):
+    """The source data has a duplicate key or a malformed entry"""
+
+class Consonant(NamedTuple):
+    letter: str
+    name: str
+    pronunciation: str      # Paiboon romanization with tone markers
+    consonant_class: str
+    initial: str
+    final: str
+    meaning: str
+    notes: str
+
+class VowelRow(NamedTuple):
+    short_closed: str
+    short_open: str
+    sound: str
+    long_closed: str
+    long_open: str
+    variants: tuple = ()    # further spellings printed in the sheet's cell, not drilled
+
+    @property
+    def cells(self):
+        """The five table columns as rendered on the card back"""
+        return self[:5]
+
+class VowelForm(NamedTuple):
+    """One syllable cell of a vowel row, i.e. one vowel card front"""
+    syllable: str
+    row: int                # index into vowel_rows
+    cell: int               # one of VOWEL_CELLS
+    sound: str
+    long: bool
+    closed: bool
+    transcription: str
+
+class Table:
+    """Records in source order, indexed by a unique key and by other fields"""
+
+    __slots__ = ("records", "key", "by_key", "indexes")
+
+    def __init__(self, records, fields, key=None):
+        self.records = tuple(records)
+        self.key = key
+        self.by_key = {}
+        if key:
+            for record in self.records:
+                value = getattr(record, key)
+                if value in self.by_key:
+                    raise DataError(f"duplicate {key} {value!r}: {self.by_key[value]} and {record}")
+                self.by_key[value] = record
+        self.indexes = {field: {} for field in fields}
+        for record in self.records:
+            for field, index in self.indexes.items():
+                index.setdefault(getattr(record, field), []).append(record)
+        for index in self.indexes.values():
+            for value, matches in index.items():
+                index[value] = tuple(matches)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, key):
+        return self.by_key[key]
+
+    def values(self, field):
+        """Distinct values of an indexed field, in order of first appearance"""
+        return list(self.indexes[field])
+
+    def where(self, **criteria):
+        """Return the records matching every field=value criterion, in source order"""
+        if not criteria:
+            return self.records
+        candidates = sorted((self.indexes[field].get(value, ()) for field, value in criteria.items()), key=len)
+        matches = candidates[0]
+        for other in candidates[1:]:
+            other = set(other)
+            matches = tuple(record for record in matches if record in other)
+        return matches
+
+def _load_consonants(entries):
+    consonants = []
+    for entry in entries:
+        try:
+            consonant = Consonant(*entry)
+        except TypeError:
+            raise DataError(f"consonant entry needs {len(Consonant._fields)} fields: {entry}")
+        if len(consonant.letter) != 1 or char_class(consonant.letter) != CONSONANT:
+            raise DataError(f"{consonant.letter!r} is not a Thai consonant")
+        if consonant.consonant_class not in CONSONANT_CLASSES:
+            raise DataError(f"{consonant.letter}: unknown class {consonant.consonant_class!r}")
+        if not consonant.initial.endswith("-") or not consonant.final.startswith("-"):
+            raise DataError(f"{consonant.letter}: sounds must be written 'x-' (initial) and '-x' (final)")
+        consonants.append(consonant)
+    return consonants
+
+def _load_transcriptions(rows, entries):
+    """Return {(row, cell): transcription} from one tuple of VOWEL_CELLS transcriptions per row"""
+    if len(entries) != len(rows):
+        raise DataError(f"{len(entries)} transcription rows for {len(rows)} vowel rows")
+    transcriptions = {}
+    for index, (row, entry) in enumerate(zip(rows, entries)):
+        if len(entry) != len(VOWEL_CELLS):
+            raise DataError(f"vowel row {index + 1} needs {len(VOWEL_CELLS)} transcriptions: {entry}")
+        for cell, transcription in zip(VOWEL_CELLS, entry):
+            if transcription and not row[cell]:
+                raise DataError(f"vowel row {index + 1} has a transcription {transcription!r} for an empty cell")
+            if transcription:
+                transcriptions[(index, cell)] = transcription
+    return transcriptions
+
+def _vowel_forms(rows, transcriptions):
+    for index, row in enumerate(rows):
+        if not isinstance(row, VowelRow) or not row.sound:
+            raise DataError(f"vowel row {index + 1} must be a VowelRow with a sound: {row}")
+        for cell in VOWEL_CELLS:
+            syllable = row[cell]
+            if syllable and syllable != "-":
+                yield VowelForm(syllable, index, cell, row.sound, cell >= 3, cell in (0, 3),
+                                transcriptions.get((index, cell), ""))
+
+# Format: (consonant, name, paiboon_pronunciation_with_tone, class, initial_sound, final_sound, meaning, notes)
+THAI_CONSONANTS = tuple(_load_consonants([
+    ("ค", "คอ ควาย", "khaawᴹ khwaaiᴹ", "Low", "kh-", "-k", "buffalo", "Low-class consonant."),
+    ("ฅ", "ฅอ คน", "khaawᴹ khohnᴹ", "Low", "kh-", "-k", "person", "Rare/obsolete. Low-class consonant."),
+    ("ฆ", "ฆอ ระฆัง", "khaawᴹ raᴴ kangᴹ", "Low", "kh-", "-k", "bell", "Low-class consonant."),
+    ("ง", "งอ งู", "ngaawᴹ nguuᴹ", "Low", "ng-", "-ng", "snake", "Low-class consonant."),
+    ("ช", "ชอ ช้าง", "chaawᴹ changᴴ", "Low", "ch-", "-t", "elephant", "Low-class consonant."),
+    ("ซ", "ซอ โซ่", "saawᴹ sohᶠ", "Low", "s-", "-t", "chain", "Low-class consonant."),
+    ("ฌ", "ฌอ เฌอ", "chaawᴹ chuuhrᴹ", "Low", "ch-", "-t", "tree", "Low-class consonant."),
+    ("ญ", "ญอ หญิง", "yaawᴹ yingᴿ", "Low", "y-", "-n", "woman", "Low-class consonant."),
+    ("ฑ", "ฑอ มณโฑ", "thaawᴹ mohnᴹ thohᴹ", "Low", "th-", "-t", "Mandodari", "Low-class consonant."),
+    ("ฒ", "ฒอ ผู้เฒ่า", "thaawᴹ phuuᶠ thaoᶠ", "Low", "th-", "-t", "elder", "Low-class consonant."),
+    ("ณ", "ณอ เณร", "naawᴹ naehnᴹ", "Low", "n-", "-n", "novice monk", "Low-class consonant."),
+    ("ท", "ทอ ทหาร", "thaawᴹ tha-haanᴿ", "Low", "th-", "-t", "soldier", "Low-class consonant."),
+    ("ธ", "ธอ ธง", "thaawᴹ thongᴹ", "Low", "th-", "-t", "flag", "Low-class consonant."),
+    ("น", "นอ หนู", "naawᴹ nuuᴿ", "Low", "n-", "-n", "mouse", "Low-class consonant."),
+    ("พ", "พอ พาน", "phaawᴹ phaanᴹ", "Low", "ph-", "-p", "tray", "Low-class consonant."),
+    ("ฟ", "ฟอ ฟัน", "faawᴹ fanᴹ", "Low", "f-", "-p", "teeth", "Low-class consonant."),
+    ("ภ", "ภอ สำเภา", "phaawᴹ samᴿ paoᴹ", "Low", "ph-", "-p", "junk", "Low-class consonant."),
+    ("ม", "มอ ม้า", "maawᴹ maaᴴ", "Low", "m-", "-m", "horse", "Low-class consonant."),
+    ("ย", "ยอ ยักษ์", "yaawᴹ yakᴴ", "Low", "y-", "-n", "giant", "Low-class consonant."),
+    ("ร", "รอ เรือ", "raawᴹ reuuaᴹ", "Low", "r-", "-n", "boat", "Low-class consonant."),
+    ("ล", "ลอ ลิง", "laawᴹ lingᴹ", "Low", "l-", "-n", "monkey", "Low-class consonant."),
+    ("ว", "วอ แหวน", "waawᴹ waaenᴿ", "Low", "w-", "-n", "ring", "Low-class consonant."),
+    ("ฬ", "ฬอ จุฬา", "laawᴹ jooᴸ laaᴹ", "Low", "l-", "-n", "kite", "Low-class consonant."),
+    ("ฮ", "ฮอ นกฮูก", "haawᴹ nohkᴴ huukᶠ", "Low", "h-", "-k", "owl", "Low-class consonant."),
+    ("ก", "กอ ไก่", "gaawᴹ gaiᴸ", "Mid", "g-", "-k", "chicken", "Mid-class consonant."),
+    ("จ", "จอ จาน", "jaawᴹ jaanᴹ", "Mid", "j-", "-n", "plate", "Mid-class consonant."),
+    ("ฎ", "ฎอ ชฎา", "daawᴹ cha-daaᴹ", "Mid", "d-", "-n", "headdress", "Mid-class consonant."),
+    ("ฏ", "ฏอ ปฏัก", "dtaawᴹ bpaᴸ dtakᴸ", "Mid", "dt-", "-k", "goad", "Mid-class consonant."),
+    ("ด", "ดอ เด็ก", "daawᴹ dekᴸ", "Mid", "d-", "-k", "child", "Mid-class consonant."),
+    ("ต", "ตอ เต่า", "dtaawᴹ dtaoᴸ", "Mid", "dt-", "-k", "turtle", "Mid-class consonant."),
+    ("บ", "บอ ใบไม้", "baawᴹ baiᴹ maiᴴ", "Mid", "b-", "-p", "leaf", "Mid-class consonant."),
+    ("ป", "ปอ ปลา", "bpaawᴹ bplaaᴹ", "Mid", "bp-", "-p", "fish", "Mid-class consonant."),
+    ("อ", "ออ อ่าง", "aawᴹ aangᴹ", "Mid", "ʔ-", "-", "basin", "Mid-class consonant."),
+    ("ข", "ขอ ไข่", "khaawᴿ khaiᴸ", "High", "kh-", "-k", "egg", "High-class consonant."),
+    ("ฃ", "ฃอ ขวด", "khaawᴿ khuaatᴸ", "High", "kh-", "-k", "bottle", "Rare/obsolete. High-class consonant."),
+    ("ฉ", "ฉอ ฉิ่ง", "chaawᴿ chingᴸ", "High", "ch-", "-", "cymbals", "High-class consonant."),
+    ("ฐ", "ฐอ ฐาน", "thaawᴿ thaanᴿ", "High", "th-", "-t", "base", "High-class consonant."),
+    ("ถ", "ถอ ถุง", "thaawᴿ thoongᴿ", "High", "th-", "-t", "bag", "High-class consonant."),
+    ("ผ", "ผอ ผึ้ง", "phaawᴿ pheungᶠ", "High", "ph-", "-", "bee", "High-class consonant."),
+    ("ฝ", "ฝอ ฝา", "faawᴿ faaᴿ", "High", "f-", "-", "lid", "High-class consonant."),
+    ("ศ", "ศอ ศาลา", "saawᴿ saaᴿ laaᴹ", "High", "s-", "-t", "pavilion", "High-class consonant."),
+    ("ษ", "ษอ ฤาษี", "saawᴿ reuuᴹ seeᴿ", "High", "s-", "-t", "hermit", "High-class consonant."),
+    ("ส", "สอ เสือ", "saawᴿ seuuaᴿ", "High", "s-", "-t", "tiger", "High-class consonant."),
+    ("ห", "หอ หีบ", "haawᴿ heepᴸ", "High", "h-", "-", "box", "High-class consonant.")
+]))
+
+# Vowel data as per the PNG
+vowel_rows = (
+    VowelRow("กั-", "กะ", "aa/ah", "กา-", "กา"),
+    VowelRow("แก็-", "แกะ", "ae", "แก-", "แก"),
+    VowelRow("ก็อ-", "เกาะ", "aaw", "กอ-", "กอ"),
+    VowelRow("เก็-", "เกะ", "eh/ey", "เก-", "เก"),
+    VowelRow("เกิ-", "เกอะ", "erh/uuhr", "เกิ-", "เกิ-", variants=("เก",)),
+    VowelRow("", "โกะ", "oh", "โก-", "โก"),
+    VowelRow("กิ-", "กิ", "ee", "กี-", "กี"),
+    VowelRow("กึ-", "กึ", "eu", "กื", "กึอ"),
+    VowelRow("กุ-", "กุ", "oo", "กู-", "กู"),
+    VowelRow("", "เกียะ", "ia", "เกีย-", "เกีย"),
+    VowelRow("", "เกือะ", "eua", "เกือ-", "เกือ"),
+    VowelRow("", "กัวะ", "ua", "กว-", "กัว"),
+    VowelRow("ไก", "", "ai", "ไก-", ""),
+    VowelRow("ใก", "", "ai", "กาย", ""),
+    VowelRow("กัย", "", "ai", "", ""),
+    VowelRow("ไกย", "", "ai", "", ""),
+    VowelRow("ก็อย", "", "aawy", "กอย", ""),
+    VowelRow("", "", "eeuy", "เกย", ""),
+    VowelRow("", "", "oy/ohy", "โกย", ""),
+    VowelRow("กุ", "", "uy/ui", "", ""),
+    VowelRow("", "", "euuay", "เกือย", ""),
+    VowelRow("กวย", "", "uay", "กวาย", ""),
+    VowelRow("เกา", "", "ao", "กาว", ""),
+    VowelRow("แก็ว", "", "aeo", "แกว", ""),
+    VowelRow("", "", "uaaw", "เกอว", ""),
+    VowelRow("เก็ว", "", "ayo", "เกว", ""),
+    VowelRow("กิว", "", "iu", "", ""),
+    VowelRow("", "", "iaao", "เกียว", ""),
+    VowelRow("กํา", "", "ahm", "กํา", ""),
+    VowelRow("ฤ-", "ฤ", "rue", "", ""),
+    VowelRow("ฤ-", "", "ri/reer", "ฤ-", ""),
+)
+
+# Vowel transcriptions with tone markers (using same system as consonants), one tuple per row of
+# vowel_rows giving the short closed, short open, long closed and long open syllables' transcriptions.
+# The same spelling can sit in several rows (กุ is oo and uy/ui), so they are keyed by (row, cell).
+# Tone mapping: ᴹ=Mid, ᴿ=Rising, ᴸ=Low, ᴴ=High, ᶠ=Falling
+vowel_transcriptions = _load_transcriptions(vowel_rows, (
+    ("gàᶠ", "gàᶠ", "gaaᴹ", "gaaᴹ"),           # กั- กะ กา- กา
+    ("gàeᶠ", "gàeᶠ", "gaaeᴹ", "gaaeᴹ"),       # แก็- แกะ แก- แก
+    ("gàwᶠ", "gàwᶠ", "gaawᴹ", "gaawᴹ"),       # ก็อ- เกาะ กอ- กอ
+    ("gèᶠ", "gèᶠ", "geeᴹ", "geeᴹ"),           # เก็- เกะ เก- เก
+    ("gə̀ᶠ", "gə̀ᶠ", "gəəᴹ", "gəəᴹ"),           # เกิ- เกอะ เกิ- เกิ-
+    ("", "gòᶠ", "gōᴹ", "gōᴹ"),                # · โกะ โก- โก
+    ("gìᶠ", "gìᶠ", "", ""),                   # กิ- กิ กี- กี
+    ("gʉ̀ᶠ", "gʉ̀ᶠ", "gʉ̄ᴹ", "gʉ̄ᴹ"),           # กึ- กึ กื กึอ
+    ("gùᶠ", "gùᶠ", "gūᴹ", "gūᴹ"),             # กุ- กุ กู- กู
+    ("", "gìaᶠ", "gīaᴹ", "gīaᴹ"),             # · เกียะ เกีย- เกีย
+    ("", "gʉ̀aᶠ", "gʉ̄aᴹ", "gʉ̄aᴹ"),           # · เกือะ เกือ- เกือ
+    ("", "gùaᶠ", "gūaᴹ", "gūaᴹ"),             # · กัวะ กว- กัว
+    ("gaiᴹ", "", "gaiᴹ", ""),                 # ไก · ไก- ·
+    ("gaiᴹ", "", "gaaiᴹ", ""),                # ใก · กาย ·
+    ("gaiᴹ", "", "", ""),                     # กัย · · ·
+    ("gaiᴹ", "", "", ""),                     # ไกย · · ·
+    ("gàwyᶠ", "", "gàwyᶠ", ""),               # ก็อย · กอย ·
+    ("", "", "gə̀yᶠ", ""),                     # · · เกย ·
+    ("", "", "gòyᶠ", ""),                     # · · โกย ·
+    ("gùyᶠ", "", "", ""),                     # กุ · · ·
+    ("", "", "gʉ̀ayᶠ", ""),                    # · · เกือย ·
+    ("guayᴹ", "", "guayᴹ", ""),               # กวย · กวาย ·
+    ("gaoᴹ", "", "gaoᴹ", ""),                 # เกา · กาว ·
+    ("gàewᶠ", "", "gàewᶠ", ""),               # แก็ว · แกว ·
+    ("", "", "gə̀awᶠ", ""),                    # · · เกอว ·
+    ("gèwᶠ", "", "gèwᶠ", ""),                 # เก็ว · เกว ·
+    ("giwᴹ", "", "", ""),                     # กิว · · ·
+    ("", "", "gìawᶠ", ""),                    # · · เกียว ·
+    ("gamᴹ", "", "gamᴹ", ""),                 # กํา · กํา ·
+    ("rʉ́ᴿ", "rʉ́ᴿ", "", ""),                   # ฤ- ฤ · ·
+    ("ríᴿ", "", "ríᴿ", ""),                   # ฤ- · ฤ- ·
+))
+
+def consonant_table(consonants):
+    """Index Consonant records by letter (unique), class, initial and final sound"""
+    return Table(consonants, ("consonant_class", "initial", "final"), key="letter")
+
+def vowel_form_table(rows, transcriptions):
+    """Index the drilled cells of vowel rows by syllable, sound, length and closed/open"""
+    return Table(_vowel_forms(rows, transcriptions), ("syllable", "sound", "long", "closed"))
+
+CONSONANTS = consonant_table(THAI_CONSONANTS)
+VOWEL_FORMS = vowel_form_table(vowel_rows, vowel_transcriptions)
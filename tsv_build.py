@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Incremental TSV deck builder shared by the generator scripts
+Stores a hash per row and one digest of the whole deck's data and templates.
+When the digest matches and the TSV is untouched, a build returns without
+rendering anything; otherwise only rows whose source data or templates
+changed are re-rendered, the others are copied from the previous TSV, and the
+file is rewritten only when its content would differ
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import time
+
+import profiling
+
+STATE_FORMAT = 2
+
+def template_fingerprint(*templates, version=1):
+    """Fingerprint template strings together with a generator's TEMPLATE_VERSION
+
+    Rendering code is not inspected: a generator bumps its TEMPLATE_VERSION by
+    hand whenever a change to its code (or a helper it calls) changes the
+    output, which re-renders every row.
+    """
+    digest = hashlib.sha1(str(version).encode('utf-8'))
+    for template in templates:
+        digest.update(repr(template).encode('utf-8'))
+    return digest.hexdigest()
+
+def row_keys(fronts):
+    """Yield a stable key per card front, numbering repeated fronts (กุ, กุ#2, ...)"""
+    seen = {}
+    for front in fronts:
+        seen[front] = seen.get(front, 0) + 1
+        yield front if seen[front] == 1 else f"{front}#{seen[front]}"
+
+def row_fingerprint(source):
+    """Fingerprint one row's source data"""
+    return hashlib.blake2b(repr(source).encode('utf-8'), digest_size=8).hexdigest()
+
+def _state_path(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.build.json")
+
+def _file_stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _read_state(state_path, rows=False):
+    """Return the state file's header, plus its {key: [hash, length]} rows if `rows`
+
+    The header is the first line, so a no-op build never parses the rows.
+    Returns None for a missing, unreadable or older state file.
+    """
+    try:
+        with open(state_path, encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get("format") != STATE_FORMAT:
+                return None
+            if rows:
+                header["rows"] = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    return header
+
+def build_tsv(path, rows, render, template, rebuild=False, **writer_options):
+    """Write `path` from (key, source) rows, rendering each source with `render`
+
+    `render(source)` returns the list of fields for one TSV row. Rows whose
+    source data and `template` are unchanged are copied from the previous TSV
+    instead of being rendered; `rebuild` re-renders every row. Returns a dict
+    with the added/changed/removed/unchanged counts.
+    """
+    state_path = _state_path(path)
+    rows = list(rows)  # read once for the digest and again if anything changed
+    started = time.perf_counter()
+    digest = hashlib.blake2b(repr((template, sorted(writer_options.items()))).encode('utf-8'), digest_size=16)
+    for row in rows:
+        digest.update(repr(row).encode('utf-8'))
+    digest = digest.hexdigest()
+    profiling.record("tsv.digest", "stage", started, time.perf_counter() - started, file=path, rows=len(rows))
+
+    with profiling.span("tsv.load_state", "io", file=state_path):
+        state = _read_state(state_path)
+        on_disk = _file_stat(path)
+        trusted = state is not None and on_disk is not None and on_disk == state["tsv"]
+        if not rebuild and trusted and state["digest"] == digest:
+            return {"added": 0, "changed": 0, "removed": 0, "unchanged": len(rows), "written": False,
+                    "rows": len(rows)}
+        if state is not None:
+            state = _read_state(state_path, rows=True)
+
+    # key -> (hash, offset, length) of the row in the previous TSV
+    previous = {}
+    old = b""
+    if state is not None:
+        offset = 0
+        for key, (row_hash, length) in state["rows"].items():
+            previous[key] = (row_hash, offset, length)
+            offset += length
+        if trusted:
+            with open(path, 'rb') as f:
+                old = f.read()
+    reusable = trusted and not rebuild and state["template"] == template
+
+    summary = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0, "written": False}
+    current = {}
+    chunks = []
+    buffer = io.StringIO(newline='')
+    writer = csv.writer(buffer, **writer_options)
+    rendered = 0
+    started = time.perf_counter()
+    for key, source in rows:
+        row_hash = row_fingerprint(source)
+        entry = previous.get(key)
+        old_line = old[entry[1]:entry[1] + entry[2]] if entry and trusted else None
+        if reusable and entry and entry[0] == row_hash:
+            line = old_line
+        else:
+            writer.writerow(render(source))
+            line = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            rendered += 1
+        if entry is None:
+            summary["added"] += 1
+        elif line != old_line:
+            summary["changed"] += 1
+        else:
+            summary["unchanged"] += 1
+        current[key] = [row_hash, len(line)]
+        chunks.append(line)
+    profiling.record("tsv.render", "stage", started, time.perf_counter() - started,
+                     file=path, rows=len(current), rendered=rendered)
+    summary["removed"] = len(set(previous) - set(current))
+    summary["rows"] = len(current)
+
+    with profiling.span("tsv.write", "io", file=path) as details:
+        data = b"".join(chunks)
+        if trusted:
+            summary["written"] = data != old
+            if summary["written"]:
+                _atomic_write(path, data)
+        else:
+            summary["written"] = _write_if_changed(path, data)
+        details["bytes"] = len(data) if summary["written"] else 0
+
+    with profiling.span("tsv.save_state", "io", file=state_path):
+        header = {"format": STATE_FORMAT, "template": template, "digest": digest, "tsv": _file_stat(path)}
+        state = (json.dumps(header) + "\n" + json.dumps(current, ensure_ascii=False, separators=(",", ":"))
+                 + "\n").encode('utf-8')
+        _write_if_changed(state_path, state)
+    return summary
+
+def _write_if_changed(path, data):
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    _atomic_write(path, data)
+    return True
+
+def _atomic_write(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def print_summary(path, summary):
+    """Print the added/changed/removed counts for one build"""
+    status = "written" if summary["written"] else "unchanged, not rewritten"
+    print(f"{path}: {summary['rows']} cards, {summary['added']} added, {summary['changed']} changed, "
+          f"{summary['removed']} removed ({status})")
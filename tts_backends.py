@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Text-to-speech backends for the audio pipeline
+- gtts:   Google Translate TTS over the network (rate limited)
+- espeak: local espeak-ng in a pool of worker processes, encoded to MP3 with ffmpeg; runs offline on every core
+- stub:   deterministic silent MP3s derived from the text, for tests and benchmarks
+Each backend names its engine, so cached clips from different backends never mix.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+
+DEFAULT_BACKEND = "gtts"
+
+class BackendUnavailable(Exception):
+    """The backend's engine or encoder is not installed"""
+
+class GTTSBackend:
+    name = "gtts"
+    rate_limited = True
+
+    def __init__(self, lang='th', slow=False, base_url=None):
+        self.lang = lang
+        self.slow = slow
+        self.base_url = base_url
+
+    @property
+    def engine(self):
+        from tts_cache import engine_version
+        # Clips from a stand-in server must never be mistaken for Google's
+        return f"{engine_version()}|{self.base_url}" if self.base_url else engine_version()
+
+    def check(self):
+        try:
+            import gtts
+        except ImportError:
+            raise BackendUnavailable("gTTS is not installed (pip install -r requirements.txt)")
+
+    def default_workers(self):
+        from tts_engine import DEFAULT_JOBS
+        return DEFAULT_JOBS
+
+    def synthesize(self, text):
+        from tts_engine import synthesize
+        return synthesize(text, lang=self.lang, slow=self.slow, base_url=self.base_url)
+
+    def close(self):
+        pass
+
+# libespeak-ng constants (speak_lib.h)
+ESPEAK_AUDIO_OUTPUT_SYNCHRONOUS = 2
+ESPEAK_RATE = 1
+ESPEAK_POS_CHARACTER = 1
+ESPEAK_CHARS_UTF8 = 1
+ESPEAK_EE_OK = 0
+
+# Per worker process: (library, callback, PCM chunks, sample rate), set by _start_espeak
+_espeak = None
+
+def _start_espeak(library, voice, speed):
+    """Pool initializer: load libespeak-ng and its voice data once per worker process"""
+    global _espeak
+    import ctypes
+    lib = ctypes.CDLL(library)
+    lib.espeak_Synth.argtypes = [ctypes.c_char_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int, ctypes.c_uint,
+                                 ctypes.c_uint, ctypes.c_void_p, ctypes.c_void_p]
+    sample_rate = lib.espeak_Initialize(ESPEAK_AUDIO_OUTPUT_SYNCHRONOUS, 0, None, 0)
+    if sample_rate <= 0:
+        raise BackendUnavailable(f"libespeak-ng failed to initialize ({library})")
+    chunks = []
+
+    @ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p)
+    def collect(wav, samples, events):
+        if wav and samples > 0:
+            chunks.append(ctypes.string_at(wav, samples * 2))
+        return 0  # keep synthesizing
+
+    lib.espeak_SetSynthCallback(collect)
+    if lib.espeak_SetVoiceByName(voice.encode('utf-8')) != ESPEAK_EE_OK:
+        raise BackendUnavailable(f"espeak-ng has no '{voice}' voice")
+    lib.espeak_SetParameter(ESPEAK_RATE, speed, 0)
+    _espeak = (lib, collect, chunks, sample_rate)
+
+def _espeak_clip(text, ffmpeg, bitrate):
+    """Run in a pool worker: synthesize `text` to 16-bit PCM and encode it to MP3"""
+    lib, collect, chunks, sample_rate = _espeak
+    chunks.clear()
+    data = text.encode('utf-8') + b"\0"
+    error = lib.espeak_Synth(data, len(data), 0, ESPEAK_POS_CHARACTER, 0, ESPEAK_CHARS_UTF8, None, None)
+    if error != ESPEAK_EE_OK:
+        raise RuntimeError(f"espeak-ng error {error} synthesizing {text!r}")
+    return subprocess.run([ffmpeg, "-v", "error", "-f", "s16le", "-ar", str(sample_rate), "-ac", "1",
+                           "-i", "pipe:0", "-b:a", bitrate, "-f", "mp3", "pipe:1"],
+                          input=b"".join(chunks), capture_output=True, check=True).stdout
+
+class EspeakBackend:
+    """espeak-ng speech encoded to MP3 by ffmpeg
+
+    With libespeak-ng available, clips are synthesized by a persistent pool of
+    worker processes that each load the engine and voice once; otherwise each
+    clip runs one short-lived espeak-ng/ffmpeg process pair.
+    """
+
+    name = "espeak"
+    rate_limited = False
+
+    def __init__(self, voice='th', speed=140, bitrate="32k"):
+        import ctypes.util
+        self.voice = voice
+        self.speed = speed
+        self.bitrate = bitrate
+        self.library = ctypes.util.find_library("espeak-ng")
+        self.espeak = shutil.which("espeak-ng")
+        self.ffmpeg = shutil.which("ffmpeg")
+        self._engine = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            if self.library:
+                import ctypes
+                info = ctypes.CDLL(self.library).espeak_Info
+                info.restype = ctypes.c_char_p
+                version = info(None).decode('utf-8', 'replace')
+            else:
+                output = subprocess.run([self.espeak, "--version"], capture_output=True, text=True).stdout.split()
+                version = output[3] if len(output) > 3 else "unknown"
+            self._engine = f"espeak-ng-{version}|{self.voice}|{self.speed}|{self.bitrate}"
+        return self._engine
+
+    def check(self):
+        if not (self.library or self.espeak):
+            raise BackendUnavailable("espeak-ng is not installed (e.g. apt install espeak-ng)")
+        if not self.ffmpeg:
+            raise BackendUnavailable("the espeak backend needs ffmpeg to encode MP3 (e.g. apt install ffmpeg)")
+
+    def default_workers(self):
+        return os.cpu_count() or 2
+
+    def _workers(self):
+        with self._pool_lock:
+            if self._pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self._pool = ProcessPoolExecutor(max_workers=self.default_workers(), initializer=_start_espeak,
+                                                 initargs=(self.library, self.voice, self.speed))
+            return self._pool
+
+    def synthesize(self, text):
+        if self.library:
+            return self._workers().submit(_espeak_clip, text, self.ffmpeg, self.bitrate).result()
+        wav = subprocess.run([self.espeak, "-v", self.voice, "-s", str(self.speed), "--stdout", "--", text],
+                             capture_output=True, check=True).stdout
+        return subprocess.run([self.ffmpeg, "-v", "error", "-f", "wav", "-i", "pipe:0", "-ac", "1",
+                               "-b:a", self.bitrate, "-f", "mp3", "pipe:1"],
+                              input=wav, capture_output=True, check=True).stdout
+
+    def close(self):
+        """Stop the worker pool; the next clip starts a new one"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+# MPEG-1 Layer III, 32 kbps, 44.1 kHz, mono: 104-byte frames of 1152 samples (about 26 ms)
+STUB_FRAME_HEADER = b"\xff\xfb\x10\xc0"
+STUB_FRAME_BYTES = 104
+
+class StubBackend:
+    """Silent MP3 frames (about 26 ms each, eight plus four per character), tagged with a hash of the text"""
+
+    name = "stub"
+    rate_limited = False
+    engine = "stub-1"
+
+    def check(self):
+        pass
+
+    def default_workers(self):
+        return os.cpu_count() or 2
+
+    def synthesize(self, text):
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        frames = 8 + 4 * len(text)
+        body = bytes(STUB_FRAME_BYTES - len(STUB_FRAME_HEADER) - len(digest))
+        # The hash sits in each frame's ancillary data, where decoders ignore it
+        frame = STUB_FRAME_HEADER + body + digest
+        return frame * frames
+
+    def close(self):
+        pass
+
+BACKENDS = {"gtts": GTTSBackend, "espeak": EspeakBackend, "stub": StubBackend}
+
+def get_backend(name=DEFAULT_BACKEND, url=None, **options):
+    """Return a backend instance by name; `url` points gtts at another server (e.g. fake_tts_server.py)"""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown TTS backend '{name}' (choose from {', '.join(BACKENDS)})")
+    if url:
+        if backend_class is not GTTSBackend:
+            raise ValueError(f"--tts-url only applies to the gtts backend, not {name}")
+        options["base_url"] = url
+    return backend_class(**options)
+
+def add_backend_arguments(parser):
+    """Add the shared --tts option to an argparse parser"""
+    parser.add_argument('--tts', choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                        help=f"speech engine: gtts (online, rate limited), espeak (offline espeak-ng + ffmpeg) "
+                             f"or stub (silent test clips) (default: {DEFAULT_BACKEND})")
+    parser.add_argument('--tts-url', metavar='URL',
+                        help="send gtts requests to this server instead of Google, "
+                             "e.g. a local fake_tts_server.py for offline load tests")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Batched TTS for the synthesis engine
+Packs several short utterances into one synthesis request, separated by
+pauses, and splits the returned audio locally at the silences between them
+Splitting needs pydub (and ffmpeg); without it every utterance is sent on its own
+"""
+
+import io
+
+BATCH_SEPARATOR = ". "
+MAX_BATCH_CHARS = 100  # gTTS sends longer text as several requests
+MIN_SILENCE_MS = 300
+SILENCE_BELOW_AVERAGE_DB = 16
+KEEP_SILENCE_MS = 50
+
+def batching_available():
+    """Check if pydub is available for splitting batched audio"""
+    try:
+        import pydub
+        return True
+    except ImportError:
+        return False
+
+def make_batches(items, batch_size, text=lambda item: item, max_chars=MAX_BATCH_CHARS):
+    """Group items into batches of at most `batch_size` whose joined text fits in one request"""
+    batches = []
+    current = []
+    length = 0
+    for item in items:
+        added = len(text(item)) + (len(BATCH_SEPARATOR) if current else 0)
+        if current and (len(current) >= batch_size or length + added > max_chars):
+            batches.append(current)
+            current = []
+            added = len(text(item))
+            length = 0
+        current.append(item)
+        length += added
+    if current:
+        batches.append(current)
+    return batches
+
+def split_on_silence(audio, count):
+    """Split MP3 bytes at silences into `count` clips; return None if the count does not match"""
+    from pydub import AudioSegment
+    from pydub.silence import split_on_silence as split
+
+    segment = AudioSegment.from_file(io.BytesIO(audio), format="mp3")
+    chunks = split(segment, min_silence_len=MIN_SILENCE_MS,
+                   silence_thresh=segment.dBFS - SILENCE_BELOW_AVERAGE_DB, keep_silence=KEEP_SILENCE_MS)
+    if len(chunks) != count:
+        return None
+    clips = []
+    for chunk in chunks:
+        buffer = io.BytesIO()
+        chunk.export(buffer, format="mp3")
+        clips.append(buffer.getvalue())
+    return clips
+
+def synthesize_batch(texts, synthesize, acquire):
+    """Synthesize `texts` with a single request when the split verifies
+
+    `acquire` is called before every request (the engine's rate limiter).
+    Returns (clips, requests) with one MP3 per text, in order.
+    """
+    acquire()
+    if len(texts) == 1:
+        return [synthesize(texts[0])], 1
+    clips = split_on_silence(synthesize(BATCH_SEPARATOR.join(texts)), len(texts))
+    if clips is not None:
+        return clips, 1
+    # The split did not yield one clip per utterance; fall back to single requests
+    clips = []
+    for text in texts:
+        acquire()
+        clips.append(synthesize(text))
+    return clips, 1 + len(texts)
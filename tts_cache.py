@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache for synthesized audio
+Blobs are keyed by a hash of the synthesis parameters, and a manifest maps
+deck file names (e.g. sounds/cheat_sheet_consonant_ก.mp3) to the blob they were built from
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+CACHE_DIR = ".tts_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Serializes manifest merges when several decks synthesize at the same time
+_save_lock = threading.Lock()
+
+def engine_version():
+    """Return the installed gTTS version without importing gTTS itself"""
+    try:
+        from importlib.metadata import version
+        return f"gtts-{version('gTTS')}"
+    except Exception:
+        return "gtts-unknown"
+
+def _is_gtts(engine):
+    """True for Google's gTTS, in any version, but not gtts sent to a stand-in server"""
+    return engine.startswith("gtts-") and "|" not in engine
+
+class TTSCache:
+    """Audio blobs keyed by hash(text, lang, slow, tld, engine version) with LRU size-capped eviction"""
+
+    def __init__(self, cache_dir=CACHE_DIR, lang='th', slow=False, tld='com', engine=None,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.lang = lang
+        self.slow = slow
+        self.tld = tld
+        self.engine = engine or engine_version()
+        self.max_bytes = max_bytes
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        self.manifest = self._load()
+        self.touched_blobs = set()
+        self.touched_files = set()
+
+    def _load(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        return {"blobs": {}, "files": {}}
+
+    def key(self, text):
+        """Return the cache key for speaking `text` with this cache's parameters"""
+        params = [text, self.lang, self.slow, self.tld, self.engine]
+        return hashlib.sha256(json.dumps(params, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def blob_path(self, key):
+        return os.path.join(self.cache_dir, "blobs", key[:2], f"{key}.mp3")
+
+    def get(self, key):
+        """Return the blob path for `key`, or None on a miss"""
+        path = self.blob_path(key)
+        if key in self.manifest["blobs"] and os.path.exists(path):
+            self.manifest["blobs"][key]["last_used"] = time.time()
+            self.touched_blobs.add(key)
+            return path
+        return None
+
+    def put(self, key, data):
+        """Store audio bytes under `key` and return the blob path"""
+        path = self.blob_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.manifest["blobs"][key] = {"size": len(data), "last_used": time.time(), "engine": self.engine}
+        self.touched_blobs.add(key)
+        return path
+
+    def is_current(self, filename, key):
+        """True if `filename` exists and was built from blob `key`"""
+        return os.path.exists(filename) and self.manifest["files"].get(filename) == key
+
+    def is_stale(self, filename, key):
+        """True if `filename` was built from a different blob than `key`"""
+        recorded = self.manifest["files"].get(filename)
+        return recorded is not None and recorded != key
+
+    def can_adopt(self):
+        """True if untracked deck files may be adopted as this engine's output
+
+        The clips shipped in sounds/ were made with gTTS, so only the plain
+        gTTS engine may claim them; other engines leave them alone.
+        """
+        return self.engine == engine_version()
+
+    def keeps_gtts_clip(self, filename, untracked=True):
+        """True if `filename` is a gTTS clip that this engine must not overwrite
+
+        Other engines only fill in missing clips, so the gTTS ones never have
+        to be fetched from the network again. With `untracked`, files missing
+        from the manifest count as gTTS clips, as the ones shipped in sounds/
+        are; so do files from before blobs recorded their engine.
+        """
+        if _is_gtts(self.engine) or not os.path.exists(filename):
+            return False
+        key = self.manifest["files"].get(filename)
+        if key is None:
+            return untracked
+        engine = self.manifest["blobs"].get(key, {}).get("engine")
+        return engine is None or _is_gtts(engine)
+
+    def adopt(self, filename, key):
+        """Record an existing, untracked deck file as the blob for `key`"""
+        with open(filename, 'rb') as f:
+            self.put(key, f.read())
+        self.manifest["files"][filename] = key
+        self.touched_files.add(filename)
+
+    def materialize(self, filename, key):
+        """Copy blob `key` to the deck file `filename` and record the mapping"""
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        tmp = f"{filename}.tmp"
+        shutil.copyfile(self.blob_path(key), tmp)
+        os.replace(tmp, filename)
+        self.manifest["files"][filename] = key
+        self.touched_files.add(filename)
+
+    def evict(self):
+        """Drop least recently used blobs until the cache fits in max_bytes; return bytes freed"""
+        blobs = self.manifest["blobs"]
+        total = sum(entry["size"] for entry in blobs.values())
+        freed = 0
+        for key in sorted(blobs, key=lambda k: blobs[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            size = blobs.pop(key)["size"]
+            try:
+                os.remove(self.blob_path(key))
+            except FileNotFoundError:
+                pass
+            total -= size
+            freed += size
+        return freed
+
+    def save(self):
+        """Merge this run's entries into the on-disk manifest, evict if over the size cap, and write it atomically"""
+        with _save_lock:
+            merged = self._load()
+            for key in self.touched_blobs:
+                if key in self.manifest["blobs"]:
+                    merged["blobs"][key] = self.manifest["blobs"][key]
+            for filename in self.touched_files:
+                merged["files"][filename] = self.manifest["files"][filename]
+            self.manifest = merged
+            self.touched_blobs.clear()
+            self.touched_files.clear()
+            self.evict()
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{self.manifest_path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, self.manifest_path)
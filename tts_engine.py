@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Shared audio synthesis engine for the Thai deck generators
+Runs gTTS requests concurrently behind a token-bucket rate limiter
+"""
+
+import base64
+import os
+import re
+import threading
+import time
+
+import profiling
+from tts_backends import add_backend_arguments, get_backend
+from tts_batch import batching_available, make_batches, synthesize_batch
+from tts_cache import TTSCache
+from tts_journal import DEFAULT_RETRIES, AudioJournal, CircuitBreaker, call_with_retries
+
+DEFAULT_JOBS = 4
+DEFAULT_RATE = 4.0  # requests per second across all workers
+
+_thread_state = threading.local()
+# One breaker per process: every deck being built shares the same rate limit
+_breaker = CircuitBreaker()
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` acquisitions per second with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        if self.rate <= 0:
+            return
+        started = None
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                wait = (1 - self.tokens) / self.rate
+            if started is None:
+                started = time.perf_counter()
+            time.sleep(wait)
+        if started is not None:
+            profiling.record("rate_limit.wait", "wait", started, time.perf_counter() - started)
+
+def _session():
+    """Return this worker thread's HTTP session, creating it on first use"""
+    session = getattr(_thread_state, "session", None)
+    if session is None:
+        import requests
+        session = requests.Session()
+        _thread_state.session = session
+    return session
+
+def synthesize(text, lang='th', slow=False, base_url=None):
+    """Synthesize `text` with gTTS over the thread's reused HTTP session and return MP3 bytes
+
+    `base_url` replaces the Google Translate host, e.g. with a local fake_tts_server.py.
+    """
+    # The TTS stack is imported on first use, so TSV-only runs never load it
+    import urllib.request
+    from urllib.parse import urlsplit
+    from gtts import gTTS
+    from gtts.tts import gTTSError
+
+    tts = gTTS(text=text, lang=lang, slow=slow)
+    session = _session()
+    audio = bytearray()
+    # gTTS opens a new session per request; send its prepared requests ourselves
+    # so connections are kept alive across clips handled by this worker. This
+    # relies on gTTS internals (_prepare_requests and the jQ1olc reply), so the
+    # version is pinned in requirements.txt and checked by test_tts_engine.py.
+    for prepared in tts._prepare_requests():
+        if base_url:
+            prepared.url = base_url.rstrip("/") + urlsplit(prepared.url).path
+        response = session.send(prepared, proxies=urllib.request.getproxies())
+        if response.status_code != 200:
+            raise gTTSError(tts=tts, response=response)
+        found = False
+        for line in response.iter_lines(chunk_size=1024):
+            decoded_line = line.decode("utf-8")
+            if "jQ1olc" in decoded_line:
+                audio_search = re.search(r'jQ1olc","\[\\"(.*)\\"]', decoded_line)
+                if not audio_search:
+                    raise gTTSError(tts=tts, response=response)
+                audio += base64.b64decode(audio_search.group(1).encode("ascii"))
+                found = True
+        if not found:
+            raise gTTSError(tts=tts, response=response)
+    return bytes(audio)
+
+def synthesize_all(jobs, workers=None, rate=DEFAULT_RATE, synthesize=None, cache=None, batch=1,
+                   limiter=None, retries=DEFAULT_RETRIES, resume=False, journal=None, breaker=None, backend=None):
+    """Synthesize (label, text, filename) jobs concurrently and return a stats dict
+
+    With a TTSCache, deck files are rebuilt whenever their spoken text changes,
+    cached blobs are restored without a network call, and identical text under
+    several file names is synthesized only once. With `batch` > 1, up to that
+    many utterances share one request and are split locally at silences.
+    Pass a shared TokenBucket as `limiter` to rate-limit several concurrent runs together.
+
+    Failed requests are retried up to `retries` times with jittered exponential
+    backoff, and sustained rate limiting pauses every worker (`breaker`).
+    Progress is recorded in an AudioJournal; with `resume`, only files the
+    journal does not list as complete are redone, and untracked files already
+    on disk (possibly truncated by an interrupted run) are not trusted.
+    Untracked files are only adopted by the gTTS engine that made the shipped
+    clips. Other engines never overwrite those or any other gTTS clip; they
+    only fill in the missing ones.
+
+    `backend` is a tts_backends name or instance (default gTTS); a plain
+    `synthesize(text)` function can be passed instead. Local backends run
+    `workers` (default: one per CPU) at once with no rate limit or batching.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    if synthesize is None or backend is not None:
+        backend = get_backend(backend) if backend is None or isinstance(backend, str) else backend
+        synthesize = backend.synthesize
+        if not backend.rate_limited:
+            rate, limiter, batch = 0, None, 1
+    if workers is None:
+        workers = backend.default_workers() if backend else DEFAULT_JOBS
+    if cache is None:
+        cache = TTSCache(engine=backend.engine if backend else None)
+    if journal is None:
+        journal = AudioJournal(os.path.join(cache.cache_dir, "journal.json"))
+    breaker = breaker or _breaker
+    stats = {"generated": 0, "requests": 0, "retries": 0, "cached": 0, "skipped": 0, "failed": 0, "bytes": 0,
+             "seconds": 0.0}
+    pending = {}
+    with profiling.span("audio.plan", jobs=len(jobs)):
+        for label, text, filename in jobs:
+            key = cache.key(text)
+            if resume and journal.is_done(filename, key):
+                print(f"✓ {label} - Already completed")
+                profiling.instant("cache.skip", "cache", file=filename)
+                stats["skipped"] += 1
+            elif cache.is_current(filename, key):
+                print(f"✓ {label} - Audio file already exists")
+                profiling.instant("cache.skip", "cache", file=filename)
+                journal.mark_done(filename, key)
+                stats["skipped"] += 1
+            elif (not resume and cache.can_adopt() and os.path.exists(filename)
+                  and not cache.is_stale(filename, key)):
+                cache.adopt(filename, key)
+                print(f"✓ {label} - Audio file already exists")
+                profiling.instant("cache.skip", "cache", file=filename)
+                journal.mark_done(filename, key)
+                stats["skipped"] += 1
+            elif cache.keeps_gtts_clip(filename, untracked=not resume):
+                print(f"✓ {label} - Keeping the gTTS clip")
+                profiling.instant("cache.skip", "cache", file=filename)
+                journal.mark_done(filename, key)
+                stats["skipped"] += 1
+            elif cache.get(key):
+                with profiling.span("cache.restore", "io", file=filename):
+                    cache.materialize(filename, key)
+                print(f"✓ {label} - Restored {filename} from cache")
+                profiling.instant("cache.hit", "cache", file=filename)
+                journal.mark_done(filename, key)
+                stats["cached"] += 1
+            else:
+                pending.setdefault(key, (text, []))[1].append((label, filename))
+                journal.mark_pending(filename, key)
+
+    bucket = limiter or TokenBucket(rate)
+    if batch > 1 and not batching_available():
+        print("Batch mode needs pydub (pip install pydub, plus ffmpeg); sending one request per clip.")
+        batch = 1
+    batches = make_batches(list(pending), batch, text=lambda key: pending[key][0])
+
+    def timed_synthesize(text):
+        with profiling.span("tts.request", "item", chars=len(text)) as details:
+            audio = synthesize(text)
+            details["bytes"] = len(audio)
+        return audio
+
+    retry_lock = threading.Lock()
+
+    def note_retry(error):
+        with retry_lock:
+            stats["retries"] += 1
+        profiling.instant("tts.retry", "item", error=type(error).__name__)
+
+    def resilient_synthesize(text):
+        return call_with_retries(lambda: timed_synthesize(text), retries, breaker, bucket.acquire, note_retry)
+
+    def run(keys):
+        with profiling.span("tts.batch", "item", clips=len(keys)) as details:
+            clips, requests = synthesize_batch([pending[key][0] for key in keys], resilient_synthesize,
+                                               bucket.acquire)
+            # batches whose split failed are re-sent one clip per request
+            details["requests"] = requests
+        return clips, requests
+
+    started = time.monotonic()
+    with profiling.span("audio.synthesize", clips=len(pending), batches=len(batches)), \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run, keys): keys for keys in batches}
+        for future in as_completed(futures):
+            keys = futures[future]
+            try:
+                clips, requests = future.result()
+            except Exception as e:
+                for key in keys:
+                    for label, filename in pending[key][1]:
+                        stats["failed"] += 1
+                        journal.mark_failed(filename, key, e)
+                        print(f"✗ {label} - Error generating audio after {retries} retries: {e}")
+                continue
+            stats["requests"] += requests
+            for key, audio in zip(keys, clips):
+                with profiling.span("cache.write", "io", bytes=len(audio), files=len(pending[key][1])):
+                    cache.put(key, audio)
+                    for label, filename in pending[key][1]:
+                        cache.materialize(filename, key)
+                stats["bytes"] += len(audio)
+                for label, filename in pending[key][1]:
+                    journal.mark_done(filename, key)
+                    stats["generated"] += 1
+                    print(f"✓ {label} - Generated {filename}")
+    stats["seconds"] = time.monotonic() - started
+    if backend is not None:
+        backend.close()
+    with profiling.span("cache.save", "io"):
+        cache.save()
+        journal.flush(force=True)
+
+    report_throughput(stats)
+    if stats["failed"]:
+        print(f"✗ {stats['failed']} clips failed; rerun with --resume to redo only the incomplete ones")
+    return stats
+
+def report_throughput(stats):
+    """Print a one-line throughput summary for a synthesis run"""
+    seconds = stats["seconds"]
+    rate = stats["generated"] / seconds if seconds > 0 else 0.0
+    print(f"\nSynthesized {stats['generated']} clips ({stats['bytes'] / 1024:.1f} KB) with "
+          f"{stats['requests']} requests ({stats['retries']} retries) in {seconds:.1f}s "
+          f"({rate:.2f} clips/s); {stats['cached']} restored from cache, "
+          f"{stats['skipped']} already existed, {stats['failed']} failed")
+
+def add_audio_arguments(parser):
+    """Add the shared --tts/--jobs/--rate/--batch/--retries/--resume options to an argparse parser"""
+    add_backend_arguments(parser)
+    parser.add_argument('--jobs', type=int,
+                        help=f"number of concurrent TTS requests (default: {DEFAULT_JOBS} for gtts, "
+                             "one per CPU for local backends)")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f"maximum TTS requests per second, 0 for unlimited (default: {DEFAULT_RATE})")
+    parser.add_argument('--batch', type=int, default=1,
+                        help="pack up to this many utterances into one TTS request and split the audio "
+                             "at silences (needs pydub; default: 1, no batching)")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f"retries per failed TTS request, with exponential backoff (default: {DEFAULT_RETRIES})")
+    parser.add_argument('--resume', action='store_true',
+                        help="redo only the clips the job journal does not list as complete")
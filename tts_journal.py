@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Persistent journal of audio synthesis jobs, plus retry and circuit-breaking helpers
+The journal records which deck files were completed from which cache key, and
+is flushed atomically while a run is in progress, so an interrupted or
+rate-limited build can be finished with --resume without redoing work
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+import profiling
+
+JOURNAL_PATH = os.path.join(".tts_cache", "journal.json")
+DEFAULT_RETRIES = 4
+BASE_DELAY = 1.0     # seconds before the first retry; doubles per attempt
+MAX_DELAY = 60.0
+
+# Serializes journal merges when several decks synthesize at the same time
+_save_lock = threading.Lock()
+
+class AudioJournal:
+    """Per-file job states ("pending", "done", "failed"), flushed atomically at most every `flush_interval` seconds"""
+
+    def __init__(self, path=JOURNAL_PATH, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.entries = self._load()
+        self.touched = set()
+        self.flushed = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)["files"]
+        return {}
+
+    def is_done(self, filename, key):
+        """True if `filename` was completed from `key` and is still the file that was written"""
+        entry = self.entries.get(filename)
+        if not entry or entry["status"] != "done" or entry["key"] != key:
+            return False
+        try:
+            return os.path.getsize(filename) == entry["size"]
+        except OSError:
+            return False
+
+    def _mark(self, filename, **entry):
+        with self.lock:
+            self.entries[filename] = entry
+            self.touched.add(filename)
+        self.flush()
+
+    def mark_pending(self, filename, key):
+        self._mark(filename, key=key, status="pending")
+
+    def mark_done(self, filename, key):
+        self._mark(filename, key=key, status="done", size=os.path.getsize(filename))
+
+    def mark_failed(self, filename, key, error):
+        self._mark(filename, key=key, status="failed", error=str(error)[:200])
+
+    def incomplete(self):
+        """Return the files that are recorded but not done"""
+        return sorted(filename for filename, entry in self.entries.items() if entry["status"] != "done")
+
+    def flush(self, force=False):
+        """Merge this run's entries into the on-disk journal and write it atomically"""
+        with self.lock:
+            if not self.touched or (not force and time.monotonic() - self.flushed < self.flush_interval):
+                return
+            touched = {filename: self.entries[filename] for filename in self.touched}
+            self.touched.clear()
+            self.flushed = time.monotonic()
+        with _save_lock:
+            merged = self._load()
+            merged.update(touched)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"files": merged}, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+
+def is_rate_limited(error):
+    """True if a synthesis error was an HTTP 429 from the TTS service"""
+    response = getattr(error, "rsp", None) or getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    return "429" in str(error)
+
+class CircuitBreaker:
+    """Pauses every worker after `threshold` consecutive rate-limit errors
+
+    Each time it opens, the pause doubles (from `cooldown` up to `max_cooldown`).
+    Once the pause is over the breaker is half-open: a success closes it and
+    resets the pause, while a single rate-limit error opens it again.
+    """
+
+    def __init__(self, threshold=3, cooldown=30.0, max_cooldown=300.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failures = 0
+        self.pause = cooldown
+        self.open_until = 0.0
+        self.tripped = False  # opened since the last success
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        """"closed", "open" (workers are paused) or "half-open" (the next result decides)"""
+        with self.lock:
+            if time.monotonic() < self.open_until:
+                return "open"
+            return "half-open" if self.tripped else "closed"
+
+    def wait(self):
+        """Block while the breaker is open"""
+        while True:
+            with self.lock:
+                remaining = self.open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            started = time.perf_counter()
+            time.sleep(remaining)
+            profiling.record("circuit_breaker.wait", "wait", started, time.perf_counter() - started)
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.pause = self.cooldown
+            self.tripped = False
+
+    def record_rate_limited(self):
+        with self.lock:
+            if time.monotonic() < self.open_until:
+                return  # a request sent before the breaker opened
+            self.failures += 1
+            if self.failures < (1 if self.tripped else self.threshold):
+                return
+            self.open_until = time.monotonic() + self.pause
+            print(f"✗ Rate limited {self.failures} times in a row; pausing all requests for {self.pause:.0f}s")
+            profiling.instant("circuit_breaker.open", "wait", seconds=self.pause)
+            self.pause = min(self.max_cooldown, self.pause * 2)
+            self.failures = 0
+            self.tripped = True
+
+def backoff_delay(attempt, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """Exponential backoff with full jitter for retry number `attempt` (1-based)"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+def call_with_retries(function, retries, breaker, acquire, on_retry=None):
+    """Call `function()`, retrying failures up to `retries` times with backoff
+
+    `acquire` (the rate limiter) is called before every retry, and every
+    attempt first waits for `breaker` to close. The last error is re-raised.
+    """
+    attempt = 0
+    while True:
+        breaker.wait()
+        try:
+            result = function()
+        except Exception as e:
+            if is_rate_limited(e):
+                breaker.record_rate_limited()
+            attempt += 1
+            if attempt > retries:
+                raise
+            if on_retry:
+                on_retry(e)
+            time.sleep(backoff_delay(attempt))
+            acquire()
+        else:
+            breaker.record_success()
+            return result
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+MP3 integrity and duration validator for sounds/
+Memory-maps each clip and walks its MPEG frame headers without decoding,
+which gives the duration and average bitrate and catches empty files,
+non-MP3 payloads (e.g. a saved HTML error page), lost frame sync and
+truncated last frames. Every [sound:...] reference in the deck TSVs is
+checked against the media directory. Clips are scanned across a process pool.
+"""
+
+import argparse
+import functools
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import profiling
+from anki_package import SOUND_REFERENCE
+
+MEDIA_DIR = "sounds"
+DEFAULT_TSVS = ["thai_consonants.tsv", "thai_vowels.tsv"]
+MIN_DURATION = 0.1  # seconds; anything shorter cannot hold a spoken syllable
+POOL_THRESHOLD = 512  # fewer clips are scanned in-process, faster than starting a pool
+
+# Bitrates in kbps by (MPEG version, layer) and bitrate index; version 1 is MPEG-1, 2 is MPEG-2 and 2.5
+BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Header version bits -> (version, sample rates); 0b01 is reserved
+VERSIONS = {0b11: (1, (44100, 48000, 32000)), 0b10: (2, (22050, 24000, 16000)), 0b00: (2, (11025, 12000, 8000))}
+LAYERS = {0b11: 1, 0b10: 2, 0b01: 3}
+
+ID3V2_HEADER_BYTES = 10
+ID3V1_TAG_BYTES = 128
+# Header bits that decide the frame layout (sync, version, layer, bitrate, rate, padding)
+LAYOUT_BITS = 0xFFFFFE00
+_HEADER = struct.Struct(">I")
+
+@functools.lru_cache(maxsize=None)
+def _parse_layout(header):
+    return parse_header(header)
+
+def parse_header(header):
+    """Return (frame bytes, samples, sample rate, kbps) for a 4-byte frame header, or None if it is not one"""
+    if header >> 21 != 0x7FF:
+        return None
+    version_bits = (header >> 19) & 0b11
+    layer_bits = (header >> 17) & 0b11
+    bitrate_index = (header >> 12) & 0b1111
+    rate_index = (header >> 10) & 0b11
+    if version_bits not in VERSIONS or layer_bits not in LAYERS or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved values, or free-format streams that this repo never produces
+    version, rates = VERSIONS[version_bits]
+    layer = LAYERS[layer_bits]
+    padding = (header >> 9) & 1
+    kbps = BITRATES[(version, layer)][bitrate_index]
+    sample_rate = rates[rate_index]
+    if layer == 1:
+        return (12000 * kbps // sample_rate + padding) * 4, 384, sample_rate, kbps
+    samples = 576 if layer == 3 and version == 2 else 1152
+    return samples // 8 * 1000 * kbps // sample_rate + padding, samples, sample_rate, kbps
+
+def _id3v2_size(data):
+    if len(data) < ID3V2_HEADER_BYTES or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = ID3V2_HEADER_BYTES if data[5] & 0x10 else 0
+    return ID3V2_HEADER_BYTES + size + footer
+
+def _describe_junk(data):
+    start = bytes(data[:64]).lstrip()
+    if start[:1] == b"<":
+        return "an HTML/XML document, not MP3 audio"
+    if start[:1] in (b"{", b"["):
+        return "a JSON document, not MP3 audio"
+    return "no MPEG frame at the start of the audio"
+
+def scan_mp3(path):
+    """Walk the frame headers of one MP3 and return a dict describing it
+
+    The dict has the file's size, frame count, duration (seconds), average
+    bitrate (kbps) and `error`, which is None for a valid clip.
+    """
+    result = {"file": path, "bytes": 0, "frames": 0, "duration": 0.0, "kbps": 0, "error": None}
+    try:
+        size = os.path.getsize(path)
+        result["bytes"] = size
+        if size == 0:
+            result["error"] = "empty file"
+            return result
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            _walk_frames(data, size, result)
+    except OSError as e:
+        result["error"] = str(e)
+    return result
+
+def _walk_frames(data, size, result):
+    end = size
+    if size >= ID3V1_TAG_BYTES and data[size - ID3V1_TAG_BYTES:size - ID3V1_TAG_BYTES + 3] == b"TAG":
+        end -= ID3V1_TAG_BYTES
+    first = position = _id3v2_size(data)
+    if position > end:
+        result["error"] = "truncated ID3 tag"
+        return
+    frames = 0
+    layout = None
+    last_header = None
+    frame_bytes = 0
+    # Most clips repeat one or two headers, so the loop only re-parses when the header changes
+    while position < end:
+        if end - position < 4:
+            result["error"] = f"truncated: {end - position} stray bytes after the last frame"
+            break
+        header = _HEADER.unpack_from(data, position)[0] & LAYOUT_BITS
+        if header != last_header:
+            parsed = _parse_layout(header)
+            if parsed is None:
+                if frames == 0:
+                    result["error"] = _describe_junk(data[position:position + 64])
+                elif data[position:end].strip(b"\0"):
+                    result["error"] = f"lost frame sync at byte {position} after {frames} frames"
+                # else: zero padding after the last frame
+                break
+            if layout and parsed[1:3] != layout[1:3]:
+                result["error"] = (f"stream changes from {layout[2]} Hz to {parsed[2]} Hz "
+                                   f"(or changes layer) at byte {position}")
+                break
+            layout = parsed
+            frame_bytes = parsed[0]
+            last_header = header
+        if position + frame_bytes > end:
+            result["error"] = f"truncated: last frame needs {frame_bytes} bytes, {end - position} present"
+            break
+        frames += 1
+        position += frame_bytes
+    result["frames"] = frames
+    audio_frames = frames
+    audio_bytes = position - first
+    # A leading Xing/Info frame only carries VBR metadata, not audio
+    if frames and (data.find(b"Xing", first, first + 64) != -1 or data.find(b"Info", first, first + 64) != -1):
+        audio_frames -= 1
+        audio_bytes -= _parse_layout(_HEADER.unpack_from(data, first)[0] & LAYOUT_BITS)[0]
+    if audio_frames > 0:
+        frame_samples, sample_rate = layout[1], layout[2]
+        result["duration"] = audio_frames * frame_samples / sample_rate
+        result["kbps"] = round(audio_bytes * 8 / result["duration"] / 1000)
+    if result["error"] is None and frames == 0:
+        result["error"] = "no audio frames"
+
+def sound_references(tsv_paths):
+    """Return {clip name: [TSV files referencing it]} for every [sound:...] in `tsv_paths`"""
+    references = {}
+    for path in tsv_paths:
+        with open(path, encoding='utf-8') as f:
+            for name in SOUND_REFERENCE.findall(f.read()):
+                files = references.setdefault(name, [])
+                if path not in files:
+                    files.append(path)
+    return references
+
+@profiling.traced("validate_audio")
+def validate(tsv_paths=DEFAULT_TSVS, media_dir=MEDIA_DIR, workers=None, min_duration=MIN_DURATION,
+             all_clips=False):
+    """Scan the clips referenced by `tsv_paths` (or every MP3 in `media_dir`) and return a report dict
+
+    The report has per-clip "results", the "missing" references and the
+    "problems" as (file, message) pairs; it is valid when "problems" is empty.
+    """
+    references = sound_references(tsv_paths)
+    present = set(name for name in os.listdir(media_dir) if name.endswith(".mp3")) if os.path.isdir(media_dir) else set()
+    names = sorted(present if all_clips else present & set(references))
+    paths = [os.path.join(media_dir, name) for name in names]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < POOL_THRESHOLD:
+        results = list(map(scan_mp3, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(paths) // (workers * 4))
+            results = list(pool.map(scan_mp3, paths, chunksize=chunksize))
+
+    problems = []
+    missing = sorted(name for name in references if name not in present)
+    for name in missing:
+        problems.append((os.path.join(media_dir, name), f"missing, referenced by {', '.join(references[name])}"))
+    for result in results:
+        if result["error"]:
+            problems.append((result["file"], result["error"]))
+        elif result["duration"] < min_duration:
+            problems.append((result["file"], f"only {result['duration'] * 1000:.0f} ms of audio"))
+    return {"results": results, "missing": missing, "problems": problems, "references": len(references)}
+
+def print_report(report, seconds):
+    for path, message in report["problems"]:
+        print(f"✗ {path} - {message}")
+    results = report["results"]
+    duration = sum(result["duration"] for result in results)
+    audio_bytes = sum(result["bytes"] for result in results if not result["error"])
+    kbps = audio_bytes * 8 / duration / 1000 if duration else 0
+    invalid = len(report["problems"]) - len(report["missing"])
+    print(f"Checked {len(results)} clips ({duration:.1f} s of audio, {kbps:.0f} kbps average) "
+          f"and {report['references']} sound references in {seconds * 1000:.0f} ms: "
+          f"{len(report['missing'])} missing, {invalid} invalid")
+    if not report["problems"]:
+        print("✓ All referenced clips are present and valid")
+
+def main(argv=None):
+    """Validate the deck audio; returns 0 when everything is valid, 1 otherwise"""
+    parser = argparse.ArgumentParser(description="Check the MP3 clips in sounds/ and the decks' references to them")
+    parser.add_argument('--tsv', nargs='+', default=DEFAULT_TSVS,
+                        help=f"TSV decks whose [sound:...] references are checked (default: {' '.join(DEFAULT_TSVS)})")
+    parser.add_argument('--media-dir', default=MEDIA_DIR, help=f"directory holding the clips (default: {MEDIA_DIR})")
+    parser.add_argument('--all', action='store_true', help="also scan clips no deck references")
+    parser.add_argument('--workers', type=int, default=None, help="processes scanning clips (default: one per CPU)")
+    parser.add_argument('--min-duration', type=float, default=MIN_DURATION,
+                        help=f"flag clips shorter than this many seconds (default: {MIN_DURATION})")
+    args = parser.parse_args(argv)
+
+    tsv_paths = [path for path in args.tsv if os.path.exists(path)]
+    for path in sorted(set(args.tsv) - set(tsv_paths)):
+        print(f"✗ {path} not found; generate the deck first")
+    started = time.perf_counter()
+    report = validate(tsv_paths, args.media_dir, args.workers, args.min_duration, all_clips=args.all)
+    print_report(report, time.perf_counter() - started)
+    return 1 if report["problems"] or len(tsv_paths) < len(args.tsv) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())